@@ -1,17 +1,20 @@
 """
 Backfill missing iTunes preview and artwork URLs into an existing parquet.
+
+Lookups run in batches on the ETL crawler's worker pool, under its iTunes
+rate limit; filled values are written back column-wise at each checkpoint.
 """
 
 from __future__ import annotations
 
 import argparse
-import time
 from pathlib import Path
 from typing import Optional
 
 import pandas as pd
 
 from backend.src.recsys.config import PROC
+from backend.src.recsys.crawler import ETL_CONCURRENCY, map_concurrent
 from backend.src.recsys.etl_lastfm import _cached_itunes_preview
 
 
@@ -19,11 +22,21 @@ def _missing(series: pd.Series) -> pd.Series:
     return series.isna() | (series.astype(str).str.strip() == "")
 
 
+def _lookup(
+    title: str, artist: str, refresh_cache: bool
+) -> Optional[tuple[Optional[str], Optional[str]]]:
+    try:
+        return _cached_itunes_preview(title, artist, refresh_if_empty=refresh_cache)
+    except Exception as exc:  # keep going on request errors
+        print(f"[warn] request failed for {title} - {artist}: {exc}")
+        return None
+
+
 def backfill_itunes(
     parquet_path: Path,
     out_path: Optional[Path] = None,
     batch_size: int = 500,
-    sleep_s: float = 0.2,
+    concurrency: int = ETL_CONCURRENCY,
     save_every: int = 200,
     only_missing: bool = True,
     overwrite: bool = False,
@@ -39,8 +52,10 @@ def backfill_itunes(
     if missing_cols:
         raise RuntimeError(f"Parquet missing columns: {missing_cols}")
 
-    mask_missing = _missing(df["preview_url"]) | _missing(df["artwork_url"])
-    work_df = df[mask_missing] if only_missing else df
+    has_prev = ~_missing(df["preview_url"])
+    has_art = ~_missing(df["artwork_url"])
+    complete = has_prev & has_art
+    work_df = df[~complete] if only_missing else df
     if batch_size and batch_size > 0:
         work_df = work_df.head(batch_size)
 
@@ -52,50 +67,60 @@ def backfill_itunes(
     out_path = Path(out_path)
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
+    total_rows = len(work_df)
+    # Rows that already have both URLs are only looked up when overwriting
+    todo = work_df if overwrite else work_df[~complete.loc[work_df.index]]
+    skipped = total_rows - len(todo)
+    want_prev = pd.Series(True, index=todo.index) if overwrite else ~has_prev.loc[todo.index]
+    want_art = pd.Series(True, index=todo.index) if overwrite else ~has_art.loc[todo.index]
+
     filled_prev = 0
     filled_art = 0
-    skipped = 0
-    updates_since_save = 0
     total_updates = 0
-    total_rows = len(work_df)
-
-    for processed, (idx, row) in enumerate(work_df.iterrows(), start=1):
-        title = str(row["title"])
-        artist = str(row["artist"])
-
-        has_prev = not _missing(pd.Series([row["preview_url"]])).iloc[0]
-        has_art = not _missing(pd.Series([row["artwork_url"]])).iloc[0]
-
-        if not overwrite and has_prev and has_art:
-            skipped += 1
-            continue
-
-        try:
-            prev, art = _cached_itunes_preview(
-                title, artist, refresh_if_empty=refresh_cache
-            )
-        except Exception as exc:  # keep going on request errors
-            print(f"[warn] request failed for {title} - {artist}: {exc}")
-            skipped += 1
-            continue
-
-        updated = False
-        if overwrite or not has_prev:
-            if prev:
-                df.at[idx, "preview_url"] = prev
-                filled_prev += 1
-                updated = True
-        if overwrite or not has_art:
-            if art:
-                df.at[idx, "artwork_url"] = art
-                filled_art += 1
-                updated = True
-
-        if not updated:
-            skipped += 1
-        else:
-            updates_since_save += 1
-            total_updates += 1
+    updates_since_save = 0
+    pending_prev: list[pd.Series] = []
+    pending_art: list[pd.Series] = []
+
+    def flush() -> None:
+        # One column-wise assignment for everything filled since the last save
+        for col, pending in (("preview_url", pending_prev), ("artwork_url", pending_art)):
+            if pending:
+                values = pd.concat(pending)
+                df.loc[values.index, col] = values
+                pending.clear()
+
+    chunk = max(1, concurrency * 4)
+    processed = skipped
+    for start in range(0, len(todo), chunk):
+        batch = todo.iloc[start : start + chunk]
+        results = map_concurrent(
+            lambda r: _lookup(str(r.title), str(r.artist), refresh_cache),
+            list(batch.itertuples(index=False)),
+            concurrency,
+        )
+        prev = pd.Series([r[0] if r else None for r in results], index=batch.index, dtype=object)
+        art = pd.Series([r[1] if r else None for r in results], index=batch.index, dtype=object)
+        fill_prev = want_prev.loc[batch.index] & ~_missing(prev)
+        fill_art = want_art.loc[batch.index] & ~_missing(art)
+        updated = fill_prev | fill_art
+
+        stop = False
+        if max_updates is not None and total_updates + int(updated.sum()) >= max_updates:
+            # Cut the batch right after the row that reaches max_updates
+            last = int((updated.cumsum() >= max_updates - total_updates).to_numpy().argmax())
+            keep = batch.index[: last + 1]
+            fill_prev, fill_art, updated = fill_prev.loc[keep], fill_art.loc[keep], updated.loc[keep]
+            stop = True
+
+        pending_prev.append(prev[fill_prev[fill_prev].index])
+        pending_art.append(art[fill_art[fill_art].index])
+        filled_prev += int(fill_prev.sum())
+        filled_art += int(fill_art.sum())
+        n_updated = int(updated.sum())
+        total_updates += n_updated
+        updates_since_save += n_updated
+        skipped += len(updated) - n_updated
+        processed += len(updated)
 
         print(
             f"processed {processed}/{total_rows}; "
@@ -106,16 +131,16 @@ def backfill_itunes(
         )
 
         if updates_since_save >= save_every:
+            flush()
             df.to_parquet(out_path, index=False)
             print(f"checkpoint saved to {out_path}")
             updates_since_save = 0
 
-        if max_updates is not None and total_updates >= max_updates:
+        if stop:
             print(f"Reached max-updates={max_updates}, stopping early.")
             break
 
-        time.sleep(sleep_s)
-
+    flush()
     df.to_parquet(out_path, index=False)
     print(
         f"Done. wrote {len(df)} rows to {out_path}. "
@@ -146,11 +171,10 @@ def parse_args() -> argparse.Namespace:
         help="Max rows to process this run.",
     )
     parser.add_argument(
-        "--sleep",
-        dest="sleep_s",
-        type=float,
-        default=0.2,
-        help="Seconds to sleep between requests.",
+        "--concurrency",
+        type=int,
+        default=ETL_CONCURRENCY,
+        help="Concurrent iTunes lookups (still rate limited per host).",
     )
     parser.add_argument(
         "--save-every",
@@ -192,7 +216,7 @@ def main() -> None:
         parquet_path=args.parquet,
         out_path=args.out,
         batch_size=args.batch_size,
-        sleep_s=args.sleep_s,
+        concurrency=args.concurrency,
         save_every=args.save_every,
         only_missing=args.only_missing,
         overwrite=args.overwrite,
@@ -0,0 +1,86 @@
+# src/cli/bench_db_writes.py
+"""
+Write-throughput benchmark for the interaction path (db.write_interactions)
+against whichever backend DB_BACKEND selects, e.g.
+
+    DB_BACKEND=sqlite SQLITE_PATH=/tmp/bench.db python -m src.cli.bench_db_writes
+    DB_BACKEND=postgres DATABASE_URL=postgresql://localhost/dscvr \\
+        python -m src.cli.bench_db_writes --events 50000 --batch-size 500
+
+--concurrency N drives the async path (db.awrite_interactions) with N
+batches in flight instead of the sync loop.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+from src.recsys.service import db
+
+TAGS = ["pop", "rock", "indie", "electronic", "jazz", "hip-hop", "folk", "metal"]
+TYPES = ["heart", "complete", "skip"]
+
+
+def _events(n: int, users: list[str], rng: random.Random) -> list[dict]:
+    return [
+        {
+            "user_id": rng.choice(users),
+            "track_id": str(rng.randrange(100_000)),
+            "interaction_type": rng.choice(TYPES),
+            "feature": "bench",
+            "tags": rng.sample(TAGS, 3),
+            "timestamp": None,
+        }
+        for _ in range(n)
+    ]
+
+
+async def _write_concurrently(batches: list[list[dict]], concurrency: int) -> int:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(batch: list[dict]) -> bool:
+        async with sem:
+            return await db.awrite_interactions(batch)
+
+    results = await asyncio.gather(*(one(b) for b in batches))
+    return results.count(False)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--events", type=int, default=10_000)
+    ap.add_argument("--batch-size", type=int, default=200)
+    ap.add_argument("--users", type=int, default=100)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--concurrency", type=int, default=0, help="async batches in flight (0 = sync)")
+    args = ap.parse_args()
+
+    backend = db.get_backend()
+    if backend is None:
+        raise SystemExit("No storage backend configured (set DB_BACKEND / credentials).")
+
+    rng = random.Random(args.seed)
+    users = [str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(args.users)]
+    events = _events(args.events, users, rng)
+
+    batches = [events[i : i + args.batch_size] for i in range(0, len(events), args.batch_size)]
+    started = time.perf_counter()
+    if args.concurrency > 0:
+        failed = asyncio.run(_write_concurrently(batches, args.concurrency))
+    else:
+        failed = sum(not db.write_interactions(b) for b in batches)
+    elapsed = time.perf_counter() - started
+
+    print(f"backend      {backend.name}")
+    print(f"events       {len(events)} in batches of {args.batch_size} ({failed} failed)")
+    print(f"elapsed      {elapsed:.2f}s")
+    print(f"throughput   {len(events) / elapsed:,.0f} events/s")
+    for op, s in db.stats()["queries"].items():
+        print(f"  {op:<28} {s['calls']:>6} calls  mean {s['s_mean'] * 1000:7.2f}ms  max {s['s_max'] * 1000:7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# src/cli/build_lastfm_dataset.py
+"""
+Build (or incrementally update) the Last.fm catalog parquet.
+
+    python -m src.cli.build_lastfm_dataset                        # full rebuild
+    python -m src.cli.build_lastfm_dataset --incremental          # only new tracks
+    python -m src.cli.build_lastfm_dataset --incremental --refresh-days 30
+
+Every run also writes <out stem>.<version>.parquet, then appends what
+changed (added/removed/refreshed/relabelled row indices, plus the snapshot
+file it was diffed against) to <out>.changelog.jsonl next to the parquet.
+"""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+from src.recsys.config import PROC
+from src.recsys.crawler import ETL_CONCURRENCY
+from src.recsys.etl_lastfm import build_lastfm_dataset
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the Last.fm tracks dataset.")
+    parser.add_argument("--out", type=Path, default=PROC / "tracks_lastfm2.parquet", help="Output parquet path")
+    parser.add_argument("--chart-pages", type=int, default=50)
+    parser.add_argument("--geo-pages", type=int, default=5)
+    parser.add_argument("--no-similar", dest="expand_similar", action="store_false", help="Skip track.getSimilar expansion")
+    parser.add_argument("--no-itunes", dest="itunes", action="store_false", help="Skip iTunes previews/artwork")
+    parser.add_argument("--concurrency", type=int, default=ETL_CONCURRENCY, help="Concurrent API requests")
+    parser.add_argument("--incremental", action="store_true", help="Only enrich tracks not already in --out")
+    parser.add_argument("--refresh-days", type=float, default=None, help="With --incremental, re-enrich rows older than this")
+    args = parser.parse_args()
+
+    build_lastfm_dataset(
+        out_path=args.out,
+        chart_pages=args.chart_pages,
+        geo_pages=args.geo_pages,
+        expand_similar=args.expand_similar,
+        itunes=args.itunes,
+        concurrency=args.concurrency,
+        incremental=args.incremental,
+        refresh_ttl_s=args.refresh_days * 86400 if args.refresh_days is not None else None,
+    )
+
+
+if __name__ == "__main__":
+    main()
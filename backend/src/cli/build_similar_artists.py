@@ -0,0 +1,79 @@
+# src/cli/build_similar_artists.py
+"""
+Precompute Last.fm similar artists for every artist in an artifact bundle
+and write them to <bundle>/similar_artists.json, so Séance requests for
+catalog artists never call Last.fm at serving time.
+
+    python -m src.cli.build_similar_artists                # CURRENT bundle
+    python -m src.cli.build_similar_artists --version 20250101T000000Z
+
+Responses go through the ETL's Last.fm cache (see recsys/cache.py),
+so reruns only fetch artists that weren't cached yet. Lookups run on the
+ETL crawler's worker pool under its Last.fm rate limit. Artists whose lookup
+failed are left out of the graph and fall back to a live lookup.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+
+from src.recsys import etl_lastfm
+from src.recsys.artifacts import resolve_dir
+from src.recsys.cache import similar_artists_entry
+from src.recsys.crawler import ETL_CONCURRENCY, map_concurrent
+from src.recsys.service.lastfm_client import LASTFM_SIMILAR_LIMIT, SIMILAR_ARTISTS_FILE
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Precompute the similar-artist graph for a bundle.")
+    parser.add_argument("--version", default=None, help="Artifact version (default: CURRENT)")
+    parser.add_argument("--concurrency", type=int, default=ETL_CONCURRENCY, help="Concurrent Last.fm lookups")
+    parser.add_argument("--max-artists", type=int, default=None, help="Stop after N artists")
+    args = parser.parse_args()
+
+    _, art_dir = resolve_dir(args.version)
+    with (art_dir / "id_map.json").open() as f:
+        id_map = json.load(f)
+
+    # First spelling seen for each artist is the one sent to Last.fm
+    artists: dict[str, str] = {}
+    for row in id_map:
+        artists.setdefault(row["artist"].lower(), row["artist"])
+    names = list(artists.items())[: args.max_artists]
+
+    def lookup(artist: str) -> tuple[list[str], bool]:
+        similar = etl_lastfm.artist_get_similar(artist, limit=LASTFM_SIMILAR_LIMIT)
+        ok = etl_lastfm._lastfm_cache.get(*similar_artists_entry(artist, LASTFM_SIMILAR_LIMIT)) is not None
+        return similar, ok
+
+    graph: dict[str, list[str]] = {}
+    fetched = failed = 0
+    started = time.perf_counter()
+    chunk = 500
+    for start in range(0, len(names), chunk):
+        batch = names[start : start + chunk]
+        entries = [similar_artists_entry(artist, LASTFM_SIMILAR_LIMIT) for _, artist in batch]
+        cached = etl_lastfm._lastfm_cache.get_many(entries[0][0], [key for _, key in entries])
+        fetched += len(batch) - len(cached)
+        results = map_concurrent(lookup, [artist for _, artist in batch], args.concurrency)
+        for (key, _), (similar, ok) in zip(batch, results):
+            if not ok:
+                failed += 1
+                continue
+            graph[key] = similar
+        print(f"[similar_artists] {start + len(batch)}/{len(names)} artists ({fetched} fetched, {failed} failed)")
+
+    out = art_dir / SIMILAR_ARTISTS_FILE
+    tmp = out.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(graph))
+    os.replace(tmp, out)
+    print(
+        f"✅ Wrote {len(graph)} artists to {out} "
+        f"({fetched} fetched, {failed} failed, {time.perf_counter() - started:.1f}s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
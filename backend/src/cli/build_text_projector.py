@@ -0,0 +1,16 @@
+# src/cli/build_text_projector.py
+"""
+Write the light form of text_svd.pkl (text_vectorizer.json + text_*.npy)
+for bundles trained before train_text wrote it. Serving loads it without
+unpickling and mmaps the projection matrix.
+"""
+from src.recsys.artifacts import resolve_dir
+from src.recsys.recommenders.cosine import TEXT_PIPELINE, write_text_projector
+
+if __name__ == "__main__":
+    _, art_dir = resolve_dir()
+    if not (art_dir / TEXT_PIPELINE).exists():
+        print(f"No {TEXT_PIPELINE} in {art_dir} — skipping.")
+    else:
+        out = write_text_projector(art_dir)
+        print(f"✅ Saved: {out}" if out else f"{TEXT_PIPELINE} can't be converted — serving will unpickle it.")
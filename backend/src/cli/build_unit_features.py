@@ -0,0 +1,14 @@
+# src/cli/build_unit_features.py
+"""
+Write data/artifacts/features_unit.npy (row-normalised float32 features).
+Run at image build time so every serving worker mmaps the same file.
+"""
+from src.recsys.artifacts import resolve_dir
+from src.recsys.recommenders.cosine import write_unit_features
+
+if __name__ == "__main__":
+    _, art_dir = resolve_dir()
+    if not (art_dir / "features.npy").exists():
+        print(f"No features.npy in {art_dir} — skipping.")
+    else:
+        print(f"✅ Saved: {write_unit_features(art_dir)}")
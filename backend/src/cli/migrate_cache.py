@@ -0,0 +1,55 @@
+# src/cli/migrate_cache.py
+"""
+One-shot import of the per-response JSON files under data/processed/cache
+(lastfm/, itunes/) into the consolidated SQLite cache (recsys/cache.py).
+
+    python -m src.cli.migrate_cache             # import, keep the JSON files
+    python -m src.cli.migrate_cache --delete    # import, then remove them
+
+Safe to rerun: entries already imported are left as they are.
+
+File names only kept safe_key(key), so keys that differ only in punctuation
+or spacing ("AC/DC", "AC DC") shared a file and keep sharing the imported
+entry. The first fresh write for such a key replaces it with a per-key entry.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+from src.recsys.cache import CACHE_DB, CACHE_DIR, SqliteCache
+
+NAMESPACES = ("lastfm", "itunes")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import the JSON-file response cache into SQLite.")
+    parser.add_argument("--db", default=str(CACHE_DB), help="Target SQLite file")
+    parser.add_argument("--delete", action="store_true", help="Remove the JSON files once imported")
+    args = parser.parse_args()
+
+    for name in NAMESPACES:
+        root = CACHE_DIR / name
+        if not root.is_dir():
+            print(f"[{name}] no {root} — skipping")
+            continue
+        cache = SqliteCache(args.db, namespace=name)
+        started = time.perf_counter()
+        imported = cache.import_dir(root)
+        print(f"[{name}] imported {imported} files in {time.perf_counter() - started:.1f}s ({len(cache)} entries)")
+        if args.delete:
+            removed = 0
+            for path in root.glob("*.json"):
+                path.unlink()
+                removed += 1
+            print(f"[{name}] removed {removed} JSON files")
+
+    print(
+        "Imported entries are keyed by file name, so keys that collapse to the same name\n"
+        "(e.g. 'AC/DC' and 'AC DC') share one entry until either is next fetched."
+    )
+    print(f"✅ {args.db}")
+
+
+if __name__ == "__main__":
+    main()
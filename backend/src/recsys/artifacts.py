@@ -0,0 +1,78 @@
+# src/recsys/artifacts.py
+"""
+Versioned artifact bundles.
+
+    data/artifacts/
+      CURRENT                    ← name of the active version (one line)
+      versions/<version>/
+        features.npy
+        features_unit.npy
+        id_map.json
+        text_svd.pkl
+        text_vectorizer.json     ← text_svd.pkl as plain arrays (+ text_vocab/idf/projection.npy)
+        tracks.parquet           ← catalog metadata aligned row-for-row with id_map
+
+Training writes a new version directory and then publishes it by rewriting
+CURRENT atomically. Serving resolves CURRENT at load time. Without a CURRENT
+file the flat legacy layout (files directly in data/artifacts) is used.
+"""
+from __future__ import annotations
+
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+from .config import ART
+
+VERSIONS_DIR = ART / "versions"
+CURRENT_FILE = ART / "CURRENT"
+BUNDLE_PARQUET = "tracks.parquet"
+
+
+def version_dir(version: str, art_root: Path = ART) -> Path:
+    """versions/<version>. Version names are plain directory names, never paths."""
+    if version in {"", ".", ".."} or "/" in version or "\\" in version:
+        raise ValueError(f"Invalid artifact version {version!r}")
+    return art_root / VERSIONS_DIR.name / version
+
+
+def current_version(art_root: Path = ART) -> str | None:
+    path = art_root / CURRENT_FILE.name
+    if not path.exists():
+        return None
+    version = path.read_text().strip()
+    return version or None
+
+
+def resolve_dir(version: str | None = None, art_root: Path = ART) -> tuple[str | None, Path]:
+    """(version, directory) for an explicit version, else CURRENT, else the flat layout."""
+    version = version or current_version(art_root)
+    if version is None:
+        return None, art_root
+    path = version_dir(version, art_root)
+    if not path.is_dir():
+        raise FileNotFoundError(f"Artifact version {version!r} not found at {path}")
+    return version, path
+
+
+def list_versions(art_root: Path = ART) -> list[str]:
+    root = art_root / VERSIONS_DIR.name
+    if not root.exists():
+        return []
+    return sorted(p.name for p in root.iterdir() if p.is_dir())
+
+
+def new_version_dir(version: str | None = None, art_root: Path = ART) -> tuple[str, Path]:
+    version = version or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    path = version_dir(version, art_root)
+    path.mkdir(parents=True, exist_ok=False)
+    return version, path
+
+
+def publish(version: str, art_root: Path = ART) -> None:
+    """Point CURRENT at version. os.replace makes the switch atomic for readers."""
+    if not version_dir(version, art_root).is_dir():
+        raise FileNotFoundError(f"Artifact version {version!r} does not exist")
+    tmp = art_root / f".{CURRENT_FILE.name}.tmp"
+    tmp.write_text(version + "\n")
+    os.replace(tmp, art_root / CURRENT_FILE.name)
@@ -0,0 +1,335 @@
+# src/recsys/cache.py
+"""
+Response caches shared by the ETL (etl_lastfm) and the serving path
+(service/lastfm_client), so both read and fill the same entries.
+
+    SqliteCache  every namespace ("lastfm", "itunes") in one SQLite file
+                 (CACHE_DB). Keys are hashed, values zlib-compressed JSON,
+                 each entry carries created_at / expires_at. The default.
+    DirCache     one JSON file per (prefix, key) under a directory — the layout
+                 data/processed/cache used before. CACHE_BACKEND=dir keeps it;
+                 `python -m src.cli.migrate_cache` imports it into CACHE_DB.
+    TTLCache     small thread-safe in-process LRU with a per-entry expiry.
+
+Both persistent caches answer get(prefix, key, max_age_s) / set(prefix, key,
+value) / get_many(prefix, keys, max_age_s); open_cache(name) picks one.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from .config import PROC
+
+log = logging.getLogger(__name__)
+
+CACHE_DIR = PROC / "cache"
+LASTFM_CACHE_DIR = CACHE_DIR / "lastfm"
+ITUNES_CACHE_DIR = CACHE_DIR / "itunes"
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite")
+CACHE_DB = Path(os.getenv("CACHE_DB", str(CACHE_DIR / "cache.sqlite")))
+
+_MISSING = object()
+_SQL_BATCH = 400  # keys per IN (...) query, well under SQLite's variable limit
+
+
+def safe_key(s: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in s.lower())[:180]
+
+
+def similar_artists_entry(artist: str, limit: int) -> tuple[str, str]:
+    """(prefix, key) of a Last.fm artist.getSimilar response in open_cache("lastfm")."""
+    return "artist_similar", f"{artist}:l{limit}"
+
+
+class DirCache:
+    """JSON files named <prefix>_<safe_key(key)>.json. Read/write errors count as misses."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+
+    def path(self, prefix: str, key: str) -> Path:
+        return self.root / f"{prefix}_{safe_key(key)}.json"
+
+    def get(self, prefix: str, key: str, max_age_s: Optional[float] = None) -> Optional[dict]:
+        path = self.path(prefix, key)
+        try:
+            if max_age_s is not None and time.time() - path.stat().st_mtime > max_age_s:
+                return None
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def set(self, prefix: str, key: str, value: dict) -> None:
+        # Write-then-rename, so concurrent ETL workers never read a partial file
+        path = self.path(prefix, key)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(json.dumps(value))
+            os.replace(tmp, path)
+        except (OSError, TypeError, ValueError):
+            tmp.unlink(missing_ok=True)
+
+    def get_many(self, prefix: str, keys: Iterable[str], max_age_s: Optional[float] = None) -> dict[str, dict]:
+        hits = {}
+        for key in keys:
+            value = self.get(prefix, key, max_age_s)
+            if value is not None:
+                hits[key] = value
+        return hits
+
+
+def _entry_hash(prefix: str, key: str) -> bytes:
+    # Case-folded like the old file names, but nothing else is collapsed or truncated
+    return hashlib.blake2b(f"{prefix}\0{key.casefold()}".encode(), digest_size=16).digest()
+
+
+def _pack(value: dict) -> bytes:
+    return zlib.compress(json.dumps(value, separators=(",", ":")).encode(), 6)
+
+
+def _unpack(blob: bytes) -> dict:
+    return json.loads(zlib.decompress(blob))
+
+
+class SqliteCache:
+    """
+    One namespace of the consolidated cache file. Thread-safe (one connection
+    behind a lock, as PromptCache does); SQLite errors count as misses.
+
+    Entries imported from a DirCache keep only their file stem, because the
+    original key was lost to safe_key(). They're stored under that stem in
+    the `legacy` column and matched on it when the exact key misses. Keys
+    that safe_key() collapsed together ("AC/DC", "AC DC") share that entry,
+    as they shared the file; the first exact set() for any of them drops it,
+    so from then on each key only sees its own value.
+    """
+
+    def __init__(self, path: Path = CACHE_DB, namespace: str = "default") -> None:
+        self.path = Path(path)
+        self.namespace = namespace
+        self._db: sqlite3.Connection | None = None
+        self._db_failed = False
+        self._has_legacy = False
+        self._lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection | None:
+        # Opened on first use so importing the ETL never touches the disk
+        if self._db is None and not self._db_failed:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("PRAGMA synchronous=NORMAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS entries ("
+                    " ns TEXT NOT NULL, k BLOB NOT NULL, legacy TEXT, value BLOB NOT NULL,"
+                    " created_at REAL NOT NULL, expires_at REAL,"
+                    " PRIMARY KEY (ns, k)) WITHOUT ROWID"
+                )
+                db.execute("CREATE INDEX IF NOT EXISTS entries_legacy ON entries (ns, legacy)")
+                self._has_legacy = db.execute(
+                    "SELECT 1 FROM entries WHERE ns = ? AND legacy IS NOT NULL LIMIT 1", (self.namespace,)
+                ).fetchone() is not None
+                self._db = db
+            except sqlite3.Error as exc:
+                log.warning("Response cache unavailable (%s): %s", self.path, exc)
+                self._db_failed = True
+        return self._db
+
+    def _select(self, db, column: str, values: list, now: float, max_age_s: Optional[float]) -> dict:
+        out = {}
+        oldest = now - max_age_s if max_age_s is not None else float("-inf")
+        for i in range(0, len(values), _SQL_BATCH):
+            chunk = values[i : i + _SQL_BATCH]
+            # Without ANALYZE stats the planner would scan the namespace by primary key
+            index = " INDEXED BY entries_legacy" if column == "legacy" else ""
+            rows = db.execute(
+                f"SELECT {column}, value FROM entries{index}"
+                f" WHERE ns = ? AND {column} IN ({','.join('?' * len(chunk))})"
+                " AND (expires_at IS NULL OR expires_at > ?) AND created_at >= ?",
+                (self.namespace, *chunk, now, oldest),
+            ).fetchall()
+            out.update(rows)
+        return out
+
+    def get_many(self, prefix: str, keys: Iterable[str], max_age_s: Optional[float] = None) -> dict[str, dict]:
+        """{key: value} for every key that's cached and fresh — one query per 400 keys."""
+        keys = list(dict.fromkeys(keys))
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            if db is None or not keys:
+                return {}
+            try:
+                by_hash = {_entry_hash(prefix, k): k for k in keys}
+                found = self._select(db, "k", list(by_hash), now, max_age_s)
+                hits = {by_hash[h]: blob for h, blob in found.items()}
+                missing = [k for k in keys if k not in hits]
+                if missing and self._has_legacy:
+                    by_stem: dict[str, list[str]] = {}
+                    for k in missing:
+                        by_stem.setdefault(f"{prefix}_{safe_key(k)}", []).append(k)
+                    found = self._select(db, "legacy", list(by_stem), now, max_age_s)
+                    hits.update({k: blob for stem, blob in found.items() for k in by_stem[stem]})
+            except sqlite3.Error as exc:
+                log.warning("Response cache read failed: %s", exc)
+                return {}
+        return {k: _unpack(blob) for k, blob in hits.items()}
+
+    def get(self, prefix: str, key: str, max_age_s: Optional[float] = None) -> Optional[dict]:
+        return self.get_many(prefix, [key], max_age_s).get(key)
+
+    def set_many(self, prefix: str, items: dict[str, dict], ttl_s: Optional[float] = None) -> None:
+        now = time.time()
+        try:
+            rows = [
+                (self.namespace, _entry_hash(prefix, k), _pack(v), now, now + ttl_s if ttl_s else None)
+                for k, v in items.items()
+            ]
+        except (TypeError, ValueError):
+            return
+        stems = list({(self.namespace, f"{prefix}_{safe_key(k)}") for k in items})
+        with self._lock:
+            db = self._conn()
+            if db is None:
+                return
+            try:
+                with db:
+                    db.execute("BEGIN")
+                    db.executemany(
+                        "INSERT OR REPLACE INTO entries (ns, k, legacy, value, created_at, expires_at)"
+                        " VALUES (?, ?, NULL, ?, ?, ?)",
+                        rows,
+                    )
+                    if self._has_legacy:
+                        # The imported entry may belong to a colliding key; see the class docstring
+                        db.executemany(
+                            "DELETE FROM entries INDEXED BY entries_legacy WHERE ns = ? AND legacy = ?",
+                            stems,
+                        )
+            except sqlite3.Error as exc:
+                log.warning("Response cache write failed: %s", exc)
+
+    def set(self, prefix: str, key: str, value: dict, ttl_s: Optional[float] = None) -> None:
+        self.set_many(prefix, {key: value}, ttl_s)
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            db = self._conn()
+            if db is None:
+                return 0
+            cur = db.execute(
+                "DELETE FROM entries WHERE ns = ? AND expires_at IS NOT NULL AND expires_at <= ?",
+                (self.namespace, time.time()),
+            )
+            return cur.rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            db = self._conn()
+            if db is None:
+                return 0
+            return db.execute("SELECT COUNT(*) FROM entries WHERE ns = ?", (self.namespace,)).fetchone()[0]
+
+    def import_dir(self, root: Path, batch: int = 2000) -> int:
+        """
+        Copy every <prefix>_<safe key>.json under `root` in, keeping the file
+        mtime as created_at. Unreadable files are skipped. Returns rows imported.
+        """
+        imported = 0
+        rows: list[tuple] = []
+
+        def flush() -> None:
+            nonlocal imported
+            with self._lock:
+                db = self._conn()
+                if db is None:
+                    raise RuntimeError(f"Cannot open {self.path}")
+                with db:
+                    db.execute("BEGIN")
+                    db.executemany(
+                        "INSERT OR IGNORE INTO entries (ns, k, legacy, value, created_at, expires_at)"
+                        " VALUES (?, ?, ?, ?, ?, NULL)",
+                        rows,
+                    )
+                self._has_legacy = True
+            imported += len(rows)
+            rows.clear()
+
+        with os.scandir(root) as it:
+            for entry in it:
+                if not entry.name.endswith(".json") or not entry.is_file():
+                    continue
+                stem = entry.name[: -len(".json")]
+                try:
+                    with open(entry.path, "rb") as f:
+                        value = json.loads(f.read())
+                    mtime = entry.stat().st_mtime
+                except (OSError, ValueError):
+                    continue
+                rows.append((self.namespace, _entry_hash("\0legacy", stem), stem, _pack(value), mtime))
+                if len(rows) >= batch:
+                    flush()
+        if rows:
+            flush()
+        return imported
+
+
+def open_cache(name: str):
+    """The persistent response cache `name` ("lastfm", "itunes") for CACHE_BACKEND."""
+    if CACHE_BACKEND == "dir":
+        return DirCache(CACHE_DIR / name)
+    if CACHE_BACKEND != "sqlite":
+        raise ValueError(f"Unknown CACHE_BACKEND: {CACHE_BACKEND!r}")
+    legacy = CACHE_DIR / name
+    if legacy.is_dir() and not CACHE_DB.exists() and next(legacy.glob("*.json"), None) is not None:
+        log.warning("%s holds unmigrated entries — run `python -m src.cli.migrate_cache`", legacy)
+    return SqliteCache(CACHE_DB, namespace=name)
+
+
+class TTLCache:
+    """LRU of at most max_size entries, each expiring ttl_s after it was set."""
+
+    def __init__(self, max_size: int, ttl_s: float) -> None:
+        self.max_size = max_size
+        self.ttl_s = ttl_s
+        self._entries: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            hit = self._entries.get(key, _MISSING)
+            if hit is _MISSING:
+                return default
+            expires_at, value = hit
+            if expires_at <= now:
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_s, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
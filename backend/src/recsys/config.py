@@ -20,3 +20,7 @@ FEATURE_COLS = [
 # Defaults (you can override via CLI flags)
 DEFAULT_MARKET = os.getenv("SPOTIFY_MARKET", "US")
 DEFAULT_LIMIT_PER_QUERY = int(os.getenv("LIMIT_PER_QUERY", "150"))
+
+# Serving: memory-map feature matrices so multiple workers share one copy
+# of the pages through the OS page cache instead of each holding its own.
+MMAP_ARTIFACTS = os.getenv("MMAP_ARTIFACTS", "1") == "1"
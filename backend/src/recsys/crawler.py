@@ -0,0 +1,192 @@
+# src/recsys/crawler.py
+"""
+HTTP plumbing for the ETL crawlers (etl_lastfm): a worker pool with a
+per-host request budget instead of a fixed sleep after every call.
+
+    RateLimitedHTTP   requests.get() drop-in. Each host draws from its own
+                      TokenBucket (HOST_RATES, requests per second); 429 and
+                      5xx responses and connection errors are retried with
+                      exponential backoff, honouring Retry-After.
+    SingleFlight      concurrent callers asking for the same key share one
+                      call, so workers don't fetch the same cache entry twice.
+    map_concurrent    order-preserving ThreadPoolExecutor.map.
+
+The ETL stays synchronous; ETL_CONCURRENCY threads keep enough requests in
+flight to use every host's budget.
+"""
+from __future__ import annotations
+
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, Optional, TypeVar
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+ETL_CONCURRENCY = int(os.getenv("ETL_CONCURRENCY", "8"))
+ETL_RETRIES = int(os.getenv("ETL_RETRIES", "4"))
+ETL_BACKOFF_S = float(os.getenv("ETL_BACKOFF_S", "1.0"))
+ETL_MAX_BACKOFF_S = float(os.getenv("ETL_MAX_BACKOFF_S", "60"))
+# Requests per second per host; hosts not listed are not throttled.
+# iTunes Search allows roughly 20 calls a minute.
+HOST_RATES = {
+    "ws.audioscrobbler.com": float(os.getenv("LASTFM_RATE", "5")),
+    "itunes.apple.com": float(os.getenv("ITUNES_RATE", "0.33")),
+    "api.deezer.com": float(os.getenv("DEEZER_RATE", "8")),
+}
+RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, at most `burst` banked."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller back for `seconds` (the host asked us to slow down)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+
+def _retry_after(resp: requests.Response) -> Optional[float]:
+    try:
+        return max(0.0, float(resp.headers.get("Retry-After", "")))
+    except ValueError:
+        return None
+
+
+class RateLimitedHTTP:
+    def __init__(
+        self,
+        rates: Optional[dict[str, float]] = None,
+        retries: int = ETL_RETRIES,
+        backoff_s: float = ETL_BACKOFF_S,
+        max_backoff_s: float = ETL_MAX_BACKOFF_S,
+        pool_size: int = ETL_CONCURRENCY,
+    ) -> None:
+        self.buckets = {host: TokenBucket(rate) for host, rate in (rates or HOST_RATES).items() if rate > 0}
+        self.retries = retries
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.pool_size = pool_size
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats: dict[str, dict[str, int]] = {}
+
+    def _session(self) -> requests.Session:
+        # One pooled session per worker thread; Session isn't thread-safe
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._local.session = session
+        return session
+
+    def _count(self, host: str, what: str) -> None:
+        with self._stats_lock:
+            counts = self._stats.setdefault(host, {"requests": 0, "retries": 0, "throttled": 0})
+            counts[what] += 1
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        with self._stats_lock:
+            return {host: dict(counts) for host, counts in self._stats.items()}
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.max_backoff_s, self.backoff_s * 2**attempt)
+        return delay * (0.5 + random.random() / 2)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """
+        requests.get() under the host's rate limit, retried on 429/5xx and
+        connection errors. Once retries run out the last response is returned
+        (or the last exception raised), so callers keep their own status checks.
+        """
+        host = urlsplit(url).hostname or ""
+        bucket = self.buckets.get(host)
+        for attempt in range(self.retries + 1):
+            if bucket is not None:
+                bucket.acquire()
+            self._count(host, "requests")
+            try:
+                resp = self._session().get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    raise
+                self._count(host, "retries")
+                time.sleep(self._backoff(attempt))
+                continue
+            if resp.status_code not in RETRY_STATUS or attempt == self.retries:
+                return resp
+
+            self._count(host, "retries")
+            delay = _retry_after(resp)
+            delay = self._backoff(attempt) if delay is None else min(delay, self.max_backoff_s)
+            if resp.status_code == 429:
+                self._count(host, "throttled")
+                if bucket is not None:
+                    bucket.pause(delay)
+            time.sleep(delay)
+        raise AssertionError("unreachable")
+
+
+class SingleFlight:
+    """Run fn once per key at a time; concurrent callers for that key get its result."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[object, Future] = {}
+
+    def do(self, key, fn: Callable[[], R]) -> R:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+        if not leader:
+            return call.result()
+        try:
+            call.set_result(fn())
+        except BaseException as exc:
+            call.set_exception(exc)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return call.result()
+
+
+def map_concurrent(fn: Callable[[T], R], items: Iterable[T], concurrency: int = ETL_CONCURRENCY) -> list[R]:
+    """[fn(x) for x in items] on `concurrency` threads, results in input order."""
+    items = list(items)
+    if concurrency <= 1 or len(items) <= 1:
+        return [fn(x) for x in items]
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="etl") as pool:
+        return list(pool.map(fn, items))
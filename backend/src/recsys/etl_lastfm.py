@@ -1,20 +1,26 @@
 from __future__ import annotations
 
+import itertools
 import json
 import os
 import re
+import shutil
 import time
 import unicodedata
 from dataclasses import dataclass
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional
 
+import numpy as np
 import pandas as pd
 import requests
 from dotenv import load_dotenv
 from rapidfuzz import fuzz
 
+from src.recsys.cache import CACHE_DIR, open_cache, similar_artists_entry
 from src.recsys.config import PROC, SEEDS
+from src.recsys.crawler import ETL_CONCURRENCY, RateLimitedHTTP, SingleFlight, map_concurrent
 
 LASTFM = "https://ws.audioscrobbler.com/2.0/"
 ITUNES = "https://itunes.apple.com/search"
@@ -37,38 +43,22 @@ class TrackRow:
     seed_group: Optional[str] = None
     primary_genre: Optional[str] = None
     genre_confidence: Optional[float] = None
+    enriched_at: Optional[float] = None  # unix time tags/preview were fetched
 
 
 # -----------------------------
 # Cache helpers
 # -----------------------------
-CACHE_DIR = PROC / "cache"
 CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
-LASTFM_CACHE = CACHE_DIR / "lastfm"
-ITUNES_CACHE = CACHE_DIR / "itunes"
-LASTFM_CACHE.mkdir(parents=True, exist_ok=True)
-ITUNES_CACHE.mkdir(parents=True, exist_ok=True)
+# Consolidated SQLite file by default (see recsys/cache.py)
+_lastfm_cache = open_cache("lastfm")
+_itunes_cache = open_cache("itunes")
 
-
-def _safe_key(s: str) -> str:
-    return "".join(c if c.isalnum() else "_" for c in s.lower())[:180]
-
-
-def _read_json(path: Path) -> Optional[dict]:
-    if not path.exists():
-        return None
-    try:
-        return json.loads(path.read_text())
-    except Exception:
-        return None
-
-
-def _write_json(path: Path, data: dict) -> None:
-    try:
-        path.write_text(json.dumps(data))
-    except Exception:
-        pass
+# Shared by every ETL worker thread: per-host rate limits + retries, and one
+# in-flight request per cache entry
+_http = RateLimitedHTTP()
+_inflight = SingleFlight()
 
 
 def _ascii_clean(text: str) -> str:
@@ -129,7 +119,7 @@ def _lastfm(params: dict) -> dict:
     q = {"api_key": k, "format": "json", **params}
     headers = {"User-Agent": "dscvr/0.2 (contact: pynej001@umn.edu)"}
 
-    r = requests.get(LASTFM, params=q, headers=headers, timeout=20)
+    r = _http.get(LASTFM, params=q, headers=headers, timeout=20)
     try:
         r.raise_for_status()
     except requests.HTTPError as e:
@@ -153,14 +143,21 @@ def _lastfm(params: dict) -> dict:
     return data
 
 
-def _cached_lastfm(prefix: str, key: str, params: dict) -> dict:
-    path = LASTFM_CACHE / f"{prefix}_{_safe_key(key)}.json"
-    hit = _read_json(path)
+def _cached_lastfm(prefix: str, key: str, params: dict, max_age_s: Optional[float] = None) -> dict:
+    hit = _lastfm_cache.get(prefix, key, max_age_s)
     if hit is not None:
         return hit
-    data = _lastfm(params)
-    _write_json(path, data)
-    return data
+
+    def fetch() -> dict:
+        # Re-check: another worker may have filled it while we waited
+        hit = _lastfm_cache.get(prefix, key, max_age_s)
+        if hit is not None:
+            return hit
+        data = _lastfm(params)
+        _lastfm_cache.set(prefix, key, data)
+        return data
+
+    return _inflight.do(("lastfm", prefix, key), fetch)
 
 
 # -----------------------------
@@ -185,7 +182,7 @@ def _deezer_artwork(
     seen_ids: set = set()
 
     def _search(term: str, limit: int) -> list[dict]:
-        r = requests.get(
+        r = _http.get(
             DEEZER,
             params={"q": term, "limit": limit},
             timeout=15,
@@ -254,7 +251,7 @@ def _itunes_preview(title: str, artist: str) -> tuple[Optional[str], Optional[st
     seen_ids: set = set()
 
     def _search(term: str, limit: int) -> list[dict]:
-        r = requests.get(
+        r = _http.get(
             ITUNES,
             params={
                 "term": term,
@@ -327,19 +324,32 @@ def _cached_itunes_preview(
     title: str,
     artist: str,
     refresh_if_empty: bool = False,
+    max_age_s: Optional[float] = None,
 ) -> tuple[Optional[str], Optional[str]]:
     key = f"{artist}:{title}"
-    path = ITUNES_CACHE / f"itunes_{_safe_key(key)}.json"
-    hit = _read_json(path)
-    if hit is not None:
-        prev = hit.get("preview_url")
-        art = hit.get("artwork_url")
-        if not refresh_if_empty or (prev or art):
-            return prev, art
 
-    prev, art = _itunes_preview(title, artist)
-    _write_json(path, {"preview_url": prev, "artwork_url": art})
-    return prev, art
+    def cached() -> Optional[tuple[Optional[str], Optional[str]]]:
+        hit = _itunes_cache.get("itunes", key, max_age_s)
+        if hit is not None:
+            prev = hit.get("preview_url")
+            art = hit.get("artwork_url")
+            if not refresh_if_empty or (prev or art):
+                return prev, art
+        return None
+
+    def fetch() -> tuple[Optional[str], Optional[str]]:
+        hit = cached()
+        if hit is not None:
+            return hit
+        prev, art = _itunes_preview(title, artist)
+        _itunes_cache.set("itunes", key, {"preview_url": prev, "artwork_url": art})
+        return prev, art
+
+    hit = cached()
+    if hit is not None:
+        return hit
+    # Callers with a different freshness bound must not share a stale result
+    return _inflight.do(("itunes", key, refresh_if_empty, max_age_s), fetch)
 
 
 # -----------------------------
@@ -469,8 +479,31 @@ def track_get_similar(title: str, artist: str, limit: int = 20) -> list[dict]:
     return out
 
 
+def artist_get_similar(artist: str, limit: int = 30) -> list[str]:
+    """Names of Last.fm's similar artists, best first. [] if Last.fm can't resolve the artist."""
+    prefix, key = similar_artists_entry(artist, limit)
+    try:
+        res = _cached_lastfm(
+            prefix,
+            key,
+            {"method": "artist.getSimilar", "artist": artist, "limit": limit, "autocorrect": 1},
+        )
+    except Exception as e:
+        print(f"[artist_get_similar] WARNING: {artist}: {e}")
+        return []
+
+    artists = (res.get("similarartists") or {}).get("artist", [])
+    if isinstance(artists, dict):
+        artists = [artists]
+    return [a["name"] for a in artists if isinstance(a, dict) and a.get("name")]
+
+
 def track_get_tags_cached(
-    title: str, artist: str, kind: str = "track", limit: int = 30
+    title: str,
+    artist: str,
+    kind: str = "track",
+    limit: int = 30,
+    max_age_s: Optional[float] = None,
 ) -> list[str]:
     if kind == "track":
         method = "track.getTopTags"
@@ -482,7 +515,7 @@ def track_get_tags_cached(
         key = f"artist:{artist}"
 
     try:
-        res = _cached_lastfm(f"{kind}_tags", key, {"method": method, **params})
+        res = _cached_lastfm(f"{kind}_tags", key, {"method": method, **params}, max_age_s)
         taglist = (res.get("toptags") or {}).get("tag", [])
         if isinstance(taglist, dict):
             taglist = [taglist]
@@ -544,21 +577,23 @@ def collect_candidates(
     countries: list[str] | None = None,
     geo_pages: int = 5,
     seed_dir: Path | None = None,
-    sleep_s: float = 0.05,
+    concurrency: int = ETL_CONCURRENCY,
 ) -> pd.DataFrame:
     rows: list[dict] = []
 
-    # charts
-    for p in range(1, chart_pages + 1):
-        rows.extend(chart_get_top_tracks(page=p, limit=chart_limit))
-        time.sleep(sleep_s)
-
-    # geo
+    # charts + geo, fetched concurrently and concatenated in page order
     countries = countries or ["United States", "United Kingdom", "Canada", "Australia"]
-    for c in countries:
-        for p in range(1, geo_pages + 1):
-            rows.extend(geo_get_top_tracks(country=c, page=p, limit=chart_limit))
-            time.sleep(sleep_s)
+    pages = [(None, p) for p in range(1, chart_pages + 1)]
+    pages += [(c, p) for c in countries for p in range(1, geo_pages + 1)]
+
+    def fetch_page(page: tuple[Optional[str], int]) -> list[dict]:
+        country, p = page
+        if country is None:
+            return chart_get_top_tracks(page=p, limit=chart_limit)
+        return geo_get_top_tracks(country=country, page=p, limit=chart_limit)
+
+    for page_rows in map_concurrent(fetch_page, pages, concurrency):
+        rows.extend(page_rows)
 
     # seeds (optional)
     if seed_dir is not None:
@@ -590,37 +625,48 @@ def expand_via_similar(
     df: pd.DataFrame,
     per_track: int = 5,
     max_new: int = 5000,
-    sleep_s: float = 0.05,
+    concurrency: int = ETL_CONCURRENCY,
 ) -> pd.DataFrame:
     """
     Optional expansion: add similar tracks for breadth.
     Uses caching, so reruns are cheap.
+
+    Lookups run `concurrency` at a time in chunks; results are merged in
+    row order, so the output matches a one-by-one crawl.
     """
-    seen = {(r["title"], r["artist"]) for _, r in df.iterrows()}
+    seen = set(zip(df["title"], df["artist"]))
     new_rows: list[dict] = []
+    sources = df["source"] if "source" in df.columns else pd.Series("unknown", index=df.index)
+    records = list(zip(df["title"], df["artist"], sources))
+    chunk = max(1, concurrency * 4)
 
-    for _, r in df.iterrows():
+    for start in range(0, len(records), chunk):
         if len(new_rows) >= max_new:
             break
-        title, artist = r["title"], r["artist"]
-        source = r.get("source", "unknown")
-        sims = track_get_similar(title, artist, limit=per_track)
-        for s in sims:
-            key = (s["title"], s["artist"])
-            if key in seen:
-                continue
-            seen.add(key)
-            new_rows.append(
-                {
-                    "title": s["title"],
-                    "artist": s["artist"],
-                    "source": f"similar:{source}",
-                    "seed_group": None,
-                }
-            )
+        batch = records[start : start + chunk]
+        results = map_concurrent(
+            lambda r: track_get_similar(r[0], r[1], limit=per_track),
+            batch,
+            concurrency,
+        )
+        for (_, _, source), sims in zip(batch, results):
             if len(new_rows) >= max_new:
                 break
-        time.sleep(sleep_s)
+            for s in sims:
+                key = (s["title"], s["artist"])
+                if key in seen:
+                    continue
+                seen.add(key)
+                new_rows.append(
+                    {
+                        "title": s["title"],
+                        "artist": s["artist"],
+                        "source": f"similar:{source}",
+                        "seed_group": None,
+                    }
+                )
+                if len(new_rows) >= max_new:
+                    break
 
     if not new_rows:
         return df
@@ -631,53 +677,179 @@ def expand_via_similar(
     return df2
 
 
+def _enrich_one(r: dict, itunes: bool, max_age_s: Optional[float] = None) -> TrackRow:
+    title = str(r["title"])
+    artist = str(r["artist"])
+    source = str(r.get("source", "unknown"))
+    seed_group = r.get("seed_group")
+    if pd.isna(seed_group):
+        seed_group = None
+
+    tags = list(
+        dict.fromkeys(
+            track_get_tags_cached(title, artist, "track", max_age_s=max_age_s)
+            + track_get_tags_cached(title, artist, "artist", max_age_s=max_age_s)
+        )
+    )
+
+    prev, art = (None, None)
+    if itunes:
+        prev, art = _cached_itunes_preview(title, artist, max_age_s=max_age_s)
+
+    genre, conf = label_primary_genre(tags)
+
+    return TrackRow(
+        title=title,
+        artist=artist,
+        mbid=None,
+        match_score=None,
+        tags=tags,
+        preview_url=prev,
+        artwork_url=art,
+        source=source,
+        seed_group=seed_group,
+        primary_genre=genre,
+        genre_confidence=conf,
+        enriched_at=time.time(),
+    )
+
+
 def enrich_candidates(
     df: pd.DataFrame,
-    sleep_s: float = 0.05,
     itunes: bool = True,
+    concurrency: int = ETL_CONCURRENCY,
+    max_age_s: Optional[float] = None,
 ) -> pd.DataFrame:
-    rows: list[TrackRow] = []
-    for _, r in df.iterrows():
-        title = str(r["title"])
-        artist = str(r["artist"])
-        source = str(r.get("source", "unknown"))
-        seed_group = r.get("seed_group")
-        if pd.isna(seed_group):
-            seed_group = None
-
-        tags = list(
-            dict.fromkeys(
-                track_get_tags_cached(title, artist, "track")
-                + track_get_tags_cached(title, artist, "artist")
-            )
-        )
+    """
+    Tags, preview and genre for every candidate. max_age_s ignores cached
+    responses older than that, so refreshed rows really hit the APIs again.
+    Duplicate (title, artist) rows are dropped before any lookup.
+    """
+    df = df.drop_duplicates(subset=["title", "artist"])
+    rows = map_concurrent(
+        lambda r: _enrich_one(r, itunes, max_age_s), df.to_dict("records"), concurrency
+    )
+    return pd.DataFrame([x.__dict__ for x in rows], columns=list(TrackRow.__dataclass_fields__))
 
-        prev, art = (None, None)
-        if itunes:
-            prev, art = _cached_itunes_preview(title, artist)
-
-        genre, conf = label_primary_genre(tags)
-
-        rows.append(
-            TrackRow(
-                title=title,
-                artist=artist,
-                mbid=None,
-                match_score=None,
-                tags=tags,
-                preview_url=prev,
-                artwork_url=art,
-                source=source,
-                seed_group=seed_group,
-                primary_genre=genre,
-                genre_confidence=conf,
-            )
-        )
-        time.sleep(sleep_s)
 
-    out = pd.DataFrame([x.__dict__ for x in rows])
-    out = out.drop_duplicates(subset=["title", "artist"]).reset_index(drop=True)
-    return out
+# -----------------------------
+# Incremental builds
+# -----------------------------
+def _norm_col(col: pd.Series) -> pd.Series:
+    return col.fillna("").astype(str).str.casefold().str.split().str.join(" ")
+
+
+def track_keys(df: pd.DataFrame) -> pd.Series:
+    """Stable per-track key: case- and whitespace-insensitive artist + title."""
+    return _norm_col(df["artist"]) + "\x1f" + _norm_col(df["title"])
+
+
+def changelog_path(out_path: Path) -> Path:
+    return out_path.with_name(out_path.stem + ".changelog.jsonl")
+
+
+def snapshot_path(out_path: Path, version: str) -> Path:
+    """Immutable copy of one build: <stem>.<version>.parquet next to out_path."""
+    return out_path.with_name(f"{out_path.stem}.{version}.parquet")
+
+
+def _claim_snapshot(out_path: Path, stamp: str) -> tuple[str, Path]:
+    """
+    Reserve a fresh snapshot file for this build. Two builds in the same
+    second get stamp, stamp-1, ... — an existing snapshot is never overwritten.
+    """
+    for n in itertools.count():
+        version = stamp if n == 0 else f"{stamp}-{n}"
+        path = snapshot_path(out_path, version)
+        try:
+            path.open("x").close()
+        except FileExistsError:
+            continue
+        return version, path
+
+
+def _last_entry(out_path: Path) -> dict:
+    try:
+        lines = changelog_path(out_path).read_text().splitlines()
+    except OSError:
+        return {}
+    return json.loads(lines[-1]) if lines else {}
+
+
+def incremental_update(
+    existing: pd.DataFrame,
+    candidates: pd.DataFrame,
+    itunes: bool = True,
+    concurrency: int = ETL_CONCURRENCY,
+    refresh_ttl_s: Optional[float] = None,
+    base_time: Optional[float] = None,
+) -> tuple[pd.DataFrame, dict]:
+    """
+    Bring an already-enriched dataset in line with a new candidate set.
+
+    Rows whose track key is no longer a candidate are dropped, rows enriched
+    more than refresh_ttl_s ago are re-enriched in place, and only candidates
+    not in `existing` are enriched and appended. Kept rows take source and
+    seed_group from their candidate, since those describe this crawl rather
+    than the track. Kept rows stay in their original order, so old row i
+    moves to i - (removed rows before i).
+
+    Returns the new frame and {"added", "removed", "refreshed", "relabelled"}:
+    new-frame indices for added/refreshed/relabelled, `existing` indices for
+    removed.
+    """
+    old_keys = track_keys(existing)
+    new_keys = track_keys(candidates)
+    candidates = candidates[~new_keys.duplicated()]
+    new_keys = new_keys[candidates.index]
+
+    keep = (old_keys.isin(new_keys) & ~old_keys.duplicated()).to_numpy()
+    kept = existing[keep].reset_index(drop=True)
+
+    by_key = candidates.set_index(new_keys.to_numpy())
+    kept_keys = track_keys(kept)
+    relabelled = np.zeros(len(kept), dtype=bool)
+    for col in ("source", "seed_group"):
+        if col not in by_key.columns:
+            continue
+        fresh = kept_keys.map(by_key[col])
+        if col in kept.columns:
+            old = kept[col]
+            relabelled |= (~((old == fresh) | (old.isna() & fresh.isna()))).to_numpy()
+        kept[col] = fresh
+
+    enriched_at = kept["enriched_at"] if "enriched_at" in kept.columns else pd.Series(np.nan, index=kept.index)
+    # Rows from before enriched_at existed count as fetched when `existing` was written
+    enriched_at = enriched_at.astype(float).fillna(base_time if base_time is not None else time.time())
+    if refresh_ttl_s is not None:
+        stale = (enriched_at < time.time() - refresh_ttl_s).to_numpy()
+    else:
+        stale = np.zeros(len(kept), dtype=bool)
+    kept["enriched_at"] = enriched_at
+
+    if stale.any():
+        refreshed = enrich_candidates(
+            kept[stale], itunes=itunes, concurrency=concurrency, max_age_s=refresh_ttl_s
+        )
+        refreshed.index = np.flatnonzero(stale)
+        kept = pd.concat([kept[~stale], refreshed]).sort_index()
+
+    added = candidates[~new_keys.isin(old_keys).to_numpy()]
+    new_rows = enrich_candidates(added, itunes=itunes, concurrency=concurrency) if len(added) else None
+    out = pd.concat([kept, new_rows], ignore_index=True) if new_rows is not None else kept.reset_index(drop=True)
+
+    changes = {
+        "added": list(range(len(kept), len(out))),
+        "removed": np.flatnonzero(~keep).tolist(),
+        "refreshed": np.flatnonzero(stale).tolist(),
+        "relabelled": np.flatnonzero(relabelled & ~stale).tolist(),
+    }
+    print(
+        f"[incremental] kept {len(kept)} (refreshed {len(changes['refreshed'])}, "
+        f"relabelled {len(changes['relabelled'])}), "
+        f"added {len(changes['added'])}, removed {len(changes['removed'])}"
+    )
+    return out, changes
 
 
 def build_lastfm_dataset(
@@ -689,8 +861,10 @@ def build_lastfm_dataset(
     expand_similar: bool = True,
     similar_per_track: int = 3,
     similar_max_new: int = 3000,
-    sleep_s: float = 0.05,
     itunes: bool = True,
+    concurrency: int = ETL_CONCURRENCY,
+    incremental: bool = False,
+    refresh_ttl_s: float | None = None,
 ) -> str:
     """
     Scalable catalog builder:
@@ -698,14 +872,25 @@ def build_lastfm_dataset(
       2) Optional: expand via track.getSimilar
       3) Enrich with cached tags + cached iTunes preview/artwork
       4) Label primary_genre via tags
-      5) Write parquet
+      5) Write parquet, and append what changed to <out>.changelog.jsonl
+
+    Each build is written to its own <stem>.<version>.parquet (see
+    snapshot_path) and copied to out_path. With incremental=True and an
+    existing parquet at out_path, step 3 only runs for new candidates and
+    rows older than refresh_ttl_s (see incremental_update). The changelog
+    entry names this build's snapshot ("path") and the one it was diffed
+    against ("base_path"), so downstream artifact builders can resolve the
+    removed indices against the old rows and the rest against the new ones.
+
+    Every phase fans requests out over `concurrency` threads; the per-host
+    rate limits in crawler.HOST_RATES replace the old fixed sleep per call.
     """
     candidates = collect_candidates(
         chart_pages=chart_pages,
         geo_pages=geo_pages,
         countries=countries,
         seed_dir=seed_dir,
-        sleep_s=sleep_s,
+        concurrency=concurrency,
     )
     if candidates.empty:
         raise RuntimeError("No candidates collected. Check API key or endpoints.")
@@ -715,17 +900,57 @@ def build_lastfm_dataset(
             candidates,
             per_track=similar_per_track,
             max_new=similar_max_new,
-            sleep_s=sleep_s,
+            concurrency=concurrency,
         )
 
-    df = enrich_candidates(candidates, sleep_s=sleep_s, itunes=itunes)
-
     out_path = Path(out_path)
+    existing = pd.read_parquet(out_path) if out_path.exists() else None
+    if incremental and existing is not None:
+        df, changes = incremental_update(
+            existing,
+            candidates,
+            itunes=itunes,
+            concurrency=concurrency,
+            refresh_ttl_s=refresh_ttl_s,
+            base_time=out_path.stat().st_mtime,
+        )
+    else:
+        df = enrich_candidates(candidates, itunes=itunes, concurrency=concurrency)
+        changes = {
+            "added": list(range(len(df))),
+            "removed": list(range(len(existing))) if existing is not None else [],
+            "refreshed": [],
+            "relabelled": [],
+        }
+
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_parquet(out_path, index=False)
+    version, snapshot = _claim_snapshot(
+        out_path, datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    )
+    tmp = out_path.with_suffix(".parquet.tmp")
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, snapshot)
+    shutil.copyfile(snapshot, tmp)
+    os.replace(tmp, out_path)
+
+    base = _last_entry(out_path) if existing is not None else {}
+    entry = {
+        "version": version,
+        # File names, relative to the changelog's directory
+        "path": snapshot.name,
+        "base_version": base.get("version"),
+        "base_path": base.get("path"),
+        "incremental": bool(incremental and existing is not None),
+        "base_rows": len(existing) if existing is not None else 0,
+        "rows": len(df),
+        **changes,
+    }
+    with changelog_path(out_path).open("a") as f:
+        f.write(json.dumps(entry) + "\n")
 
     print(f"✅ Wrote {len(df)} rows → {out_path}")
     print(
         "[genre breakdown]\n" + df["primary_genre"].value_counts().head(12).to_string()
     )
+    print(f"[http] {_http.stats()}")
     return str(out_path)
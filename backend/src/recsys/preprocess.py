@@ -10,6 +10,9 @@ from sklearn.decomposition import TruncatedSVD
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
 
+from . import artifacts
+from .recommenders.cosine import write_text_projector, write_unit_features
+
 # Paths
 ROOT = Path(__file__).resolve().parents[2]
 DATA = ROOT / "data"
@@ -38,8 +41,16 @@ def _join_tags(tags):
 
 
 def build_text_features(
-    parquet_path: str | Path = PROC / "tracks_lastfm2.parquet", n_components: int = 200
+    parquet_path: str | Path = PROC / "tracks_lastfm2.parquet",
+    n_components: int = 200,
+    version: str | None = None,
+    publish: bool = True,
 ):
+    """
+    Fit TF-IDF+SVD over tags/title/artist and write a new versioned artifact
+    bundle (see artifacts.py). With publish=True the bundle becomes CURRENT,
+    which a running service picks up via /admin/reload or its file watcher.
+    """
     df = pd.read_parquet(parquet_path).copy()
     if df.empty:
         raise RuntimeError("No rows in dataset. Build your Last.fm dataset first.")
@@ -69,17 +80,25 @@ def build_text_features(
     X = pipe.fit_transform(df["text"])
     X = np.asarray(X)  # ensure dense ndarray after SVD (+ StandardScaler)
 
-    # Persist artifacts
-    joblib.dump(pipe, ART / "text_svd.pkl")
-    np.save(ART / "features.npy", X)
+    # Persist artifacts into a fresh version directory
+    version, out_dir = artifacts.new_version_dir(version, art_root=ART)
+    joblib.dump(pipe, out_dir / "text_svd.pkl")
+    write_text_projector(out_dir, pipe)
+    np.save(out_dir / "features.npy", X)
+    write_unit_features(out_dir)
 
     id_map = df[["title", "artist", "preview_url", "artwork_url"]].to_dict(
         orient="records"
     )
-    with open(ART / "id_map.json", "w") as f:
+    with open(out_dir / "id_map.json", "w") as f:
         json.dump(id_map, f)
-
-    print(
-        f"✅ Saved: {ART / 'text_svd.pkl'}, {ART / 'features.npy'}, {ART / 'id_map.json'}"
+    df.drop(columns=["text"]).reset_index(drop=True).to_parquet(
+        out_dir / artifacts.BUNDLE_PARQUET, index=False
     )
+
+    if publish:
+        artifacts.publish(version, art_root=ART)
+
+    print(f"✅ Saved bundle {version} → {out_dir}" + (" (published)" if publish else ""))
     print("   features shape:", X.shape)
+    return version
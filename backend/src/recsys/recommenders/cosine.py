@@ -3,48 +3,244 @@ from __future__ import annotations
 from typing import List, Dict, Optional
 import json
 import logging
+import os
+import threading
 from pathlib import Path
 
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 
-from ..config import ART, PROC        # uses data/artifacts from your existing config
+from ..cache import TTLCache
+from ..config import ART, PROC, MMAP_ARTIFACTS  # uses data/artifacts from your existing config
 from .base import Recommender
 
 log = logging.getLogger(__name__)
 
+UNIT_FEATURES = "features_unit.npy"
+TEXT_PIPELINE = "text_svd.pkl"
+# Light form of the text pipeline (see TextProjector.save): no unpickling,
+# and the arrays can be mmapped and shared across workers like the features
+TEXT_VECTORIZER = "text_vectorizer.json"
+TEXT_VOCAB = "text_vocab.npy"
+TEXT_IDF = "text_idf.npy"
+TEXT_PROJECTION = "text_projection.npy"
+# Projected query vectors kept per recommender, keyed by normalised text
+TEXT_VECTOR_CACHE_MAX = int(os.getenv("TEXT_VECTOR_CACHE_MAX", "1024"))
+
+
+def _unit_rows(X: np.ndarray) -> np.ndarray:
+    """L2-normalise rows as float32; all-zero rows stay zero."""
+    X = np.asarray(X, dtype=np.float32)
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(X / norms)
+
+
+def write_unit_features(art_dir: Path = ART) -> Path:
+    """
+    Precompute the row-normalised matrix next to features.npy.
+    Loaded with mmap_mode='r' at serving time, so every worker process
+    shares the same physical pages.
+    """
+    X = np.load(art_dir / "features.npy", mmap_mode="r")
+    out = art_dir / UNIT_FEATURES
+    np.save(out, _unit_rows(X))
+    return out
+
+
+class TextProjector:
+    """
+    Fast path for the fitted tfidf → svd → scale pipeline.
+
+    SVD and the (mean-free) scaler are both linear, so they fold into one
+    (vocab, dims) matrix. A query only touches the rows of its non-zero
+    TF-IDF terms — usually a few dozen — instead of a dense product over
+    the whole vocabulary inside Pipeline.transform.
+    """
+
+    def __init__(self, vectorizer, projection: np.ndarray) -> None:
+        self.vectorizer = vectorizer
+        self.projection = projection
+
+    @classmethod
+    def from_pipeline(cls, pipe) -> Optional["TextProjector"]:
+        """None unless pipe is the tfidf/svd[/scale] pipeline train_text builds."""
+        steps = dict(getattr(pipe, "steps", ()))
+        tfidf, svd, scale = steps.get("tfidf"), steps.get("svd"), steps.get("scale")
+        if tfidf is None or not hasattr(svd, "components_") or len(steps) != 2 + (scale is not None):
+            return None
+        components = np.asarray(svd.components_, dtype=np.float64)
+        if scale is not None:
+            if getattr(scale, "with_mean", True) or scale.scale_ is None:
+                return None
+            components = components / scale.scale_[:, None]
+        return cls(tfidf, np.ascontiguousarray(components.T, dtype=np.float32))
+
+    @staticmethod
+    def exists(art_dir: Path) -> bool:
+        return all((art_dir / f).exists() for f in (TEXT_VECTORIZER, TEXT_VOCAB, TEXT_IDF, TEXT_PROJECTION))
+
+    def save(self, art_dir: Path) -> None:
+        """
+        Write the vectorizer settings as JSON and vocabulary/IDF/projection as
+        plain .npy arrays. Raises ValueError for vectorizers with callables
+        (custom tokenizer etc.), which only a pickle can carry.
+        """
+        params = {}
+        for name, value in self.vectorizer.get_params().items():
+            if name in ("vocabulary", "dtype") or value is None:
+                continue
+            if callable(value):
+                raise ValueError(f"vectorizer parameter {name!r} is not serialisable")
+            if isinstance(value, (tuple, frozenset, set)):
+                value = list(value)
+            params[name] = value
+        terms = sorted(self.vectorizer.vocabulary_, key=self.vectorizer.vocabulary_.get)
+
+        np.save(art_dir / TEXT_VOCAB, np.array(terms, dtype=str))
+        np.save(art_dir / TEXT_IDF, np.asarray(self.vectorizer.idf_, dtype=np.float64))
+        np.save(art_dir / TEXT_PROJECTION, np.ascontiguousarray(self.projection, dtype=np.float32))
+        # Written last: load() only trusts a bundle once this file exists
+        (art_dir / TEXT_VECTORIZER).write_text(json.dumps({"params": params}))
+
+    @classmethod
+    def load(cls, art_dir: Path, mmap: bool = MMAP_ARTIFACTS) -> "TextProjector":
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        params = json.loads((art_dir / TEXT_VECTORIZER).read_text())["params"]
+        if "ngram_range" in params:
+            params["ngram_range"] = tuple(params["ngram_range"])
+        terms = np.load(art_dir / TEXT_VOCAB)
+        vectorizer = TfidfVectorizer(**params, vocabulary={t: i for i, t in enumerate(terms.tolist())})
+        vectorizer.idf_ = np.load(art_dir / TEXT_IDF)
+        projection = np.load(art_dir / TEXT_PROJECTION, mmap_mode="r" if mmap else None)
+        if projection.shape[0] != len(terms):
+            raise RuntimeError(f"{TEXT_PROJECTION} has {projection.shape[0]} rows for {len(terms)} terms")
+        return cls(vectorizer, projection)
+
+    @property
+    def dim(self) -> int:
+        return self.projection.shape[1]
+
+    def transform(self, texts: list[str]) -> np.ndarray:
+        tf = self.vectorizer.transform(texts).tocsr()
+        out = np.zeros((tf.shape[0], self.dim), dtype=np.float32)
+        for i in range(tf.shape[0]):
+            lo, hi = tf.indptr[i], tf.indptr[i + 1]
+            if hi > lo:
+                out[i] = tf.data[lo:hi].astype(np.float32) @ self.projection[tf.indices[lo:hi]]
+        return out
+
+
+def write_text_projector(art_dir: Path = ART, pipe=None) -> Optional[Path]:
+    """
+    Save the light form of the bundle's text pipeline next to text_svd.pkl.
+    Returns None if the pipeline can't be expressed that way.
+    """
+    if pipe is None:
+        import joblib
+
+        pipe = joblib.load(art_dir / TEXT_PIPELINE)
+    projector = TextProjector.from_pipeline(pipe)
+    if projector is None:
+        return None
+    try:
+        projector.save(art_dir)
+    except ValueError as exc:
+        log.warning("Keeping %s only: %s", TEXT_PIPELINE, exc)
+        return None
+    return art_dir / TEXT_VECTORIZER
+
 
 class CosineRecommender(Recommender):
     """Cosine similarity over the text-based feature matrix."""
 
-    def __init__(self) -> None:
-        features_path = ART / "features.npy"
-        id_map_path = ART / "id_map.json"
-        parquet_path = PROC / "tracks_lastfm.parquet"
+    def __init__(
+        self,
+        X: np.ndarray,
+        id_map: list[dict],
+        meta_df=None,
+        X_unit: Optional[np.ndarray] = None,
+        pipeline=None,
+        art_dir: Path = ART,
+    ) -> None:
+        self.X = X
+        # Row-normalised copy used for every similarity query. Prefer the
+        # build-time file (shared across workers via mmap); otherwise compute
+        # a private in-memory copy.
+        self.X_unit = X_unit if X_unit is not None else _unit_rows(X)
+        self.id_map = id_map
+        self.meta_df = meta_df
+        self.art_dir = art_dir
+
+        # TF-IDF+SVD pipeline (for text-based queries), the transform actually
+        # used for queries, and its per-text results. The transform is loaded
+        # once, under a lock, either up front (preload_text) or on first use.
+        self._pipeline = pipeline
+        self._text_transform = None
+        self._text_lock = threading.Lock()
+        self._text_vectors = TTLCache(TEXT_VECTOR_CACHE_MAX, float("inf"))
+
+        # Unique lowercased artist → catalog rows, so artist lookups cost one
+        # comparison per artist rather than one per track
+        self.artist_rows: dict[str, list[int]] = {}
+        for j, row in enumerate(id_map):
+            self.artist_rows.setdefault(row["artist"].lower(), []).append(j)
+        self.artist_names = list(self.artist_rows)
+
+    @classmethod
+    def load(
+        cls,
+        art_dir: Path = ART,
+        parquet_path: Path = PROC / "tracks_lastfm.parquet",
+        mmap: bool = MMAP_ARTIFACTS,
+    ) -> "CosineRecommender":
+        """
+        Load features, id_map and (optional) parquet metadata from disk.
+        A bundle's own tracks.parquet takes precedence over parquet_path.
+        """
+        bundle_parquet = art_dir / "tracks.parquet"
+        if bundle_parquet.exists():
+            parquet_path = bundle_parquet
+        features_path = art_dir / "features.npy"
+        unit_path = art_dir / UNIT_FEATURES
+        id_map_path = art_dir / "id_map.json"
 
         if not features_path.exists() or not id_map_path.exists():
             raise RuntimeError(
                 "Missing artifacts. Did you run `python -m src.cli.train_text`?"
             )
 
-        self.X = np.load(features_path)
+        mmap_mode = "r" if mmap else None
+        X = np.load(features_path, mmap_mode=mmap_mode)
+        X_unit = None
+        if unit_path.exists():
+            X_unit = np.load(unit_path, mmap_mode=mmap_mode)
+        else:
+            log.warning("%s not found — normalising features in memory", UNIT_FEATURES)
         with id_map_path.open() as f:
-            self.id_map = json.load(f)
+            id_map = json.load(f)
 
         # Optional: richer metadata from processed parquet (artwork/preview)
-        self.meta_df = None
+        meta_df = None
         try:
             if parquet_path.exists():
                 import pandas as pd
 
                 df = pd.read_parquet(parquet_path)
-                if len(df) == len(self.id_map):
-                    self.meta_df = df.reset_index(drop=True)
+                if len(df) == len(id_map):
+                    meta_df = df.reset_index(drop=True)
         except Exception:
-            self.meta_df = None
+            meta_df = None
+
+        return cls(X, id_map, meta_df=meta_df, X_unit=X_unit, art_dir=art_dir)
 
-        # Lazy-loaded TF-IDF+SVD pipeline (for text-based queries)
-        self._pipeline = None
+    def _sims(self, v: np.ndarray) -> np.ndarray:
+        """Cosine similarity of one query vector against every catalog row."""
+        v = np.asarray(v, dtype=np.float32).ravel()
+        norm = np.linalg.norm(v)
+        if norm == 0:
+            return np.zeros(self.X_unit.shape[0], dtype=np.float32)
+        return self.X_unit @ (v / norm)
 
     def similar_by_index(
         self,
@@ -60,8 +256,7 @@ class CosineRecommender(Recommender):
         if row_index < 0 or row_index >= n:
             raise IndexError(f"row_index {row_index} out of range [0, {n})")
 
-        v = self.X[row_index : row_index + 1]
-        sims = cosine_similarity(v, self.X)[0]
+        sims = self._sims(self.X_unit[row_index])
 
         # Exclude self
         sims[row_index] = -1.0
@@ -143,12 +338,61 @@ class CosineRecommender(Recommender):
     def _load_pipeline(self):
         if self._pipeline is None:
             import joblib
-            pipe_path = ART / "text_svd.pkl"
+            pipe_path = self.art_dir / TEXT_PIPELINE
             if not pipe_path.exists():
                 raise RuntimeError("text_svd.pkl not found — run train_text first.")
             self._pipeline = joblib.load(pipe_path)
         return self._pipeline
 
+    def has_text_pipeline(self) -> bool:
+        return (
+            self._pipeline is not None
+            or TextProjector.exists(self.art_dir)
+            or (self.art_dir / TEXT_PIPELINE).exists()
+        )
+
+    def _build_text_transform(self):
+        # Prefer the light .npy form unless a pipeline object was handed in
+        if self._pipeline is None and TextProjector.exists(self.art_dir):
+            return TextProjector.load(self.art_dir).transform
+        pipe = self._load_pipeline()
+        projector = TextProjector.from_pipeline(pipe)
+        return projector.transform if projector is not None else pipe.transform
+
+    def _load_text_transform(self):
+        """Query transform, loaded at most once however many threads ask."""
+        if self._text_transform is None:
+            with self._text_lock:
+                if self._text_transform is None:
+                    self._text_transform = self._build_text_transform()
+        return self._text_transform
+
+    def preload_text(self, background: bool = False) -> None:
+        """Load the text transform now, or in a daemon thread if background."""
+        def _preload() -> None:
+            try:
+                self._load_text_transform()
+            except Exception as exc:
+                log.warning("Text pipeline preload failed: %s", exc)
+
+        if not background:
+            self._load_text_transform()
+        elif self._text_transform is None:
+            threading.Thread(target=_preload, name="text-pipeline-preload", daemon=True).start()
+
+    def text_vector(self, text: str) -> np.ndarray:
+        """
+        Query vector for `text` (1-D float32, read-only). Whitespace and case
+        don't change the TF-IDF tokens, so they don't split cache entries.
+        """
+        key = " ".join(text.lower().split())
+        v = self._text_vectors.get(key)
+        if v is None:
+            v = np.asarray(self._load_text_transform()([key]), dtype=np.float32).ravel()
+            v.setflags(write=False)
+            self._text_vectors.set(key, v)
+        return v
+
     def similar_by_text(
         self,
         text: str,
@@ -160,9 +404,7 @@ class CosineRecommender(Recommender):
         Vectorize arbitrary text through the TF-IDF+SVD pipeline and return
         the top_k most similar catalog tracks.
         """
-        pipe = self._load_pipeline()
-        v = pipe.transform([text.lower()])
-        sims = cosine_similarity(v, self.X)[0]
+        sims = self._sims(self.text_vector(text))
         order = np.argsort(-sims)
 
         recs: List[Dict] = []
@@ -196,9 +438,7 @@ class CosineRecommender(Recommender):
             return self.similar_by_index(row_index, top_k, max_per_artist)
 
         era_tags_lower = {t.lower() for t in era_tags}
-        n = self.X.shape[0]
-        v = self.X[row_index : row_index + 1]
-        sims = cosine_similarity(v, self.X)[0]
+        sims = self._sims(self.X_unit[row_index])
         sims[row_index] = -1.0
         order = np.argsort(-sims)
 
@@ -249,8 +489,7 @@ class CosineRecommender(Recommender):
         sec_lower = {t.lower() for t in secondary_tags}
 
         if user_vector is not None:
-            v = user_vector.reshape(1, -1)
-            sims = cosine_similarity(v, self.X)[0]
+            sims = self._sims(user_vector)
             order = np.argsort(-sims)
         else:
             order = np.random.permutation(self.X.shape[0])
@@ -297,17 +536,27 @@ class CosineRecommender(Recommender):
             return None
         return self.X[valid].mean(axis=0)
 
+    def rows_for_artists(self, artists: list[str]) -> list[int]:
+        """Catalog rows (in catalog order) by any of `artists`, matched case-insensitively."""
+        rows: list[int] = []
+        for name in {a.lower() for a in artists}:
+            rows.extend(self.artist_rows.get(name, ()))
+        rows.sort()
+        return rows
+
     def tracks_by_artist(self, artist_name: str, top_k: int = 20) -> List[Dict]:
         """
         Return tracks by a given artist (fuzzy match) with their feature vectors.
         Used by the Séance feature.
         """
-        from rapidfuzz import fuzz
-        artist_lower = artist_name.lower()
-        matches = []
-        for j, row in enumerate(self.id_map):
-            score = fuzz.token_set_ratio(row["artist"].lower(), artist_lower)
-            if score >= 70:
-                matches.append((j, score))
-        matches.sort(key=lambda x: -x[1])
+        from rapidfuzz import fuzz, process
+        hits = process.extract(
+            artist_name.lower(),
+            self.artist_names,
+            scorer=fuzz.token_set_ratio,
+            score_cutoff=70,
+            limit=None,
+        )
+        matches = [(j, score) for name, score, _ in hits for j in self.artist_rows[name]]
+        matches.sort(key=lambda x: (-x[1], x[0]))
         return [self._row_to_dict(j, s / 100, include_tags=True) for j, s in matches[:top_k]]
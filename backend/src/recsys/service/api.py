@@ -2,21 +2,28 @@
 from __future__ import annotations
 
 import asyncio
+import json
 import logging
+import os
+import secrets
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 # Load .env before anything reads os.environ — no-op in production (Fly.io injects secrets directly)
 from dotenv import load_dotenv
 load_dotenv(Path(__file__).parents[3] / ".env")  # backend/.env
 
-import pandas as pd
-from fastapi import FastAPI, HTTPException, Query, Header
+from fastapi import Depends, FastAPI, HTTPException, Query, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 
-from src.recsys.config import PROC
-from src.recsys.recommenders.cosine import CosineRecommender
-from src.recsys.search import SearchIndex, norm, EM_DASH
+from src.recsys import artifacts
+from src.recsys.search import norm, EM_DASH
+from src.recsys.service import executor
+from src.recsys.service.container import Catalog, CatalogUnavailable, ServiceContainer
+from src.recsys.service.interaction_queue import InteractionQueue, QueueClosed, QueueFull
+from src.recsys.service.session_pool import SessionPool
 from src.recsys.service.schemas import (
     # existing
     RecommendRequest,
@@ -34,14 +41,52 @@ from src.recsys.service.schemas import (
     AlgorithmicCaptureResponse,
     SeanceRequest,
     SeanceResponse,
+    # admin
+    ReloadRequest,
 )
 
 log = logging.getLogger(__name__)
 
+# Artifacts are loaded by the lifespan (see container.py), not at import time
+services = ServiceContainer()
+interaction_queue = InteractionQueue()
+
+
+def _current_recommender():
+    # Looks `services` up at call time so a hot-swapped catalog is picked up
+    catalog = services.peek()
+    return catalog.recommender if catalog is not None else None
+
+
+blind_sessions = SessionPool(_current_recommender)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from src.recsys.service import db
+
+    await db.astart()
+    await interaction_queue.start()
+    await services.start()
+    await blind_sessions.start()
+    try:
+        yield
+    finally:
+        from src.recsys.service import lastfm_client
+
+        await blind_sessions.stop()
+        await services.stop()
+        await interaction_queue.stop()
+        await db.aclose()
+        await lastfm_client.aclose()
+        executor.shutdown(wait=False)
+
+
 app = FastAPI(
     title="DSCVR API",
     version="2.0.0",
     description="Music self-discovery platform — recommendations, soundtrack, blind taste test, time machine, algorithmic capture, séance.",
+    lifespan=lifespan,
 )
 
 origins = [
@@ -58,35 +103,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-TRACKS_PARQUET = Path(PROC / "tracks_lastfm.parquet")
 AMBIGUITY_THRESHOLD = 88.0
 SEARCH_LIMIT = 8
-
-
-def load_tracks_dataframe(parquet_path: Path = TRACKS_PARQUET) -> pd.DataFrame:
-    if not parquet_path.exists():
-        raise RuntimeError(f"Missing parquet file at {parquet_path}")
-    df = pd.read_parquet(parquet_path)
-    required = {"title", "artist"}
-    if not required.issubset(df.columns):
-        raise RuntimeError(f"Parquet missing required columns: {required}")
-    return df
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
 
 
 def build_track_key(title: str, artist: str) -> str:
     return f"{title} {EM_DASH} {artist}"
 
 
-# ── Load artifacts once at startup ────────────────────────────────────────────
-recommender = CosineRecommender()
-try:
-    tracks_df = load_tracks_dataframe()
-    if len(tracks_df) != len(recommender.id_map):
-        tracks_df = pd.DataFrame(recommender.id_map)
-except Exception:
-    tracks_df = pd.DataFrame(recommender.id_map)
-
-SEARCH_INDEX = SearchIndex(tracks_df)
+async def get_catalog() -> Catalog:
+    """Dependency — waits for the artifacts to be ready, 503 if they can't be."""
+    try:
+        return await services.catalog()
+    except CatalogUnavailable as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
 
 
 # ─── Helpers ──────────────────────────────────────────────────────────────────
@@ -118,14 +149,15 @@ def serialize_match(match: dict) -> SearchResult:
     )
 
 
-def resolve_track(req: RecommendRequest) -> tuple[int, float]:
+def resolve_track(req: RecommendRequest, catalog: Catalog) -> tuple[int, float]:
+    search_index = catalog.search_index
     if req.row_index is not None:
-        if req.row_index < 0 or req.row_index >= len(tracks_df):
+        if req.row_index < 0 or req.row_index >= len(catalog.tracks_df):
             raise HTTPException(status_code=404, detail="Song not found in catalog.")
         return req.row_index, 100.0
 
     if req.track_key:
-        idx = SEARCH_INDEX.exact_index.get(norm(req.track_key))
+        idx = search_index.exact_index.get(norm(req.track_key))
         if idx is not None:
             return idx, 100.0
         if not req.query:
@@ -134,14 +166,14 @@ def resolve_track(req: RecommendRequest) -> tuple[int, float]:
     if not req.query:
         raise HTTPException(status_code=400, detail="Missing query or track identifier.")
 
-    best_idx, best_score, candidate_idxs = SEARCH_INDEX.match(
+    best_idx, best_score, candidate_idxs = search_index.match(
         req.query, limit=SEARCH_LIMIT
     )
     if best_idx is None:
         raise HTTPException(status_code=404, detail="Song not found in catalog.")
 
     if best_score < AMBIGUITY_THRESHOLD:
-        matches = SEARCH_INDEX.top_matches(req.query, limit=SEARCH_LIMIT)
+        matches = search_index.top_matches(req.query, limit=SEARCH_LIMIT)
         raise HTTPException(
             status_code=409,
             detail={
@@ -158,8 +190,10 @@ async def _register_user_if_present(x_user_id: str | None) -> None:
     if not x_user_id:
         return
     from src.recsys.service import db
+    if db.is_registered(x_user_id):
+        return  # already upserted by this process — skip the thread hop
     try:
-        await asyncio.to_thread(db.register_user, x_user_id)
+        await db.aregister_user(x_user_id)
     except Exception as exc:
         log.debug("User registration silently failed: %s", exc)
 
@@ -168,16 +202,93 @@ async def _register_user_if_present(x_user_id: str | None) -> None:
 
 @app.get("/health")
 def health():
-    return {"ok": True, "tracks": len(tracks_df)}
+    """Liveness — always answers, even while artifacts are still loading."""
+    catalog = services.peek()
+    return {
+        "ok": True,
+        "ready": catalog is not None,
+        "tracks": len(catalog.tracks_df) if catalog is not None else None,
+        "version": services.version,
+        "error": services.error,
+    }
+
+
+@app.get("/health/ready")
+def health_ready():
+    """Readiness — 503 until the catalog artifacts are loaded."""
+    catalog = services.peek()
+    if catalog is None:
+        return JSONResponse(
+            status_code=503, content={"ready": False, "error": services.error}
+        )
+    return {"ready": True, "tracks": len(catalog.tracks_df)}
+
+
+# ─── Admin ────────────────────────────────────────────────────────────────────
+
+def require_admin(x_admin_token: str | None = Header(default=None)) -> None:
+    """Admin routes are disabled unless ADMIN_TOKEN is set."""
+    if not ADMIN_TOKEN or not secrets.compare_digest(x_admin_token or "", ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required.")
+
+
+@app.get("/admin/artifacts", dependencies=[Depends(require_admin)])
+def artifact_status():
+    return {
+        "version": services.version,
+        "ready": services.ready,
+        "reloading": services.reloading,
+        "current": artifacts.current_version(),
+        "available": artifacts.list_versions(),
+        "last_reload": services.last_reload,
+    }
+
+
+@app.post("/admin/reload", status_code=202, dependencies=[Depends(require_admin)])
+async def reload_artifacts(req: ReloadRequest | None = None, wait: bool = False):
+    """
+    Load an artifact bundle in the background and hot-swap it in.
+    wait=true blocks until the swap (or its rejection) and returns the outcome.
+    """
+    version = req.version if req else None
+    if wait:
+        result = await services.reload(version)
+        if not result["ok"]:
+            raise HTTPException(status_code=422, detail=result)
+        return result
+    if not services.schedule_reload(version):
+        raise HTTPException(status_code=409, detail="A reload is already in progress.")
+    return {"accepted": True, "requested": version}
+
+
+@app.get("/metrics")
+def metrics():
+    from src.recsys.service import db, gemini_client, lastfm_client
+
+    return {
+        "executor": executor.stats(),
+        "interactions": interaction_queue.stats(),
+        "db": db.stats(),
+        "gemini_cache": gemini_client.cache_stats(),
+        "gemini_latency": gemini_client.latency_stats(),
+        "lastfm": lastfm_client.stats(),
+        "blind_sessions": blind_sessions.stats(),
+    }
 
 
 # ─── Search ───────────────────────────────────────────────────────────────────
 
 @app.get("/search", response_model=SearchResponse)
-def search(q: str = Query(..., alias="q"), limit: int = SEARCH_LIMIT):
+async def search(
+    q: str = Query(..., alias="q"),
+    limit: int = SEARCH_LIMIT,
+    catalog: Catalog = Depends(get_catalog),
+):
     if not q.strip():
         return SearchResponse(query=q, results=[])
-    matches = SEARCH_INDEX.top_matches(q, limit=limit)
+    matches = await executor.run_cpu(
+        "search.top_matches", catalog.search_index.top_matches, q, limit=limit
+    )
     return SearchResponse(
         query=q,
         results=[serialize_match(m) for m in matches],
@@ -187,10 +298,18 @@ def search(q: str = Query(..., alias="q"), limit: int = SEARCH_LIMIT):
 # ─── Classic Recommendation ───────────────────────────────────────────────────
 
 @app.post("/recommend", response_model=RecommendResponse)
-async def recommend(req: RecommendRequest):
-    idx, _score = resolve_track(req)
+async def recommend(req: RecommendRequest, catalog: Catalog = Depends(get_catalog)):
+    recommender = catalog.recommender
+    idx, _score = await executor.run_cpu(
+        "recommend.resolve_track", resolve_track, req, catalog
+    )
     try:
-        recs = recommender.similar_by_index(idx, top_k=req.top_k)
+        recs = await executor.run_cpu(
+            "recommend.similar_by_index",
+            recommender.similar_by_index,
+            idx,
+            top_k=req.top_k,
+        )
     except Exception as exc:
         raise HTTPException(status_code=500, detail="Failed to compute recommendations.") from exc
 
@@ -198,7 +317,7 @@ async def recommend(req: RecommendRequest):
     from src.recsys.service.preview_resolver import resolve_batch
     enriched = await resolve_batch(recs)
 
-    resolved = tracks_df.iloc[idx]
+    resolved = catalog.tracks_df.iloc[idx]
     resolved_name = resolved.get("title") or recommender.id_map[idx].get("title")
     resolved_artist = resolved.get("artist") or recommender.id_map[idx].get("artist")
 
@@ -215,26 +334,16 @@ async def recommend(req: RecommendRequest):
 
 @app.post("/interactions", status_code=204)
 async def log_interaction(req: InteractionRequest):
-    """Log a user interaction and update taste profile. Fire-and-forget."""
-    from src.recsys.service import db
-
-    async def _persist():
-        await asyncio.to_thread(
-            db.log_interaction,
-            req.user_id,
-            req.track_id,
-            req.interaction_type,
-            req.feature,
-        )
-        if req.tags:
-            await asyncio.to_thread(
-                db.update_taste_profile,
-                req.user_id,
-                req.tags,
-                req.interaction_type,
-            )
-
-    asyncio.create_task(_persist())
+    """
+    Queue an interaction for write-behind persistence (users, interactions,
+    taste_profile). 503 when the queue is saturated so clients back off.
+    """
+    try:
+        await interaction_queue.put(req.model_dump(mode="json"))
+    except (QueueFull, QueueClosed) as exc:
+        raise HTTPException(
+            status_code=503, detail=str(exc), headers={"Retry-After": "1"}
+        ) from exc
 
 
 # ─── Feature 1: Soundtrack Your Life ──────────────────────────────────────────
@@ -243,6 +352,7 @@ async def log_interaction(req: InteractionRequest):
 async def soundtrack(
     req: SoundtrackRequest,
     x_user_id: str | None = Header(default=None),
+    catalog: Catalog = Depends(get_catalog),
 ):
     await _register_user_if_present(x_user_id or req.user_id)
     from src.recsys.service.features import soundtrack as feat
@@ -252,60 +362,64 @@ async def soundtrack(
 
     result = await feat.run(
         description=req.description,
-        recommender=recommender,
+        recommender=catalog.recommender,
         user_id=x_user_id or req.user_id,
     )
     return SoundtrackResponse(**result)
 
 
+@app.post("/soundtrack/stream")
+async def soundtrack_stream(
+    req: SoundtrackRequest,
+    x_user_id: str | None = Header(default=None),
+    catalog: Catalog = Depends(get_catalog),
+):
+    """
+    NDJSON variant of /soundtrack — one event per line:
+    candidates first, then each track as it's picked and resolved, then the summary.
+    """
+    await _register_user_if_present(x_user_id or req.user_id)
+    from src.recsys.service.features import soundtrack as feat
+
+    if not req.description.strip():
+        raise HTTPException(status_code=400, detail="Description cannot be empty.")
+
+    events = feat.stream(
+        description=req.description,
+        recommender=catalog.recommender,
+        user_id=x_user_id or req.user_id,
+    )
+
+    async def ndjson():
+        async for event in events:
+            yield json.dumps(event) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
 # ─── Feature 2: Blind Taste Test ──────────────────────────────────────────────
 
 @app.get("/blind-taste-test", response_model=BlindTasteTestResponse)
-async def blind_taste_test(x_user_id: str | None = Header(default=None)):
+async def blind_taste_test(
+    x_user_id: str | None = Header(default=None),
+    catalog: Catalog = Depends(get_catalog),
+):
     await _register_user_if_present(x_user_id)
-    from src.recsys.service.features import blind_taste_test as feat
-    from src.recsys.service.preview_resolver import resolve_batch
-
-    result = feat.get_session(recommender)
-
-    # Resolve previews using full catalog metadata (name/artist needed for Deezer).
-    # We temporarily enrich with name/artist for the resolver, then strip them
-    # from the response so the session remains blind.
-    resolve_input = []
-    for t in result["tracks"]:
-        idx = t["row_index"]
-        row = recommender.id_map[idx]
-        meta = recommender.meta_df.iloc[idx] if recommender.meta_df is not None else None
-        name = (meta.get("title") if hasattr(meta, "get") else None) or row.get("title", "")
-        artist = (meta.get("artist") if hasattr(meta, "get") else None) or row.get("artist", "")
-        resolve_input.append({
-            "row_index": idx,
-            "name": name,
-            "artist": artist,
-            "preview_url": t.get("preview_url"),
-            "artwork_url": None,
-        })
-
-    enriched = await resolve_batch(resolve_input)
-
-    # Return only blind fields — name, artist, tags, artwork intentionally omitted
-    result["tracks"] = [
-        {
-            "row_index": t["row_index"],
-            "preview_url": t.get("preview_url"),
-            "youtube_id": t.get("youtube_id"),
-        }
-        for t in enriched
-    ]
-
+    # Usually a pre-warmed session with previews already resolved (session_pool.py)
+    result = await blind_sessions.get(catalog.recommender)
     return BlindTasteTestResponse(**result)
 
 
 @app.post("/blind-taste-test/reveal", response_model=BlindRevealResponse)
-async def blind_reveal(req: BlindRevealRequest):
+async def blind_reveal(
+    req: BlindRevealRequest,
+    catalog: Catalog = Depends(get_catalog),
+):
     from src.recsys.service.features import blind_taste_test as feat
 
-    result = feat.reveal(req.track_indices, recommender)
+    result = await executor.run_cpu(
+        "blind_taste_test.reveal", feat.reveal, req.track_indices, catalog.recommender
+    )
     return BlindRevealResponse(**result)
 
 
@@ -315,6 +429,7 @@ async def blind_reveal(req: BlindRevealRequest):
 async def time_machine(
     req: TimeMachineRequest,
     x_user_id: str | None = Header(default=None),
+    catalog: Catalog = Depends(get_catalog),
 ):
     await _register_user_if_present(x_user_id or req.user_id)
     from src.recsys.service.features import time_machine as feat
@@ -330,8 +445,8 @@ async def time_machine(
         seed_track=req.seed_track,
         seed_artist=req.seed_artist,
         era=req.era,
-        recommender=recommender,
-        search_index=SEARCH_INDEX,
+        recommender=catalog.recommender,
+        search_index=catalog.search_index,
     )
     return TimeMachineResponse(**result)
 
@@ -342,12 +457,13 @@ async def time_machine(
 async def algorithmic_capture(
     user_id: str = Query(...),
     x_user_id: str | None = Header(default=None),
+    catalog: Catalog = Depends(get_catalog),
 ):
     uid = x_user_id or user_id
     await _register_user_if_present(uid)
     from src.recsys.service.features import algorithmic_capture as feat
 
-    result = await feat.run(user_id=uid, recommender=recommender)
+    result = await feat.run(user_id=uid, recommender=catalog.recommender)
     return AlgorithmicCaptureResponse(**result)
 
 
@@ -357,6 +473,7 @@ async def algorithmic_capture(
 async def seance(
     req: SeanceRequest,
     x_user_id: str | None = Header(default=None),
+    catalog: Catalog = Depends(get_catalog),
 ):
     await _register_user_if_present(x_user_id or req.user_id)
     from src.recsys.service.features import seance as feat
@@ -364,5 +481,5 @@ async def seance(
     if not req.artist.strip():
         raise HTTPException(status_code=400, detail="Artist name cannot be empty.")
 
-    result = await feat.run(artist=req.artist, recommender=recommender)
+    result = await feat.run(artist=req.artist, recommender=catalog.recommender)
     return SeanceResponse(**result)
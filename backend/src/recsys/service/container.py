@@ -0,0 +1,310 @@
+# src/recsys/service/container.py
+"""
+Service container — owns the catalog artifacts (recommender, tracks_df, search index).
+
+Nothing is loaded at import time. The FastAPI lifespan calls start(), and the
+CATALOG_WARMUP mode decides what happens next:
+  background  load in a worker thread; the server accepts connections at once (default)
+  eager       load before the server starts accepting connections
+  lazy        load on the first request that needs the catalog
+
+Endpoints await catalog(), which blocks only until the artifacts are ready.
+/health never waits.
+
+reload() loads another artifact version (see artifacts.py) in the background,
+validates it and swaps the catalog reference in one assignment. Requests
+already holding the old Catalog finish on it; new requests see the new one.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from src.recsys import artifacts
+from src.recsys.config import PROC
+from src.recsys.recommenders.cosine import CosineRecommender
+from src.recsys.search import SearchIndex
+
+log = logging.getLogger(__name__)
+
+TRACKS_PARQUET = Path(PROC / "tracks_lastfm.parquet")
+CATALOG_WARMUP = os.getenv("CATALOG_WARMUP", "background")
+CATALOG_READY_TIMEOUT_S = float(os.getenv("CATALOG_READY_TIMEOUT_S", "60"))
+# When to load the Soundtrack text pipeline: eager (part of the catalog load),
+# background (thread started once the catalog is loaded) or lazy (first query)
+TEXT_PIPELINE_PRELOAD = os.getenv("TEXT_PIPELINE_PRELOAD", "background")
+# Poll data/artifacts/CURRENT every N seconds and hot-swap on change (0 = off)
+ARTIFACT_WATCH_S = float(os.getenv("ARTIFACT_WATCH_S", "0"))
+
+
+class CatalogUnavailable(RuntimeError):
+    """Raised when the catalog failed to load or did not become ready in time."""
+
+
+@dataclass(frozen=True)
+class Catalog:
+    recommender: CosineRecommender
+    tracks_df: pd.DataFrame
+    search_index: SearchIndex
+    version: str | None = None
+
+
+def build_catalog(recommender: CosineRecommender, version: str | None = None) -> Catalog:
+    """Derive tracks_df, search index and blind taste test pool from a loaded recommender."""
+    from src.recsys.service.features import blind_taste_test
+
+    # Scans every preview URL — do it here, off the request path
+    blind_taste_test.preview_pool(recommender)
+    meta_df = recommender.meta_df
+    if meta_df is not None and {"title", "artist"}.issubset(meta_df.columns):
+        # Same parquet the recommender already read — don't load it twice
+        tracks_df = meta_df
+    else:
+        tracks_df = pd.DataFrame(recommender.id_map)
+    return Catalog(
+        recommender=recommender,
+        tracks_df=tracks_df,
+        search_index=SearchIndex(tracks_df),
+        version=version,
+    )
+
+
+def load_catalog(version: str | None = None) -> Catalog:
+    """Load an artifact version (default: CURRENT, else the flat layout)."""
+    version, art_dir = artifacts.resolve_dir(version)
+    recommender = CosineRecommender.load(art_dir=art_dir, parquet_path=TRACKS_PARQUET)
+    if TEXT_PIPELINE_PRELOAD != "lazy" and recommender.has_text_pipeline():
+        recommender.preload_text(background=TEXT_PIPELINE_PRELOAD == "background")
+    return build_catalog(recommender, version=version)
+
+
+def validate_catalog(catalog: Catalog) -> None:
+    """
+    Raise RuntimeError unless the bundle is internally consistent.
+    Also faults the mmapped pages in and loads the text pipeline, so the
+    first requests after a swap don't pay for it.
+    """
+    rec = catalog.recommender
+    n = len(rec.id_map)
+    if n == 0:
+        raise RuntimeError("Bundle has an empty id_map")
+    if rec.X.ndim != 2 or rec.X.shape[0] != n:
+        raise RuntimeError(f"features.npy shape {rec.X.shape} does not match {n} id_map rows")
+    if rec.X_unit.shape != rec.X.shape:
+        raise RuntimeError(f"features_unit.npy shape {rec.X_unit.shape} != {rec.X.shape}")
+    if rec.meta_df is not None and len(rec.meta_df) != n:
+        raise RuntimeError(f"tracks.parquet has {len(rec.meta_df)} rows, expected {n}")
+    if len(catalog.tracks_df) != n:
+        raise RuntimeError(f"tracks_df has {len(catalog.tracks_df)} rows, expected {n}")
+    if not np.isfinite(rec.X_unit).all():
+        raise RuntimeError("Feature matrix contains NaN/inf")
+
+    if rec.has_text_pipeline():
+        dim = rec.text_vector("validation").shape[0]
+        if dim != rec.X.shape[1]:
+            raise RuntimeError(f"text pipeline emits {dim} dims, features have {rec.X.shape[1]}")
+
+    # Warm-up query against the new bundle
+    rec.similar_by_index(0, top_k=1)
+
+
+class ServiceContainer:
+    def __init__(
+        self,
+        loader: Callable[..., Catalog] = load_catalog,
+        warmup: str = CATALOG_WARMUP,
+        ready_timeout_s: float = CATALOG_READY_TIMEOUT_S,
+        watch_s: float = ARTIFACT_WATCH_S,
+    ) -> None:
+        if warmup not in {"background", "eager", "lazy"}:
+            raise ValueError(f"Unknown warmup mode: {warmup!r}")
+        self._loader = loader
+        self.warmup = warmup
+        self.ready_timeout_s = ready_timeout_s
+        self._catalog: Catalog | None = None
+        self._error: BaseException | None = None
+        self._ready: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self.load_seconds: float | None = None
+        self.watch_s = watch_s
+        self._watch_task: asyncio.Task | None = None
+        self._reload_lock: asyncio.Lock | None = None
+        self._reload_task: asyncio.Task | None = None
+        self.last_reload: dict | None = None
+
+    # ── state ─────────────────────────────────────────────────────────────────
+
+    @property
+    def ready(self) -> bool:
+        return self._catalog is not None
+
+    @property
+    def version(self) -> str | None:
+        return self._catalog.version if self._catalog is not None else None
+
+    @property
+    def reloading(self) -> bool:
+        return self._reload_lock is not None and self._reload_lock.locked()
+
+    @property
+    def error(self) -> str | None:
+        return repr(self._error) if self._error is not None else None
+
+    def peek(self) -> Catalog | None:
+        """Current catalog without waiting — None while still loading."""
+        return self._catalog
+
+    # ── lifecycle ─────────────────────────────────────────────────────────────
+
+    async def start(self) -> None:
+        """Called from the app lifespan."""
+        self._reload_lock = asyncio.Lock()
+        if self.watch_s > 0:
+            self._watch_task = asyncio.create_task(self._watch())
+        if self.warmup == "lazy":
+            return
+        self._ensure_loading()
+        if self.warmup == "eager":
+            await self._task
+
+    async def stop(self) -> None:
+        # Await the cancelled tasks so none is still running (or swapping a
+        # catalog in) after shutdown
+        for task in (self._task, self._watch_task, self._reload_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = None
+        self._watch_task = None
+        self._reload_task = None
+        self._ready = None
+
+    def _ensure_loading(self) -> None:
+        if self._catalog is not None:
+            return
+        # (Re)create per event loop; a previous failed attempt is retried
+        if self._task is None or (self._task.done() and self._error is not None):
+            self._error = None
+            self._ready = asyncio.Event()
+            self._task = asyncio.create_task(self._load())
+
+    async def _load(self) -> None:
+        ready = self._ready
+        started = time.perf_counter()
+        try:
+            catalog = await asyncio.to_thread(self._loader)
+        except Exception as exc:
+            log.exception("Catalog load failed")
+            self._error = exc
+        else:
+            self._catalog = catalog
+            self.load_seconds = time.perf_counter() - started
+            log.info(
+                "Catalog ready ✓ (%d tracks, %.2fs)",
+                len(catalog.tracks_df),
+                self.load_seconds,
+            )
+        finally:
+            ready.set()
+
+    # ── access ────────────────────────────────────────────────────────────────
+
+    async def catalog(self) -> Catalog:
+        """Return the catalog, waiting for it to load if necessary."""
+        if self._catalog is not None:
+            return self._catalog
+        self._ensure_loading()
+        try:
+            await asyncio.wait_for(self._ready.wait(), self.ready_timeout_s)
+        except asyncio.TimeoutError as exc:
+            raise CatalogUnavailable("Catalog is still loading.") from exc
+        if self._catalog is None:
+            raise CatalogUnavailable(f"Catalog failed to load: {self.error}")
+        return self._catalog
+
+    # ── hot swap ──────────────────────────────────────────────────────────────
+
+    async def reload(self, version: str | None = None) -> dict:
+        """
+        Load + validate a bundle off the event loop, then swap it in.
+        On failure the current catalog stays in place. One reload at a time.
+        """
+        if self._reload_lock is None:
+            self._reload_lock = asyncio.Lock()
+        async with self._reload_lock:
+            previous = self.version
+            started = time.perf_counter()
+
+            def _load_and_validate() -> Catalog:
+                if version:
+                    artifacts.version_dir(version)  # reject path-like names up front
+                catalog = self._loader(version) if version else self._loader()
+                validate_catalog(catalog)
+                return catalog
+
+            try:
+                catalog = await asyncio.to_thread(_load_and_validate)
+            except Exception as exc:
+                log.error("Artifact reload (%s) rejected: %s", version or "CURRENT", exc)
+                self.last_reload = {
+                    "ok": False,
+                    "requested": version,
+                    "version": previous,
+                    "error": repr(exc),
+                }
+                return self.last_reload
+
+            self._catalog = catalog  # the swap — a single reference assignment
+            self._error = None
+            if self._ready is not None:
+                self._ready.set()
+            elapsed = time.perf_counter() - started
+            log.info(
+                "Artifacts swapped %s → %s (%d tracks, %.2fs)",
+                previous,
+                catalog.version,
+                len(catalog.tracks_df),
+                elapsed,
+            )
+            self.last_reload = {
+                "ok": True,
+                "requested": version,
+                "previous": previous,
+                "version": catalog.version,
+                "tracks": len(catalog.tracks_df),
+                "seconds": round(elapsed, 3),
+            }
+            return self.last_reload
+
+    def schedule_reload(self, version: str | None = None) -> bool:
+        """Start reload() in the background. False if one is already running."""
+        if self.reloading or (self._reload_task is not None and not self._reload_task.done()):
+            return False
+        self._reload_task = asyncio.create_task(self.reload(version))
+        return True
+
+    async def _watch(self) -> None:
+        """Reload whenever CURRENT names a different version than the one served."""
+        while True:
+            await asyncio.sleep(self.watch_s)
+            try:
+                current = artifacts.current_version()
+            except OSError as exc:
+                log.debug("Artifact watch failed to read CURRENT: %s", exc)
+                continue
+            if self.ready and current and current != self.version and not self.reloading:
+                failed = self.last_reload or {}
+                if failed.get("ok") is False and failed.get("requested") == current:
+                    continue  # already rejected this version; wait for a new one
+                await self.reload(current)
@@ -1,16 +1,48 @@
 # src/recsys/service/db.py
 """
-Supabase client — initialised once at import time.
-All DB calls are synchronous (supabase-py v2 sync client).
-Use asyncio.to_thread() at the call site to avoid blocking the event loop.
+Persistence for users, interactions and taste profiles.
+The storage backend is chosen by DB_BACKEND (see storage/): hosted Supabase
+by default, or a local SQLite / plain Postgres stand-in.
+
+Two call paths over the same backend:
+  sync   register_user, write_interactions, get_interaction_history, ...
+         — blocking; for CLIs and thread-pool callers
+  async  aregister_user, awrite_interactions, aget_interaction_history, ...
+         — for the event loop. The Postgres backend awaits an asyncpg pool
+           opened on the app's loop (astart(), from the lifespan); Supabase
+           and SQLite have blocking clients, so their async calls run on
+           the storage layer's own sized thread pool, never the default
+           executor.
+
+Async calls are bounded by DB_STATEMENT_TIMEOUT_S. Every backend call is
+timed per operation — see stats() / GET /metrics.
 """
 from __future__ import annotations
 
+import asyncio
 import os
 import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import datetime
+
+from src.recsys.service.storage import DB_BACKEND, StorageBackend, create_backend
+from src.recsys.service.storage.base import DB_STATEMENT_TIMEOUT_S, encode_cursor
+from src.recsys.service.storage.supabase import SupabaseBackend
 
 log = logging.getLogger(__name__)
 
+# Users upserted by this process are remembered for KNOWN_USERS_TTL_S so
+# repeat requests skip the users write entirely
+KNOWN_USERS_MAX = int(os.getenv("KNOWN_USERS_MAX", "10000"))
+KNOWN_USERS_TTL_S = float(os.getenv("KNOWN_USERS_TTL_S", "3600"))
+# Rows per interaction-history round trip
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "500"))
+SLOW_QUERY_S = float(os.getenv("DB_SLOW_QUERY_S", "0.5"))
+
 _client = None
 
 
@@ -27,8 +59,10 @@ def get_client():
         return None
 
     try:
-        from supabase import create_client
-        _client = create_client(url, key)
+        from supabase import ClientOptions, create_client
+        _client = create_client(
+            url, key, options=ClientOptions(postgrest_client_timeout=DB_STATEMENT_TIMEOUT_S)
+        )
         log.info("Supabase client initialised ✓")
     except Exception as exc:
         log.error("Failed to initialise Supabase client: %s", exc)
@@ -37,17 +71,213 @@ def get_client():
     return _client
 
 
+_backend: StorageBackend | None = None
+_backend_failed = False
+
+
+def get_backend() -> StorageBackend | None:
+    """The configured storage backend, or None when persistence is disabled."""
+    global _backend, _backend_failed
+    if DB_BACKEND == "supabase":
+        client = get_client()
+        return SupabaseBackend(client) if client is not None else None
+    if _backend is None and not _backend_failed:
+        try:
+            _backend = create_backend(DB_BACKEND)
+            log.info("Storage backend %s initialised ✓", DB_BACKEND)
+        except Exception as exc:
+            log.error("Failed to initialise %s backend — DB features disabled: %s", DB_BACKEND, exc)
+            _backend_failed = True
+    return _backend
+
+
+async def astart() -> None:
+    """Open the backend's async connections on the running loop (app lifespan)."""
+    backend = get_backend()
+    if backend is None:
+        return
+    try:
+        await backend.astart()
+    except Exception as exc:
+        # Not fatal — the pool is retried on the first query
+        log.error("Storage backend %s failed to connect: %r", DB_BACKEND, exc)
+
+
+async def aclose() -> None:
+    backend = _backend
+    if backend is not None:
+        await backend.aclose()
+
+
+# ─── Query metrics ────────────────────────────────────────────────────────────
+
+@dataclass
+class QueryStats:
+    calls: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    s_total: float = 0.0
+    s_max: float = 0.0
+
+
+_stats: dict[str, QueryStats] = {}
+_stats_lock = threading.Lock()
+
+
+def _record(op: str, elapsed: float, failed: bool, timed_out: bool = False) -> None:
+    with _stats_lock:
+        s = _stats.setdefault(op, QueryStats())
+        s.calls += 1
+        s.errors += int(failed)
+        s.timeouts += int(timed_out)
+        s.s_total += elapsed
+        s.s_max = max(s.s_max, elapsed)
+    if elapsed >= SLOW_QUERY_S:
+        log.warning("DB call '%s' took %.3fs", op, elapsed)
+
+
+def _timed(op: str, fn, *args):
+    """Run a sync backend call and record its latency under op."""
+    started = time.perf_counter()
+    failed = True
+    try:
+        result = fn(*args)
+        failed = False
+        return result
+    finally:
+        _record(op, time.perf_counter() - started, failed)
+
+
+async def _atimed(op: str, coro):
+    """Await a backend coroutine under DB_STATEMENT_TIMEOUT_S and record its latency."""
+    started = time.perf_counter()
+    failed, timed_out = True, False
+    try:
+        result = await asyncio.wait_for(coro, DB_STATEMENT_TIMEOUT_S)
+        failed = False
+        return result
+    except asyncio.TimeoutError:
+        timed_out = True
+        raise
+    finally:
+        _record(op, time.perf_counter() - started, failed, timed_out)
+
+
+def stats() -> dict:
+    """Backend name plus per-operation call counts and mean/max latency (seconds)."""
+    with _stats_lock:
+        snapshot = {op: asdict(s) for op, s in _stats.items()}
+    for s in snapshot.values():
+        s["s_mean"] = s["s_total"] / (s["calls"] or 1)
+    return {"backend": DB_BACKEND, "queries": snapshot}
+
+
+def reset_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
+
+
 # ─── User helpers ─────────────────────────────────────────────────────────────
 
+class _KnownUsers:
+    """Bounded LRU set of user ids with a TTL. Thread-safe (DB calls run in threads)."""
+
+    def __init__(self, max_size: int = KNOWN_USERS_MAX, ttl_s: float = KNOWN_USERS_TTL_S) -> None:
+        self.max_size = max_size
+        self.ttl_s = ttl_s
+        self._expiry: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, user_id: str) -> bool:
+        with self._lock:
+            expires = self._expiry.get(user_id)
+            if expires is None:
+                return False
+            if expires < time.monotonic():
+                del self._expiry[user_id]
+                return False
+            self._expiry.move_to_end(user_id)
+            return True
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+    def add_many(self, user_ids) -> None:
+        expires = time.monotonic() + self.ttl_s
+        with self._lock:
+            for uid in user_ids:
+                self._expiry[uid] = expires
+                self._expiry.move_to_end(uid)
+            while len(self._expiry) > self.max_size:
+                self._expiry.popitem(last=False)
+
+    def discard_many(self, user_ids) -> None:
+        with self._lock:
+            for uid in user_ids:
+                self._expiry.pop(uid, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._expiry.clear()
+
+
+_known_users = _KnownUsers()
+
+
+def is_registered(user_id: str) -> bool:
+    """True if this process upserted user_id within the last KNOWN_USERS_TTL_S."""
+    return user_id in _known_users
+
+
+def _new_users(user_ids) -> list[str]:
+    return sorted({uid for uid in user_ids if uid not in _known_users})
+
+
+def _upsert_users(backend: StorageBackend, user_ids) -> None:
+    """Upsert the users not already known to this process, in one call. Raises on failure."""
+    new = _new_users(user_ids)
+    if not new:
+        return
+    _timed("register_users", backend.register_users, new)
+    _known_users.add_many(new)
+
+
+async def _aupsert_users(backend: StorageBackend, user_ids) -> None:
+    new = _new_users(user_ids)
+    if not new:
+        return
+    await _atimed("register_users", backend.aregister_users(new))
+    _known_users.add_many(new)
+
+
+def register_users(user_ids: list[str]) -> None:
+    """Batch upsert — skips users already registered by this process."""
+    backend = get_backend()
+    if backend is None:
+        return
+    try:
+        _upsert_users(backend, user_ids)
+    except Exception as exc:
+        log.warning("register_users failed: %s", exc)
+
+
 def register_user(user_id: str) -> None:
-    """Upsert user row — silently no-ops if Supabase is unavailable."""
-    db = get_client()
-    if db is None:
+    """Upsert user row — silently no-ops if the DB is unavailable."""
+    register_users([user_id])
+
+
+async def aregister_users(user_ids: list[str]) -> None:
+    backend = get_backend()
+    if backend is None:
         return
     try:
-        db.table("users").upsert({"id": user_id}, on_conflict="id").execute()
+        await _aupsert_users(backend, user_ids)
     except Exception as exc:
-        log.warning("register_user failed: %s", exc)
+        log.warning("register_users failed: %r", exc)
+
+
+async def aregister_user(user_id: str) -> None:
+    await aregister_users([user_id])
 
 
 # ─── Interaction helpers ───────────────────────────────────────────────────────
@@ -55,103 +285,268 @@ def register_user(user_id: str) -> None:
 _INTERACTION_WEIGHTS = {"heart": 1.0, "complete": 0.5, "skip": -0.3}
 
 
+def _interaction_rows(events: list[dict]) -> list[dict]:
+    return [
+        {
+            "user_id": e["user_id"],
+            "track_id": e["track_id"],
+            "interaction_type": e["interaction_type"],
+            "feature": e.get("feature"),
+            "timestamp": e.get("timestamp"),
+        }
+        for e in events
+    ]
+
+
+def _record_rows(events: list[dict]) -> list[dict]:
+    """
+    Interaction rows for backend.record_interactions. The event id (assigned
+    by the interaction queue and spooled with the event) is the row id, so a
+    retried batch is de-duplicated by the database; events without one get
+    a fresh id. Repeated ids within a batch keep the first event.
+    """
+    rows: dict[str, dict] = {}
+    for e in events:
+        row_id = e.get("id") or str(uuid.uuid4())
+        rows.setdefault(
+            row_id,
+            {
+                "id": row_id,
+                "user_id": e["user_id"],
+                "track_id": e["track_id"],
+                "interaction_type": e["interaction_type"],
+                "feature": e.get("feature"),
+                "timestamp": e.get("timestamp"),
+                "tags": list(e.get("tags") or []),
+                "weight": _INTERACTION_WEIGHTS.get(e["interaction_type"], 0.0),
+            },
+        )
+    return list(rows.values())
+
+
 def log_interaction(
     user_id: str,
     track_id: str,
     interaction_type: str,
     feature: str | None = None,
 ) -> None:
-    db = get_client()
-    if db is None:
+    backend = get_backend()
+    if backend is None:
         return
     try:
         # Ensure user exists before inserting — prevents FK violation on first interaction
-        db.table("users").upsert({"id": user_id}, on_conflict="id").execute()
-        db.table("interactions").insert(
-            {
-                "user_id": user_id,
-                "track_id": track_id,
-                "interaction_type": interaction_type,
-                "feature": feature,
-            }
-        ).execute()
+        _upsert_users(backend, [user_id])
+        _timed(
+            "insert_interactions",
+            backend.insert_interactions,
+            _interaction_rows(
+                [
+                    {
+                        "user_id": user_id,
+                        "track_id": track_id,
+                        "interaction_type": interaction_type,
+                        "feature": feature,
+                    }
+                ]
+            ),
+        )
     except Exception as exc:
+        _known_users.discard_many([user_id])
         log.warning("log_interaction failed: %s", exc)
 
 
+def update_taste_profiles(triples: list[tuple[str, str, float]]) -> None:
+    """Add each (user_id, tag, delta) to taste_profile.score in one atomic call."""
+    backend = get_backend()
+    if backend is None:
+        return
+    deltas: dict[tuple[str, str], float] = {}
+    for user_id, tag, delta in triples:
+        if delta:
+            deltas[(user_id, tag)] = deltas.get((user_id, tag), 0.0) + delta
+    if not deltas:
+        return
+    try:
+        _timed("increment_taste_profile", backend.increment_taste_profile, deltas)
+    except Exception as exc:
+        log.warning("update_taste_profiles failed: %s", exc)
+
+
 def update_taste_profile(
     user_id: str,
     tags: list[str],
     interaction_type: str,
 ) -> None:
     """Increment/decrement tag scores in the taste_profile table."""
-    db = get_client()
-    if db is None:
-        return
     weight = _INTERACTION_WEIGHTS.get(interaction_type, 0)
     if weight == 0 or not tags:
         return
+    update_taste_profiles([(user_id, tag, weight) for tag in tags])
+
+
+def write_interactions(events: list[dict]) -> bool:
+    """
+    Batched write for the interaction queue — at most two round trips per
+    batch: users upsert (new users only), then record_interactions, which
+    inserts the interactions and increments taste_profile in one transaction.
+    Idempotent per event id: retrying a batch that already landed inserts and
+    counts nothing twice.
+    Each event: {id, user_id, track_id, interaction_type, feature, tags, timestamp}.
+    Returns False on failure so the caller can retry; True when the DB is off.
+    """
+    backend = get_backend()
+    if backend is None or not events:
+        return True
     try:
-        # Fetch existing scores for these tags
-        resp = (
-            db.table("taste_profile")
-            .select("tag,score")
-            .eq("user_id", user_id)
-            .in_("tag", tags)
-            .execute()
-        )
-        existing = {r["tag"]: r["score"] for r in (resp.data or [])}
-        rows = [
-            {
-                "user_id": user_id,
-                "tag": tag,
-                "score": existing.get(tag, 0.0) + weight,
-                "updated_at": "now()",
-            }
-            for tag in tags
-        ]
-        db.table("taste_profile").upsert(
-            rows, on_conflict="user_id,tag"
-        ).execute()
+        _upsert_users(backend, [e["user_id"] for e in events])
+        _timed("record_interactions", backend.record_interactions, _record_rows(events))
+        return True
+    except Exception as exc:
+        # A cached user row may have been deleted — re-upsert on the retry
+        _known_users.discard_many({e["user_id"] for e in events})
+        log.warning("write_interactions failed (%d events): %s", len(events), exc)
+        return False
+
+
+async def awrite_interactions(events: list[dict]) -> bool:
+    """Async write_interactions — same round trips, same return contract."""
+    backend = get_backend()
+    if backend is None or not events:
+        return True
+    try:
+        await _aupsert_users(backend, [e["user_id"] for e in events])
+        await _atimed("record_interactions", backend.arecord_interactions(_record_rows(events)))
+        return True
     except Exception as exc:
-        log.warning("update_taste_profile failed: %s", exc)
+        _known_users.discard_many({e["user_id"] for e in events})
+        log.warning("write_interactions failed (%d events): %r", len(events), exc)
+        return False
 
 
 def get_taste_profile(user_id: str) -> list[dict]:
     """Return list of {tag, score} sorted by score desc."""
-    db = get_client()
-    if db is None:
+    backend = get_backend()
+    if backend is None:
         return []
     try:
-        resp = (
-            db.table("taste_profile")
-            .select("tag,score")
-            .eq("user_id", user_id)
-            .order("score", desc=True)
-            .execute()
-        )
-        return resp.data or []
+        return _timed("get_taste_profile", backend.get_taste_profile, user_id)
     except Exception as exc:
         log.warning("get_taste_profile failed: %s", exc)
         return []
 
 
-def get_interaction_history(user_id: str, types: list[str] | None = None) -> list[dict]:
-    """Return list of {track_id, interaction_type} for a user."""
-    db = get_client()
-    if db is None:
+async def aget_taste_profile(user_id: str) -> list[dict]:
+    backend = get_backend()
+    if backend is None:
         return []
     try:
-        q = (
-            db.table("interactions")
-            .select("track_id,interaction_type,feature,timestamp")
-            .eq("user_id", user_id)
-            .order("timestamp", desc=True)
-        )
-        if types:
-            q = q.in_("interaction_type", types)
-        resp = q.execute()
-        return resp.data or []
+        return await _atimed("get_taste_profile", backend.aget_taste_profile(user_id))
     except Exception as exc:
-        log.warning("get_interaction_history failed: %s", exc)
+        log.warning("get_taste_profile failed: %r", exc)
         return []
+
+
+def _page_result(rows: list[dict], limit: int) -> tuple[list[dict], str | None]:
+    next_cursor = encode_cursor(rows[-1]) if rows and len(rows) == limit else None
+    return rows, next_cursor
+
+
+def _page_size(limit: int | None, have: int) -> int:
+    return HISTORY_PAGE_SIZE if limit is None else min(HISTORY_PAGE_SIZE, limit - have)
+
+
+def get_interaction_history_page(
+    user_id: str,
+    types: list[str] | None = None,
+    limit: int = HISTORY_PAGE_SIZE,
+    cursor: str | None = None,
+    since: datetime | str | None = None,
+) -> tuple[list[dict], str | None]:
+    """
+    One page of a user's interactions, newest first, keyset-paginated on
+    (timestamp, id) — served by idx_interactions_user_ts (migration 003).
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    backend = get_backend()
+    if backend is None:
+        return [], None
+    if isinstance(since, datetime):
+        since = since.isoformat()
+    try:
+        rows = _timed(
+            "get_interaction_history_page",
+            backend.get_interaction_history_page,
+            user_id,
+            types,
+            limit,
+            cursor,
+            since,
+        )
+    except Exception as exc:
+        log.warning("get_interaction_history_page failed: %s", exc)
+        return [], None
+    return _page_result(rows, limit)
+
+
+async def aget_interaction_history_page(
+    user_id: str,
+    types: list[str] | None = None,
+    limit: int = HISTORY_PAGE_SIZE,
+    cursor: str | None = None,
+    since: datetime | str | None = None,
+) -> tuple[list[dict], str | None]:
+    backend = get_backend()
+    if backend is None:
+        return [], None
+    if isinstance(since, datetime):
+        since = since.isoformat()
+    try:
+        rows = await _atimed(
+            "get_interaction_history_page",
+            backend.aget_interaction_history_page(user_id, types, limit, cursor, since),
+        )
+    except Exception as exc:
+        log.warning("get_interaction_history_page failed: %r", exc)
+        return [], None
+    return _page_result(rows, limit)
+
+
+def get_interaction_history(
+    user_id: str,
+    types: list[str] | None = None,
+    limit: int | None = None,
+    since: datetime | str | None = None,
+) -> list[dict]:
+    """
+    Return list of {track_id, interaction_type, feature, timestamp}, newest first.
+    limit keeps the last N interactions, since drops anything older; with
+    neither, the full history is fetched page by page.
+    """
+    rows: list[dict] = []
+    cursor = None
+    while True:
+        page_size = _page_size(limit, len(rows))
+        if page_size <= 0:
+            return rows
+        page, cursor = get_interaction_history_page(user_id, types, page_size, cursor, since)
+        rows.extend(page)
+        if cursor is None:
+            return rows
+
+
+async def aget_interaction_history(
+    user_id: str,
+    types: list[str] | None = None,
+    limit: int | None = None,
+    since: datetime | str | None = None,
+) -> list[dict]:
+    rows: list[dict] = []
+    cursor = None
+    while True:
+        page_size = _page_size(limit, len(rows))
+        if page_size <= 0:
+            return rows
+        page, cursor = await aget_interaction_history_page(user_id, types, page_size, cursor, since)
+        rows.extend(page)
+        if cursor is None:
+            return rows
@@ -0,0 +1,118 @@
+# src/recsys/service/executor.py
+"""
+Execution layer for CPU-bound catalog work — fuzzy search, similarity ranking,
+tag scans over meta_df.
+
+Runs on a dedicated, sized thread pool rather than the event loop (or the
+default executor shared with DB / Gemini calls). NumPy matmuls and rapidfuzz
+scorers release the GIL, so threads give real parallelism here without paying
+process-pool pickling costs for the feature matrix.
+
+Every call records how long it waited in the queue and how long it ran,
+keyed by a caller-supplied label. See stats().
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, TypeVar
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CATALOG_WORKERS = int(os.getenv("CATALOG_WORKERS", str(min(4, os.cpu_count() or 1))))
+SLOW_QUEUE_S = float(os.getenv("CATALOG_SLOW_QUEUE_S", "0.25"))
+
+_pool: ThreadPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+@dataclass
+class CallStats:
+    calls: int = 0
+    errors: int = 0
+    queue_s_total: float = 0.0
+    queue_s_max: float = 0.0
+    run_s_total: float = 0.0
+    run_s_max: float = 0.0
+
+
+_stats: dict[str, CallStats] = {}
+_stats_lock = threading.Lock()
+
+
+def get_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is not None:
+        return _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=CATALOG_WORKERS, thread_name_prefix="catalog"
+            )
+            log.info("Catalog executor started with %d workers ✓", CATALOG_WORKERS)
+    return _pool
+
+
+def _record(label: str, queue_s: float, run_s: float, failed: bool) -> None:
+    with _stats_lock:
+        s = _stats.setdefault(label, CallStats())
+        s.calls += 1
+        s.errors += int(failed)
+        s.queue_s_total += queue_s
+        s.queue_s_max = max(s.queue_s_max, queue_s)
+        s.run_s_total += run_s
+        s.run_s_max = max(s.run_s_max, run_s)
+    if queue_s >= SLOW_QUEUE_S:
+        log.warning("Catalog call '%s' queued for %.3fs (pool saturated?)", label, queue_s)
+
+
+async def run_cpu(label: str, fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+    """
+    Run fn(*args, **kwargs) on the catalog pool and await the result.
+    label groups the call in stats() — use '<module>.<operation>'.
+    """
+    loop = asyncio.get_running_loop()
+    submitted = time.perf_counter()
+
+    def _call() -> T:
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = fn(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            _record(label, started - submitted, time.perf_counter() - started, failed)
+
+    return await loop.run_in_executor(get_pool(), _call)
+
+
+def stats() -> dict[str, dict]:
+    """Per-label call counts plus mean/max queue and run times (seconds)."""
+    with _stats_lock:
+        snapshot = {label: asdict(s) for label, s in _stats.items()}
+    for s in snapshot.values():
+        n = s["calls"] or 1
+        s["queue_s_mean"] = s["queue_s_total"] / n
+        s["run_s_mean"] = s["run_s_total"] / n
+    return snapshot
+
+
+def reset_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
+
+
+def shutdown(wait: bool = True) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=wait)
+            _pool = None
@@ -7,29 +7,17 @@ from __future__ import annotations
 
 import logging
 import math
+import os
 from collections import Counter
 
-import numpy as np
-
 log = logging.getLogger(__name__)
 
 MIN_INTERACTIONS = 5  # require at least this many to compute a meaningful score
 NUM_DOMINANT = 5
 NUM_SECONDARY = 8
 NUM_ESCAPE = 15
-
-
-def _get_tags_for_track(idx: int, recommender) -> list[str]:
-    meta_df = recommender.meta_df
-    if meta_df is None:
-        return []
-    meta = meta_df.iloc[idx]
-    raw = meta.get("tags") if hasattr(meta, "get") else None
-    if raw is None:
-        return []
-    if hasattr(raw, "tolist"):
-        raw = raw.tolist()
-    return [str(t).lower() for t in raw if t]
+# Hydrate taste state from the user's last N heart/complete interactions
+CAPTURE_HISTORY_WINDOW = int(os.getenv("CAPTURE_HISTORY_WINDOW", "1000"))
 
 
 def _shannon_entropy(counts: Counter) -> float:
@@ -41,46 +29,48 @@ def _shannon_entropy(counts: Counter) -> float:
 
 async def run(user_id: str, recommender) -> dict:
     """
-    1. Pull interaction history from Supabase
-    2. Aggregate tags from hearted/completed tracks
-    3. Compute capture score (1 - normalized entropy)
-    4. Find escape tracks (outside dominant tags, within secondary overlap)
-    5. Return score + breakdown + escape tracks
+    1. Load the user's taste state (hydrated once from a recency-weighted
+       window of Supabase history, then kept current by the interaction
+       queue — see taste_state.py)
+    2. Compute capture score (1 - normalized entropy) from the tag weights
+    3. Find escape tracks (outside dominant tags, within secondary overlap)
+    4. Return score + breakdown + escape tracks
     """
-    from src.recsys.service import db, preview_resolver
-    import asyncio
-
-    # ── Interaction history ────────────────────────────────────────────────────
-    history = await asyncio.to_thread(
-        db.get_interaction_history, user_id, ["heart", "complete"]
-    )
+    from src.recsys.service import db, executor, preview_resolver, taste_state
 
-    if len(history) < MIN_INTERACTIONS:
+    # ── Taste state ────────────────────────────────────────────────────────────
+    state = taste_state.store.get(user_id, recommender)
+    if state is None:
+        # Events the queue applies from here on are buffered for hydrate()
+        pending = taste_state.store.begin_hydrate(user_id)
+        try:
+            history = await db.aget_interaction_history(
+                user_id,
+                ["heart", "complete"],
+                limit=CAPTURE_HISTORY_WINDOW,
+            )
+            state = await executor.run_cpu(
+                "algorithmic_capture.hydrate_state",
+                taste_state.store.hydrate,
+                user_id,
+                history,
+                recommender,
+                pending,
+            )
+        finally:
+            taste_state.store.end_hydrate(user_id, pending)
+
+    if state.n_interactions < MIN_INTERACTIONS:
         return {
             "capture_score": None,
             "dominant_tags": [],
             "underexplored_tags": [],
             "escape_tracks": [],
             "insufficient_data": True,
-            "interactions_needed": MIN_INTERACTIONS - len(history),
+            "interactions_needed": MIN_INTERACTIONS - state.n_interactions,
         }
 
-    # ── Tag aggregation ────────────────────────────────────────────────────────
-    tag_counter: Counter = Counter()
-    track_indices: list[int] = []
-    weight_map = {"heart": 1.0, "complete": 0.5}
-
-    for interaction in history:
-        try:
-            idx = int(interaction["track_id"])
-        except (ValueError, TypeError):
-            continue
-        track_indices.append(idx)
-        tags = _get_tags_for_track(idx, recommender)
-        w = weight_map.get(interaction["interaction_type"], 0.5)
-        for tag in tags:
-            tag_counter[tag] += w
-
+    tag_counter = state.tag_scores()
     if not tag_counter:
         return {
             "capture_score": None,
@@ -107,10 +97,12 @@ async def run(user_id: str, recommender) -> dict:
     underexplored = [t for t in all_tags if t not in set(dominant_tags)][:10]
 
     # ── User taste vector (centroid of hearted track embeddings) ───────────────
-    user_vector = recommender.get_user_taste_vector(track_indices)
+    user_vector = state.taste_vector()
 
     # ── Escape tracks ──────────────────────────────────────────────────────────
-    escape_candidates = recommender.escape_route_tracks(
+    escape_candidates = await executor.run_cpu(
+        "algorithmic_capture.escape_route_tracks",
+        recommender.escape_route_tracks,
         dominant_tags=dominant_tags,
         secondary_tags=secondary_tags,
         user_vector=user_vector,
@@ -129,5 +121,5 @@ async def run(user_id: str, recommender) -> dict:
         ],
         "escape_tracks": escape_tracks,
         "insufficient_data": False,
-        "total_interactions": len(history),
+        "total_interactions": state.n_interactions,
     }
@@ -3,17 +3,28 @@
 Feature 2 — Blind Taste Test
 10 tracks returned with preview URLs but NO metadata.
 After completion, /reveal returns full metadata + tags.
+
+Which rows have a playable preview is worked out once per loaded recommender
+(PreviewPool, built by container.build_catalog as part of loading an artifact
+version), so a session is an O(k) sample rather than a scan of the catalog.
+Catalog preview URLs don't change in place — new ones arrive as a new
+version, whose recommender gets its own pool.
 """
 from __future__ import annotations
 
-import random
 import logging
-from typing import Any
+import threading
+import weakref
+from dataclasses import dataclass
+
+import numpy as np
 
 log = logging.getLogger(__name__)
 
 NUM_TRACKS = 10
 
+_rng = np.random.default_rng()
+
 
 def _is_playable(url) -> bool:
     """
@@ -30,46 +41,115 @@ def _is_playable(url) -> bool:
     return True
 
 
-def get_session(recommender) -> dict:
+@dataclass(frozen=True)
+class PreviewPool:
+    playable: np.ndarray          # row indices with a playable preview URL
+    other: np.ndarray             # the rest — only used to pad tiny catalogs
+    preview_urls: list[str | None]
+
+
+_pools: "weakref.WeakKeyDictionary[object, PreviewPool]" = weakref.WeakKeyDictionary()
+_pools_lock = threading.Lock()
+
+
+def _build_pool(recommender) -> PreviewPool:
+    meta_df = recommender.meta_df
+    id_urls = [row.get("preview_url") for row in recommender.id_map]
+    if meta_df is not None:
+        # meta_df wins where it has a URL, as in reveal()
+        urls = [
+            m if isinstance(m, str) and m else r
+            for m, r in zip(meta_df["preview_url"].tolist(), id_urls)
+        ]
+    else:
+        urls = id_urls
+    mask = np.fromiter((_is_playable(u) for u in urls), dtype=bool, count=len(urls))
+    return PreviewPool(
+        playable=np.flatnonzero(mask),
+        other=np.flatnonzero(~mask),
+        preview_urls=urls,
+    )
+
+
+def preview_pool(recommender) -> PreviewPool:
+    """The recommender's PreviewPool, built on first use (normally at catalog load)."""
+    with _pools_lock:
+        pool = _pools.get(recommender)
+        if pool is None:
+            pool = _pools[recommender] = _build_pool(recommender)
+            log.info(
+                "Blind taste test pool: %d playable / %d tracks",
+                len(pool.playable),
+                len(pool.preview_urls),
+            )
+        return pool
+
+
+def get_session(recommender, rng: np.random.Generator | None = None) -> dict:
     """
-    Select NUM_TRACKS tracks biased toward those with confirmed, playable preview URLs.
+    Select NUM_TRACKS tracks with confirmed, playable preview URLs, padded with
+    arbitrary tracks only if the catalog doesn't have enough.
     Returns stripped payload (no name/artist/tags) — metadata added at reveal time.
     """
-    meta_df = recommender.meta_df
+    pool = preview_pool(recommender)
+    rng = rng or _rng
 
-    if meta_df is not None:
-        has_preview = meta_df["preview_url"].apply(_is_playable)
-        preview_indices = list(meta_df.index[has_preview])
+    if len(pool.playable) >= NUM_TRACKS:
+        selected = rng.choice(pool.playable, NUM_TRACKS, replace=False)
     else:
-        # Fall back to id_map
-        preview_indices = [
-            i for i, row in enumerate(recommender.id_map) if _is_playable(row.get("preview_url"))
-        ]
+        pad = min(NUM_TRACKS - len(pool.playable), len(pool.other))
+        selected = np.concatenate([pool.playable, rng.choice(pool.other, pad, replace=False)])
+        rng.shuffle(selected)
 
-    if len(preview_indices) < NUM_TRACKS:
-        # Pad with any tracks
-        all_indices = list(range(len(recommender.id_map)))
-        extra = [i for i in all_indices if i not in set(preview_indices)]
-        random.shuffle(extra)
-        preview_indices = preview_indices + extra
+    tracks = [
+        {
+            "row_index": int(idx),
+            "preview_url": pool.preview_urls[idx],
+            # Deliberately omit: name, artist, tags, artwork_url
+        }
+        for idx in selected
+    ]
+    return {"tracks": tracks}
 
-    selected = random.sample(preview_indices, min(NUM_TRACKS, len(preview_indices)))
 
-    tracks = []
-    for idx in selected:
+async def build_session(recommender) -> dict:
+    """
+    A ready-to-serve session: sampled, previews resolved through Deezer/YouTube
+    (the resolver needs name/artist), then stripped back to blind fields.
+    """
+    from src.recsys.service import executor, preview_resolver
+
+    session = await executor.run_cpu("blind_taste_test.get_session", get_session, recommender)
+
+    meta_df = recommender.meta_df
+    resolve_input = []
+    for t in session["tracks"]:
+        idx = t["row_index"]
         row = recommender.id_map[idx]
         meta = meta_df.iloc[idx] if meta_df is not None else None
-        preview = (
-            (meta.get("preview_url") if hasattr(meta, "get") else None)
-            or row.get("preview_url")
-        )
-        tracks.append({
-            "row_index": int(idx),
-            "preview_url": preview,
-            # Deliberately omit: name, artist, tags, artwork_url
+        name = (meta.get("title") if hasattr(meta, "get") else None) or row.get("title", "")
+        artist = (meta.get("artist") if hasattr(meta, "get") else None) or row.get("artist", "")
+        resolve_input.append({
+            "row_index": idx,
+            "name": name,
+            "artist": artist,
+            "preview_url": t.get("preview_url"),
+            "artwork_url": None,
         })
 
-    return {"tracks": tracks}
+    enriched = await preview_resolver.resolve_batch(resolve_input)
+
+    # Return only blind fields — name, artist, tags, artwork intentionally omitted
+    return {
+        "tracks": [
+            {
+                "row_index": t["row_index"],
+                "preview_url": t.get("preview_url"),
+                "youtube_id": t.get("youtube_id"),
+            }
+            for t in enriched
+        ]
+    }
 
 
 def reveal(track_indices: list[int], recommender) -> dict:
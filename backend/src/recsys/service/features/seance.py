@@ -3,18 +3,29 @@
 Feature 5 — The Séance
 Pick a deceased artist → DSCVR finds their living spiritual successors.
 Uses Last.fm for similar artists + Gemini to filter living artists + reason connections.
+
+run() is a small DAG rather than a straight line:
+
+    lastfm ──┬─> living_filter ──┐
+             └─> candidates ─────┴─> reasoning ─> previews
+    seed ────────┘
+
+The original artist's seed centroid is computed alongside the Last.fm call,
+and candidates for *every* similar artist are ranked while Gemini decides
+which of them are living — the living set is then just a filter. Each
+stage's start/end offsets are logged once per request.
 """
 from __future__ import annotations
 
 import asyncio
 import logging
 import os
-
-import requests
+import time
 
 log = logging.getLogger(__name__)
 
-LASTFM_URL = "https://ws.audioscrobbler.com/2.0/"
+# Whether an artist is alive barely changes — cache the living filter for long
+LIVING_FILTER_TTL_S = float(os.getenv("SEANCE_LIVING_TTL_S", str(30 * 24 * 3600)))
 
 _LIVING_FILTER_PROMPT = """\
 I have a list of music artists. Some of them are deceased.
@@ -54,59 +65,73 @@ Return ONLY valid JSON in exactly this structure (no markdown fences):
 """
 
 
-def _lastfm_similar_artists(artist: str) -> list[str]:
-    key = os.environ.get("LASTFM_API_KEY", "")
-    if not key:
-        return []
-    try:
-        resp = requests.get(
-            LASTFM_URL,
-            params={
-                "method": "artist.getsimilar",
-                "artist": artist,
-                "api_key": key,
-                "format": "json",
-                "limit": 30,
-            },
-            timeout=8,
-        )
-        data = resp.json()
-        similar = data.get("similarartists", {}).get("artist", [])
-        return [a["name"] for a in similar]
-    except Exception as exc:
-        log.warning("Last.fm similar artists failed for '%s': %s", artist, exc)
-        return []
+async def _lastfm_similar_artists(artist: str, art_dir=None) -> list[str]:
+    from src.recsys.service import lastfm_client
 
+    return await lastfm_client.similar_artists(artist, art_dir=art_dir)
 
-async def run(artist: str, recommender) -> dict:
+
+def _seed_vector(artist: str, recommender):
+    """Centroid of the original artist's top tracks (None if not in catalog)."""
+    original_tracks = recommender.tracks_by_artist(artist, top_k=10)
+    original_indices = [t["row_index"] for t in original_tracks]
+    return recommender.get_user_taste_vector(original_indices)
+
+
+def _ranked_candidates(seed_vector, artists: list[str], recommender) -> list[dict]:
     """
-    1. Get Last.fm similar artists
-    2. Ask Gemini which are living
-    3. Find their tracks in catalog via cosine similarity to original artist
-    4. Ask Gemini to select 10-15 + write connection sentences
-    5. Resolve previews
+    Catalog tracks by `artists`, ranked by cosine similarity to seed_vector
+    (catalog order if there is no seed).
     """
-    from src.recsys.service import gemini_client, preview_resolver
-    import json
+    candidates = [
+        recommender._row_to_dict(j, 0.0, include_tags=False)
+        for j in recommender.rows_for_artists(artists)
+    ]
 
-    # Step 1: Last.fm similar artists (sync → thread)
-    similar_artists = await asyncio.to_thread(_lastfm_similar_artists, artist)
+    if seed_vector is not None and candidates:
+        from sklearn.metrics.pairwise import cosine_similarity
+        idxs = [c["row_index"] for c in candidates]
+        vecs = recommender.X[idxs]
+        sims = cosine_similarity(seed_vector.reshape(1, -1), vecs)[0]
+        for c, s in zip(candidates, sims):
+            c["score"] = float(s)
+        candidates.sort(key=lambda x: -x["score"])
 
-    if not similar_artists:
-        return {
-            "original_artist": artist,
-            "tracks": [],
-            "summary": f"Could not find similar artists for {artist} via Last.fm.",
-        }
+    return candidates
+
+
+class _Timeline:
+    """Start/end offsets of each stage of one request, for the log."""
+
+    def __init__(self) -> None:
+        self.t0 = time.perf_counter()
+        self.spans: dict[str, tuple[float, float]] = {}
+
+    async def stage(self, name: str, awaitable):
+        start = time.perf_counter() - self.t0
+        try:
+            return await awaitable
+        finally:
+            self.spans[name] = (start, time.perf_counter() - self.t0)
+
+    def format(self) -> str:
+        parts = [
+            f"{name}={end - start:.3f}s@{start:.3f}"
+            for name, (start, end) in sorted(self.spans.items(), key=lambda kv: kv[1][0])
+        ]
+        return f"total={time.perf_counter() - self.t0:.3f}s " + " ".join(parts)
+
+
+async def _living_filter(artist: str, similar_artists: list[str]) -> list[str]:
+    from src.recsys.service import gemini_client
 
-    # Step 2: Gemini filters for living artists
     living_prompt = _LIVING_FILTER_PROMPT.format(
         original_artist=artist,
         artist_list="\n".join(f"- {a}" for a in similar_artists),
     )
     try:
-        living_artists: list[str] = await asyncio.to_thread(
-            gemini_client.generate_json, living_prompt
+        living_artists = await gemini_client.agenerate_json(
+            living_prompt, kind="seance.living", ttl_s=LIVING_FILTER_TTL_S
         )
         if not isinstance(living_artists, list):
             living_artists = similar_artists  # fallback: use all
@@ -116,32 +141,70 @@ async def run(artist: str, recommender) -> dict:
 
     if not living_artists:
         living_artists = similar_artists[:15]
+    return living_artists
 
-    # Step 3: Find tracks in catalog from living similar artists
-    # Get original artist's tracks and compute centroid
-    original_tracks = recommender.tracks_by_artist(artist, top_k=10)
-    original_indices = [t["row_index"] for t in original_tracks]
-    seed_vector = recommender.get_user_taste_vector(original_indices)
 
-    # Collect catalog tracks from living similar artists
-    living_set = {a.lower() for a in living_artists}
-    candidates = []
-    for j, row in enumerate(recommender.id_map):
-        if row["artist"].lower() in living_set:
-            candidates.append(recommender._row_to_dict(j, 0.0, include_tags=False))
+async def run(artist: str, recommender) -> dict:
+    """
+    1. Get Last.fm similar artists            ┐ concurrently
+       + original artist's seed centroid      ┘
+    2. Ask Gemini which are living            ┐ concurrently
+       + rank all similar artists' tracks     ┘
+    3. Keep living artists' tracks (top 40)
+    4. Ask Gemini to select 10-15 + write connection sentences
+    5. Resolve previews
+    """
+    timeline = _Timeline()
+    pending: list[asyncio.Task] = []
+    try:
+        return await _run(artist, recommender, timeline, pending)
+    finally:
+        for task in pending:
+            task.cancel()
+        log.info("seance %r stages: %s", artist, timeline.format())
 
-    # Rank by cosine sim to original artist centroid
-    if seed_vector is not None and candidates:
-        from sklearn.metrics.pairwise import cosine_similarity
-        import numpy as np
-        idxs = [c["row_index"] for c in candidates]
-        vecs = recommender.X[idxs]
-        sims = cosine_similarity(seed_vector.reshape(1, -1), vecs)[0]
-        for c, s in zip(candidates, sims):
-            c["score"] = float(s)
-        candidates.sort(key=lambda x: -x["score"])
 
-    candidates = candidates[:40]
+async def _run(artist: str, recommender, timeline: _Timeline, pending: list[asyncio.Task]) -> dict:
+    from src.recsys.service import executor, gemini_client, preview_resolver
+    import json
+
+    def spawn(name: str, awaitable) -> asyncio.Task:
+        task = asyncio.create_task(timeline.stage(name, awaitable))
+        pending.append(task)
+        return task
+
+    # Step 1: similar artists (precomputed graph / cache / Last.fm) alongside the seed centroid
+    similar_task = spawn("lastfm", _lastfm_similar_artists(artist, recommender.art_dir))
+    seed_task = spawn(
+        "seed", executor.run_cpu("seance.seed_vector", _seed_vector, artist, recommender)
+    )
+    similar_artists = await similar_task
+
+    if not similar_artists:
+        return {
+            "original_artist": artist,
+            "tracks": [],
+            "summary": f"Could not find similar artists for {artist} via Last.fm.",
+        }
+
+    # Step 2: Gemini filters for living artists while every similar artist's
+    # catalog tracks are ranked against the seed
+    async def rank_all() -> list[dict]:
+        return await executor.run_cpu(
+            "seance.catalog_candidates",
+            _ranked_candidates,
+            await seed_task,
+            similar_artists,
+            recommender,
+        )
+
+    living_task = spawn("living_filter", _living_filter(artist, similar_artists))
+    ranked_task = spawn("candidates", rank_all())
+    living_artists, ranked = await asyncio.gather(living_task, ranked_task)
+
+    # Step 3: Keep tracks by living artists
+    living_set = {a.lower() for a in living_artists}
+    candidates = [c for c in ranked if c["artist"].lower() in living_set][:40]
 
     if not candidates:
         return {
@@ -162,8 +225,9 @@ async def run(artist: str, recommender) -> dict:
         candidates_json=candidates_json,
     )
     try:
-        gemini_result = await asyncio.to_thread(
-            gemini_client.generate_json, reasoning_prompt
+        gemini_result = await timeline.stage(
+            "reasoning",
+            gemini_client.agenerate_json(reasoning_prompt, kind="seance.reasoning"),
         )
     except Exception as exc:
         log.error("Gemini reasoning failed in seance: %s", exc)
@@ -195,7 +259,7 @@ async def run(artist: str, recommender) -> dict:
             "artwork_url": base.get("artwork_url"),
         })
 
-    enriched = await preview_resolver.resolve_batch(tracks_out)
+    enriched = await timeline.stage("previews", preview_resolver.resolve_batch(tracks_out))
 
     return {
         "original_artist": artist,
@@ -2,10 +2,15 @@
 """
 Feature 1 — Soundtrack Your Life
 User describes a moment/feeling → cosine candidates → Gemini selects + reasons → previews resolved.
+
+stream() is the incremental variant behind /soundtrack/stream: candidates go
+out first, then each selected track as soon as Gemini has emitted it and its
+preview has resolved, then the summary.
 """
 from __future__ import annotations
 
 import asyncio
+import json
 import logging
 
 log = logging.getLogger(__name__)
@@ -36,6 +41,56 @@ Return ONLY valid JSON in exactly this structure (no prose, no markdown fences):
 """
 
 
+async def _candidates(description: str, recommender) -> list[dict]:
+    from src.recsys.service import executor
+
+    return await executor.run_cpu(
+        "soundtrack.similar_by_text",
+        recommender.similar_by_text,
+        description,
+        top_k=35,
+        max_per_artist=3,
+        include_tags=False,
+    )
+
+
+def _build_prompt(description: str, candidates: list[dict]) -> str:
+    candidates_json = json.dumps(
+        [
+            {"row_index": c["row_index"], "track_name": c["name"], "artist": c["artist"]}
+            for c in candidates
+        ],
+        indent=2,
+    )
+    return _PROMPT_TEMPLATE.format(
+        description=description,
+        n=len(candidates),
+        candidates_json=candidates_json,
+    )
+
+
+def _fallback_picks(candidates: list[dict]) -> list[dict]:
+    """Top-10 candidates without reasoning, used when Gemini fails."""
+    return [
+        {"row_index": c["row_index"], "track_name": c["name"], "artist": c["artist"], "reasoning": ""}
+        for c in candidates[:10]
+    ]
+
+
+def _merge_pick(t: dict, idx_to_candidate: dict[int, dict]) -> dict:
+    """Gemini's pick + catalog data for the same row."""
+    row_idx = t.get("row_index")
+    base = idx_to_candidate.get(row_idx, {})
+    return {
+        "row_index": row_idx,
+        "name": t.get("track_name") or base.get("name", ""),
+        "artist": t.get("artist") or base.get("artist", ""),
+        "reasoning": t.get("reasoning", ""),
+        "preview_url": base.get("preview_url"),
+        "artwork_url": base.get("artwork_url"),
+    }
+
+
 async def run(
     description: str,
     recommender,
@@ -48,63 +103,105 @@ async def run(
     4. Return full payload
     """
     from src.recsys.service import gemini_client, preview_resolver
-    import json
 
     # Step 1: cosine candidates
-    candidates = recommender.similar_by_text(
-        description, top_k=35, max_per_artist=3, include_tags=False
-    )
+    candidates = await _candidates(description, recommender)
     if not candidates:
         return {"tracks": [], "summary": "No matching tracks found for that description."}
 
-    candidates_json = json.dumps(
-        [
-            {"row_index": c["row_index"], "track_name": c["name"], "artist": c["artist"]}
-            for c in candidates
-        ],
-        indent=2,
-    )
-
-    prompt = _PROMPT_TEMPLATE.format(
-        description=description,
-        n=len(candidates),
-        candidates_json=candidates_json,
-    )
+    prompt = _build_prompt(description, candidates)
 
-    # Step 2: Gemini call (sync → thread)
+    # Step 2: Gemini call
     try:
-        gemini_result = await asyncio.to_thread(gemini_client.generate_json, prompt)
+        gemini_result = await gemini_client.agenerate_json(prompt, kind="soundtrack")
     except Exception as exc:
         log.error("Gemini call failed in soundtrack: %s", exc)
         # Graceful fallback: return top-10 candidates without reasoning
-        gemini_result = {
-            "tracks": [
-                {"row_index": c["row_index"], "track_name": c["name"], "artist": c["artist"], "reasoning": ""}
-                for c in candidates[:10]
-            ],
-            "summary": "",
-        }
-
-    # Build index lookup for enrichment
-    idx_to_candidate = {c["row_index"]: c for c in candidates}
+        gemini_result = {"tracks": _fallback_picks(candidates), "summary": ""}
 
     # Step 3: Merge catalog data + resolve previews
-    tracks_out = []
-    for t in gemini_result.get("tracks", []):
-        row_idx = t.get("row_index")
-        base = idx_to_candidate.get(row_idx, {})
-        tracks_out.append({
-            "row_index": row_idx,
-            "name": t.get("track_name") or base.get("name", ""),
-            "artist": t.get("artist") or base.get("artist", ""),
-            "reasoning": t.get("reasoning", ""),
-            "preview_url": base.get("preview_url"),
-            "artwork_url": base.get("artwork_url"),
-        })
-
+    idx_to_candidate = {c["row_index"]: c for c in candidates}
+    tracks_out = [_merge_pick(t, idx_to_candidate) for t in gemini_result.get("tracks", [])]
     enriched = await preview_resolver.resolve_batch(tracks_out)
 
     return {
         "tracks": enriched,
         "summary": gemini_result.get("summary", ""),
     }
+
+
+async def stream(
+    description: str,
+    recommender,
+    user_id: str | None = None,
+):
+    """
+    Async iterator of events for /soundtrack/stream:
+      {"event": "candidates", "tracks": [...]}       cosine candidates, immediately
+      {"event": "track", "rank": i, "track": {...}}   each pick, preview resolved;
+                                                      rank is Gemini's order, arrival
+                                                      order is resolution order
+      {"event": "summary", "summary": "..."}          last event
+    Falls back to the top-10 candidates if Gemini fails before picking anything.
+    """
+    from src.recsys.service import gemini_client, preview_resolver
+
+    candidates = await _candidates(description, recommender)
+    if not candidates:
+        yield {"event": "summary", "summary": "No matching tracks found for that description."}
+        return
+
+    yield {
+        "event": "candidates",
+        "tracks": [
+            {
+                "row_index": c["row_index"],
+                "name": c["name"],
+                "artist": c["artist"],
+                "preview_url": c.get("preview_url"),
+                "artwork_url": c.get("artwork_url"),
+            }
+            for c in candidates
+        ],
+    }
+
+    prompt = _build_prompt(description, candidates)
+    idx_to_candidate = {c["row_index"]: c for c in candidates}
+    events: asyncio.Queue = asyncio.Queue()
+
+    async def resolve(rank: int, pick: dict) -> None:
+        [track] = await preview_resolver.resolve_batch([_merge_pick(pick, idx_to_candidate)])
+        await events.put({"event": "track", "rank": rank, "track": track})
+
+    async def produce() -> None:
+        resolving: list[asyncio.Task] = []
+        summary = ""
+        try:
+            parser = gemini_client.JsonArrayStream("tracks")
+            try:
+                async for chunk in gemini_client.astream_json(prompt, kind="soundtrack.stream"):
+                    for pick in parser.feed(chunk):
+                        if isinstance(pick, dict):
+                            resolving.append(asyncio.create_task(resolve(len(resolving), pick)))
+                summary = parser.result().get("summary", "")
+            except Exception as exc:
+                log.error("Gemini stream failed in soundtrack: %s", exc)
+                if not resolving:
+                    resolving = [
+                        asyncio.create_task(resolve(i, pick))
+                        for i, pick in enumerate(_fallback_picks(candidates))
+                    ]
+            await asyncio.gather(*resolving, return_exceptions=True)
+            await events.put({"event": "summary", "summary": summary})
+        finally:
+            for task in resolving:
+                task.cancel()
+            events.put_nowait(None)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while (event := await events.get()) is not None:
+            yield event
+    finally:
+        # Client went away mid-stream → stop Gemini and pending preview lookups
+        producer.cancel()
@@ -34,15 +34,18 @@ async def run(
     3. Resolve previews
     4. Return tracks + era summary
     """
-    from src.recsys.service import preview_resolver
+    from src.recsys.service import executor, preview_resolver
 
     era_tags = ERA_TAG_MAP.get(era, ERA_TAG_MAP["80s"])
 
     # Resolve seed track
     seed_idx = None
     try:
-        best_idx, best_score, _ = search_index.match(
-            f"{seed_track} {seed_artist}", limit=1
+        best_idx, best_score, _ = await executor.run_cpu(
+            "time_machine.match",
+            search_index.match,
+            f"{seed_track} {seed_artist}",
+            limit=1,
         )
         if best_idx is not None and best_score >= 70:
             seed_idx = best_idx
@@ -57,8 +60,13 @@ async def run(
         }
 
     # Era-filtered cosine similarity
-    candidates = recommender.similar_by_index_era(
-        seed_idx, era_tags=era_tags, top_k=15, max_per_artist=2
+    candidates = await executor.run_cpu(
+        "time_machine.similar_by_index_era",
+        recommender.similar_by_index_era,
+        seed_idx,
+        era_tags=era_tags,
+        top_k=15,
+        max_per_artist=2,
     )
 
     if not candidates:
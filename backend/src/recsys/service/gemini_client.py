@@ -2,16 +2,59 @@
 """
 Thin wrapper around google-generativeai for structured JSON generation.
 Gemini sometimes wraps output in markdown code fences — we strip those before parsing.
+
+Parsed responses are cached by sha256(model name + prompt) in two tiers:
+an in-process LRU (GEMINI_CACHE_MAX entries) in front of a SQLite file
+(GEMINI_CACHE_PATH, shared by workers and kept across restarts). Entries
+expire after the TTL given per call (default GEMINI_CACHE_TTL_S; 0 = don't
+cache). Only successfully parsed JSON is cached.
+
+agenerate_json() makes the model's native async call, bounded by a
+per-call deadline (GEMINI_DEADLINE_S) and up to GEMINI_ATTEMPTS tries with
+exponential backoff — unparseable JSON counts as a failed try. With
+hedging on, a duplicate request fires once the first has outlived the p95
+latency for that prompt kind, and whichever parses first wins. Per-kind
+latency histograms (every attempt, including timed-out and failed ones)
+are exposed via latency_stats().
+
+astream_json() yields the raw response text as Gemini produces it;
+JsonArrayStream picks complete items out of a top-level array field
+(e.g. "tracks") as soon as each one closes, so callers can act on the
+first item long before the full response has arrived.
 """
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
 import logging
 import os
 import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+
+from src.recsys.config import DATA
 
 log = logging.getLogger(__name__)
 
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+GEMINI_CACHE_TTL_S = float(os.getenv("GEMINI_CACHE_TTL_S", str(24 * 3600)))
+GEMINI_CACHE_MAX = int(os.getenv("GEMINI_CACHE_MAX", "512"))
+# Empty string disables the disk tier
+GEMINI_CACHE_PATH = os.getenv("GEMINI_CACHE_PATH", str(DATA / "cache" / "gemini.sqlite"))
+GEMINI_DEADLINE_S = float(os.getenv("GEMINI_DEADLINE_S", "20"))
+GEMINI_ATTEMPTS = int(os.getenv("GEMINI_ATTEMPTS", "3"))
+GEMINI_BACKOFF_S = float(os.getenv("GEMINI_BACKOFF_S", "0.25"))
+# Hedged requests double spend on slow calls, so they're opt-in
+GEMINI_HEDGE = os.getenv("GEMINI_HEDGE", "0") == "1"
+GEMINI_HEDGE_MIN_S = float(os.getenv("GEMINI_HEDGE_MIN_S", "0.5"))
+GEMINI_HEDGE_MIN_SAMPLES = int(os.getenv("GEMINI_HEDGE_MIN_SAMPLES", "20"))
+
+LATENCY_BUCKETS_S = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0)
+
 _model = None
 
 
@@ -22,7 +65,7 @@ def _get_model():
     try:
         import google.generativeai as genai
         genai.configure(api_key=os.environ["GEMINI_API_KEY"])
-        _model = genai.GenerativeModel("gemini-1.5-flash")
+        _model = genai.GenerativeModel(GEMINI_MODEL)
         log.info("Gemini model initialised ✓")
     except Exception as exc:
         log.error("Failed to initialise Gemini model: %s", exc)
@@ -38,17 +81,444 @@ def _strip_fences(text: str) -> str:
     return text.strip()
 
 
-def generate_json(prompt: str) -> dict | list:
+# ─── Response cache ───────────────────────────────────────────────────────────
+
+def prompt_key(prompt: str, model: str = GEMINI_MODEL) -> str:
+    return hashlib.sha256(f"{model}\0{prompt}".encode()).hexdigest()
+
+
+class PromptCache:
     """
-    Synchronous call to Gemini — returns parsed JSON.
-    Call via asyncio.to_thread() from async endpoints.
+    LRU in memory, optional SQLite tier on disk. Thread-safe; values are JSON-able.
+    Both tiers hold the serialized JSON, so every hit decodes a fresh copy and
+    a caller mutating its result can't corrupt the cached entry.
     """
-    model = _get_model()
-    response = model.generate_content(prompt)
-    raw = response.text
+
+    def __init__(self, max_size: int = GEMINI_CACHE_MAX, path: str | Path | None = GEMINI_CACHE_PATH) -> None:
+        self.max_size = max_size
+        self.path = Path(path) if path else None
+        self._mem: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        self._db_failed = False
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+
+    def _conn(self) -> sqlite3.Connection | None:
+        # Opened on first use so importing this module never touches the disk
+        if self._db is None and self.path is not None and not self._db_failed:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS gemini_cache ("
+                    " key TEXT PRIMARY KEY, model TEXT, value TEXT NOT NULL,"
+                    " expires_at REAL NOT NULL, created_at REAL NOT NULL)"
+                )
+            except sqlite3.Error as exc:
+                log.warning("Gemini disk cache unavailable (%s): %s", self.path, exc)
+                self._db, self._db_failed = None, True
+        return self._db
+
+    def _remember(self, key: str, expires_at: float, text: str) -> None:
+        self._mem[key] = (expires_at, text)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_size:
+            self._mem.popitem(last=False)
+
+    def get(self, key: str):
+        """Cached value or None."""
+        now = time.time()
+        with self._lock:
+            hit = self._mem.get(key)
+            if hit is not None:
+                if hit[0] > now:
+                    self._mem.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return json.loads(hit[1])
+                del self._mem[key]
+            db = self._conn()
+            if db is not None:
+                try:
+                    row = db.execute(
+                        "SELECT value, expires_at FROM gemini_cache WHERE key = ? AND expires_at > ?",
+                        (key, now),
+                    ).fetchone()
+                except sqlite3.Error as exc:
+                    log.warning("Gemini disk cache read failed: %s", exc)
+                    row = None
+                if row is not None:
+                    self._remember(key, row[1], row[0])
+                    self.stats["disk_hits"] += 1
+                    return json.loads(row[0])
+            self.stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value, ttl_s: float, model: str = GEMINI_MODEL) -> None:
+        now = time.time()
+        text = json.dumps(value)
+        with self._lock:
+            self._remember(key, now + ttl_s, text)
+            self.stats["stores"] += 1
+            db = self._conn()
+            if db is not None:
+                try:
+                    db.execute(
+                        "INSERT OR REPLACE INTO gemini_cache VALUES (?, ?, ?, ?, ?)",
+                        (key, model, text, now + ttl_s, now),
+                    )
+                except sqlite3.Error as exc:
+                    log.warning("Gemini disk cache write failed: %s", exc)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            db = self._conn()
+            if db is not None:
+                db.execute("DELETE FROM gemini_cache")
+
+
+_cache = PromptCache()
+
+
+def cache_stats() -> dict:
+    return {**_cache.stats, "memory_entries": len(_cache._mem)}
+
+
+# ─── Latency ──────────────────────────────────────────────────────────────────
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of model-call latency plus a recent window for quantiles."""
+
+    def __init__(self, window: int = 256) -> None:
+        self.buckets = [0] * (len(LATENCY_BUCKETS_S) + 1)
+        self.recent: deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.total_s = 0.0
+        self.outcomes = {"retries": 0, "timeouts": 0, "parse_errors": 0, "errors": 0, "hedged": 0, "hedge_wins": 0}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            i = next((i for i, edge in enumerate(LATENCY_BUCKETS_S) if seconds <= edge), len(LATENCY_BUCKETS_S))
+            self.buckets[i] += 1
+            self.recent.append(seconds)
+            self.count += 1
+            self.total_s += seconds
+
+    def bump(self, outcome: str) -> None:
+        with self._lock:
+            self.outcomes[outcome] += 1
+
+    def quantile(self, q: float) -> float | None:
+        with self._lock:
+            window = sorted(self.recent)
+        if not window:
+            return None
+        return window[min(len(window) - 1, int(q * len(window)))]
+
+    def hedge_delay(self) -> float | None:
+        """p95 of recent calls, or None until there are enough samples to trust it."""
+        if len(self.recent) < GEMINI_HEDGE_MIN_SAMPLES:
+            return None
+        return max(GEMINI_HEDGE_MIN_S, self.quantile(0.95))
+
+    def snapshot(self) -> dict:
+        labels = [f"le_{edge:g}" for edge in LATENCY_BUCKETS_S] + ["inf"]
+        p50, p95 = self.quantile(0.5), self.quantile(0.95)
+        with self._lock:
+            return {
+                "count": self.count,
+                "mean_s": round(self.total_s / self.count, 4) if self.count else None,
+                "p50_s": None if p50 is None else round(p50, 4),
+                "p95_s": None if p95 is None else round(p95, 4),
+                "buckets": dict(zip(labels, self.buckets)),
+                **self.outcomes,
+            }
+
+
+_latency: dict[str, LatencyHistogram] = {}
+_latency_lock = threading.Lock()
+
+
+def _histogram(kind: str) -> LatencyHistogram:
+    with _latency_lock:
+        hist = _latency.get(kind)
+        if hist is None:
+            hist = _latency[kind] = LatencyHistogram()
+        return hist
+
+
+def latency_stats() -> dict:
+    with _latency_lock:
+        kinds = dict(_latency)
+    return {kind: hist.snapshot() for kind, hist in sorted(kinds.items())}
+
+
+def reset_latency_stats() -> None:
+    with _latency_lock:
+        _latency.clear()
+
+
+# ─── Generation ───────────────────────────────────────────────────────────────
+
+def _parse(raw: str) -> dict | list:
     cleaned = _strip_fences(raw)
     try:
         return json.loads(cleaned)
     except json.JSONDecodeError as exc:
         log.error("Gemini JSON parse failed.\nRaw: %s\nCleaned: %s\nError: %s", raw, cleaned, exc)
         raise ValueError(f"Gemini returned unparseable JSON: {exc}") from exc
+
+
+async def _acall_model(prompt: str, timeout_s: float) -> str:
+    response = await _get_model().generate_content_async(
+        prompt, request_options={"timeout": timeout_s}
+    )
+    return response.text
+
+
+async def _attempt(prompt: str, hist: LatencyHistogram, timeout_s: float) -> dict | list:
+    started = time.perf_counter()
+    try:
+        raw = await asyncio.wait_for(_acall_model(prompt, timeout_s), timeout_s)
+    finally:
+        # Failed, timed-out and cancelled (hedge loser) calls count too, or the
+        # p95 that sets the hedge delay reads low exactly when the API is slow
+        hist.observe(time.perf_counter() - started)
+    return _parse(raw)
+
+
+async def _hedged(prompt: str, hist: LatencyHistogram, timeout_s: float) -> dict | list:
+    """First parsed answer of up to two requests, the second sent after the kind's p95."""
+    delay = hist.hedge_delay()
+    if delay is None or delay >= timeout_s:
+        return await _attempt(prompt, hist, timeout_s)
+
+    primary = asyncio.ensure_future(_attempt(prompt, hist, timeout_s))
+    pending = {primary}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=delay)
+        if done:
+            return primary.result()
+
+        hist.bump("hedged")
+        backup = asyncio.ensure_future(_attempt(prompt, hist, timeout_s - delay))
+        pending.add(backup)
+        error: BaseException | None = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is backup:
+                        hist.bump("hedge_wins")
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        # Also reached when the caller is cancelled mid-wait — don't leave
+        # attempts running (and billing) behind it
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def agenerate_json(
+    prompt: str,
+    *,
+    kind: str = "default",
+    ttl_s: float | None = None,
+    deadline_s: float | None = None,
+    attempts: int | None = None,
+    hedge: bool | None = None,
+) -> dict | list:
+    """
+    Call Gemini and return the parsed JSON response.
+    kind labels the prompt for latency stats and hedging.
+    ttl_s: how long to cache this response (default GEMINI_CACHE_TTL_S; 0 = bypass).
+    Retries timeouts, API errors and unparseable JSON until `attempts` tries or
+    `deadline_s` (whole call, backoff included) run out, then raises the last error.
+    """
+    ttl_s = GEMINI_CACHE_TTL_S if ttl_s is None else ttl_s
+    deadline_s = GEMINI_DEADLINE_S if deadline_s is None else deadline_s
+    attempts = GEMINI_ATTEMPTS if attempts is None else attempts
+    hedge = GEMINI_HEDGE if hedge is None else hedge
+
+    key = prompt_key(prompt)
+    if ttl_s > 0:
+        cached = await asyncio.to_thread(_cache.get, key)
+        if cached is not None:
+            return cached
+
+    _get_model()  # config errors (no API key) aren't worth retrying
+    hist = _histogram(kind)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + deadline_s
+    error: BaseException = asyncio.TimeoutError(f"Gemini deadline of {deadline_s}s exceeded")
+
+    for attempt in range(attempts):
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        if attempt:
+            hist.bump("retries")
+        try:
+            if hedge:
+                result = await _hedged(prompt, hist, remaining)
+            else:
+                result = await _attempt(prompt, hist, remaining)
+        except asyncio.TimeoutError as exc:
+            hist.bump("timeouts")
+            error = exc
+        except ValueError as exc:
+            hist.bump("parse_errors")
+            error = exc
+        except Exception as exc:
+            hist.bump("errors")
+            log.warning("Gemini call failed (%s, try %d/%d): %s", kind, attempt + 1, attempts, exc)
+            error = exc
+        else:
+            if ttl_s > 0:
+                await asyncio.to_thread(_cache.set, key, result, ttl_s)
+            return result
+        backoff = min(GEMINI_BACKOFF_S * 2 ** attempt, deadline - loop.time())
+        if attempt + 1 < attempts and backoff > 0:
+            await asyncio.sleep(backoff)
+    raise error
+
+
+# ─── Streaming ────────────────────────────────────────────────────────────────
+
+async def astream_json(
+    prompt: str,
+    *,
+    kind: str = "default",
+    ttl_s: float | None = None,
+    deadline_s: float | None = None,
+):
+    """
+    Async iterator over Gemini's response text chunks for a JSON prompt.
+    A cached response (shared with agenerate_json) is replayed as one chunk.
+    Each chunk must arrive before the overall deadline. No retries — once
+    text has been handed out, the caller owns recovery. The full text is
+    parsed and cached when the stream ends cleanly.
+    """
+    ttl_s = GEMINI_CACHE_TTL_S if ttl_s is None else ttl_s
+    deadline_s = GEMINI_DEADLINE_S if deadline_s is None else deadline_s
+
+    key = prompt_key(prompt)
+    if ttl_s > 0:
+        cached = await asyncio.to_thread(_cache.get, key)
+        if cached is not None:
+            yield json.dumps(cached)
+            return
+
+    hist = _histogram(kind)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + deadline_s
+    started = time.perf_counter()
+    parts: list[str] = []
+    try:
+        response = await asyncio.wait_for(
+            _get_model().generate_content_async(
+                prompt, stream=True, request_options={"timeout": deadline_s}
+            ),
+            deadline_s,
+        )
+        chunks = response.__aiter__()
+        while True:
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), deadline - loop.time())
+            except StopAsyncIteration:
+                break
+            if chunk.text:
+                parts.append(chunk.text)
+                yield chunk.text
+    except asyncio.TimeoutError:
+        hist.bump("timeouts")
+        raise
+    except Exception:
+        hist.bump("errors")
+        raise
+    hist.observe(time.perf_counter() - started)
+
+    if ttl_s > 0:
+        try:
+            result = _parse("".join(parts))
+        except ValueError:
+            hist.bump("parse_errors")
+        else:
+            await asyncio.to_thread(_cache.set, key, result, ttl_s)
+
+
+class JsonArrayStream:
+    """
+    Incremental extractor for the items of one array field in a streamed JSON object.
+
+        parser = JsonArrayStream("tracks")
+        for chunk in chunks:
+            for item in parser.feed(chunk):
+                ...
+        whole = parser.result()   # full parsed document
+
+    Only tracks string/escape state and brace depth, so each feed() scans only
+    the new text. Items that fail to parse are logged and skipped.
+    """
+
+    def __init__(self, field: str) -> None:
+        self._opener = re.compile(r'"%s"\s*:\s*\[' % re.escape(field))
+        self.text = ""
+        self._pos = 0
+        self._in_array = False
+        self._done = False
+        self._depth = 0
+        self._start = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str) -> list:
+        self.text += chunk
+        items = []
+        if self._done:
+            return items
+        if not self._in_array:
+            match = self._opener.search(self.text)
+            if match is None:
+                return items
+            self._in_array, self._pos = True, match.end()
+
+        text, i = self.text, self._pos
+        while i < len(text):
+            ch = text[i]
+            if self._depth == 0:
+                if ch == "]":
+                    self._done = True
+                    break
+                if ch in "{[":
+                    self._depth, self._start = 1, i
+            elif self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        items.append(json.loads(text[self._start:i + 1]))
+                    except json.JSONDecodeError as exc:
+                        log.warning("Skipping unparseable streamed item: %s", exc)
+            i += 1
+        self._pos = i
+        return items
+
+    def result(self) -> dict | list:
+        """Parse the whole accumulated text; raises ValueError if it isn't valid JSON."""
+        return _parse(self.text)
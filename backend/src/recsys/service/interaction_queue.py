@@ -0,0 +1,368 @@
+# src/recsys/service/interaction_queue.py
+"""
+Write-behind queue for /interactions.
+
+Events go into a bounded in-process queue and are acknowledged immediately.
+A single background flusher drains the queue in batches, cut by size
+(INTERACTION_BATCH_SIZE) or age (INTERACTION_FLUSH_S), and writes each batch
+with db.awrite_interactions.
+
+  backpressure  put() waits up to INTERACTION_PUT_TIMEOUT_S for space, then
+                raises QueueFull — the endpoint turns that into a 503
+  durability    every accepted event is appended to a JSONL spool file; each
+                flushed batch appends an ack record. The spool is truncated
+                whenever it's fully acked.
+                Each queue (one per uvicorn worker) spools to its own
+                <spool>.<pid>.<suffix>.jsonl and holds an flock on it. On
+                start, a queue adopts and replays the un-acked events of every
+                spool nobody holds, i.e. those of workers that are gone.
+                Each event gets a UUID that becomes its interactions.id, so a
+                retried or replayed batch that already landed isn't counted twice.
+  bad events    a batch is one transaction, so a single event the database
+                rejects fails all of it. A batch that keeps failing is
+                written event by event; events that still fail while others
+                succeed are appended to <spool>.dead.jsonl and acked, so
+                they can't hold the rest back. When none succeed (database
+                down) the batch is re-queued and retried until stop().
+  shutdown      stop() refuses new events and drains what's queued, bounded
+                by INTERACTION_DRAIN_S; anything left stays in the spool
+"""
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import itertools
+import json
+import logging
+import os
+import re
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+
+from src.recsys.config import DATA
+
+log = logging.getLogger(__name__)
+
+INTERACTION_QUEUE_MAX = int(os.getenv("INTERACTION_QUEUE_MAX", "5000"))
+INTERACTION_BATCH_SIZE = int(os.getenv("INTERACTION_BATCH_SIZE", "200"))
+INTERACTION_FLUSH_S = float(os.getenv("INTERACTION_FLUSH_S", "1.0"))
+INTERACTION_PUT_TIMEOUT_S = float(os.getenv("INTERACTION_PUT_TIMEOUT_S", "0.5"))
+INTERACTION_DRAIN_S = float(os.getenv("INTERACTION_DRAIN_S", "10"))
+INTERACTION_SPOOL = Path(
+    os.getenv("INTERACTION_SPOOL", str(DATA / "spool" / "interactions.jsonl"))
+)
+
+_MAX_ATTEMPTS = 3
+_BACKOFF_S = 0.5
+
+
+def _pending_events(lines) -> list[dict]:
+    """Events in one spool file that have no ack record, in seq order."""
+    events: dict[int, dict] = {}
+    acked: set[int] = set()
+    for line in lines:
+        try:
+            rec = json.loads(line)
+        except json.JSONDecodeError:
+            continue  # torn final line from a crash
+        if "event" in rec:
+            events[rec["event"]["seq"]] = rec["event"]
+        elif "ack" in rec:
+            acked.update(rec["ack"])
+    return [events[s] for s in sorted(events) if s not in acked]
+
+
+class QueueFull(RuntimeError):
+    """The queue stayed full for longer than the put timeout."""
+
+
+class QueueClosed(RuntimeError):
+    """The queue is draining for shutdown and no longer accepts events."""
+
+
+class InteractionQueue:
+    def __init__(
+        self,
+        max_size: int = INTERACTION_QUEUE_MAX,
+        batch_size: int = INTERACTION_BATCH_SIZE,
+        flush_interval_s: float = INTERACTION_FLUSH_S,
+        put_timeout_s: float = INTERACTION_PUT_TIMEOUT_S,
+        drain_timeout_s: float = INTERACTION_DRAIN_S,
+        spool_path: Path | None = INTERACTION_SPOOL,
+    ) -> None:
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.put_timeout_s = put_timeout_s
+        self.drain_timeout_s = drain_timeout_s
+        self.spool_path = spool_path
+
+        self._queue: asyncio.Queue | None = None
+        self._backlog: deque[dict] = deque()  # replayed from the spool on start
+        self._task: asyncio.Task | None = None
+        self._closed = True
+        self._seq = itertools.count(1)
+        self._unacked = 0
+        self._spool = None
+        self._spool_file: Path | None = None
+        self._stats = {
+            "accepted": 0,
+            "rejected": 0,
+            "flushed": 0,
+            "batches": 0,
+            "failed_batches": 0,
+            "dead_lettered": 0,
+        }
+
+    # ── lifecycle ─────────────────────────────────────────────────────────────
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._open_spool()
+        self._closed = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop accepting events and drain what's queued."""
+        self._closed = True
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._task, self.drain_timeout_s)
+        except asyncio.TimeoutError:
+            log.warning("Interaction queue drain timed out; %d events left in spool", self.depth)
+        except Exception:
+            log.exception("Interaction flusher crashed during drain")
+        self._task = None
+        self._close_spool()
+
+    @property
+    def depth(self) -> int:
+        return (self._queue.qsize() if self._queue is not None else 0) + len(self._backlog)
+
+    def stats(self) -> dict:
+        return {**self._stats, "depth": self.depth, "max_size": self.max_size}
+
+    # ── producer side ─────────────────────────────────────────────────────────
+
+    async def put(self, event: dict) -> None:
+        """Enqueue one interaction. Raises QueueFull / QueueClosed."""
+        if self._closed or self._queue is None:
+            raise QueueClosed("Interaction queue is not accepting events.")
+        ev = {
+            **event,
+            "id": event.get("id") or str(uuid.uuid4()),
+            "seq": next(self._seq),
+            "timestamp": event.get("timestamp") or datetime.now(timezone.utc).isoformat(),
+        }
+        # Spool first so the flusher can never ack an event before it's on disk
+        self._spool_write(ev)
+        try:
+            self._queue.put_nowait(ev)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(self._queue.put(ev), self.put_timeout_s)
+            except asyncio.TimeoutError as exc:
+                self._stats["rejected"] += 1
+                self._spool_ack([ev])
+                raise QueueFull("Interaction queue is full.") from exc
+        self._stats["accepted"] += 1
+
+    # ── flusher ───────────────────────────────────────────────────────────────
+
+    async def _run(self) -> None:
+        while not (self._closed and self.depth == 0):
+            batch = await self._next_batch()
+            if batch:
+                await self._flush(batch)
+
+    async def _next_batch(self) -> list[dict]:
+        batch: list[dict] = []
+        while self._backlog and len(batch) < self.batch_size:
+            batch.append(self._backlog.popleft())
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval_s
+        while len(batch) < self.batch_size:
+            if self._closed:
+                # Draining — take whatever is already queued, don't wait
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    break
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _write(self, batch: list[dict], attempts: int = _MAX_ATTEMPTS) -> bool:
+        from src.recsys.service import db
+
+        for attempt in range(1, attempts + 1):
+            try:
+                if await db.awrite_interactions(batch):
+                    return True
+            except Exception as exc:
+                log.warning("Interaction batch write raised: %s", exc)
+            if attempt < attempts and not self._closed:
+                await asyncio.sleep(_BACKOFF_S * 2 ** (attempt - 1))
+        return False
+
+    async def _flush(self, batch: list[dict]) -> None:
+        if await self._write(batch):
+            self._stats["batches"] += 1
+            await self._written(batch)
+            return
+
+        # Find the event(s) the database rejects. Nothing landing after a
+        # few tries looks like an outage rather than bad data — stop there.
+        written, failed = [], []
+        untried = list(batch)
+        while untried and (written or len(failed) < min(_MAX_ATTEMPTS, len(batch))):
+            ev = untried.pop(0)
+            (written if await self._write([ev], attempts=1) else failed).append(ev)
+        if written:
+            self._stats["batches"] += 1
+            await self._written(written)
+            self._dead_letter(failed)
+            return
+
+        self._stats["failed_batches"] += 1
+        if self._closed:
+            log.error("Leaving %d unwritten interactions in the spool for replay", len(batch))
+            return
+        # Retry later. The events tried one by one go to the back, so a run of
+        # bad events at the front can't make every retry look like an outage.
+        log.error("Interaction write failing; re-queueing %d events", len(batch))
+        self._backlog.extendleft(reversed(untried + failed))
+
+    async def _written(self, batch: list[dict]) -> None:
+        from src.recsys.service import taste_state
+
+        self._stats["flushed"] += len(batch)
+        self._spool_ack(batch)
+        try:
+            await asyncio.to_thread(taste_state.store.apply, batch)
+        except Exception as exc:
+            log.warning("Taste state update failed: %s", exc)
+
+    def _dead_letter(self, events: list[dict]) -> None:
+        if not events:
+            return
+        self._stats["dead_lettered"] += len(events)
+        log.error("Dead-lettering %d interactions the database rejects", len(events))
+        if self.spool_path is not None:
+            path = self.spool_path.with_name(self.spool_path.stem + ".dead.jsonl")
+            try:
+                with path.open("a") as f:
+                    for ev in events:
+                        f.write(json.dumps({"event": ev}) + "\n")
+            except OSError as exc:
+                log.warning("Interaction dead-letter write failed: %s", exc)
+        self._spool_ack(events)
+
+    # ── spool ─────────────────────────────────────────────────────────────────
+
+    def _spool_files(self) -> list[Path]:
+        """Every spool under spool_path: the pre-per-process file, then one per queue."""
+        pattern = re.compile(
+            rf"{re.escape(self.spool_path.stem)}\.\d+\.[0-9a-f]+{re.escape(self.spool_path.suffix)}"
+        )
+        found = sorted(p for p in self.spool_path.parent.glob("*") if pattern.fullmatch(p.name))
+        return ([self.spool_path] if self.spool_path.exists() else []) + found
+
+    def _open_spool(self) -> None:
+        if self.spool_path is None:
+            return
+        self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+        # Our own file, locked for as long as this queue runs: other workers
+        # sharing spool_path leave it alone while we're alive and adopt it
+        # (as we adopt theirs) once we're gone
+        self._spool_file = self.spool_path.with_name(
+            f"{self.spool_path.stem}.{os.getpid()}.{uuid.uuid4().hex[:8]}{self.spool_path.suffix}"
+        )
+        self._spool = self._spool_file.open("a", buffering=1)
+        fcntl.flock(self._spool, fcntl.LOCK_EX)
+
+        adopted, pending = [], []
+        for path in self._spool_files():
+            if path == self._spool_file:
+                continue
+            try:
+                f = path.open()
+            except OSError:
+                continue
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                if os.fstat(f.fileno()).st_ino != path.stat().st_ino:
+                    raise OSError("adopted and removed by another worker")
+            except OSError:
+                f.close()  # a live queue's spool, or already gone
+                continue
+            adopted.append((path, f))
+            pending.extend(_pending_events(f))
+
+        # Seqs are per file, so renumber what we adopt before spooling it as ours
+        for seq, ev in enumerate(pending, 1):
+            ev["seq"] = seq
+            ev.setdefault("id", str(uuid.uuid4()))  # spooled before events carried ids
+            self._spool.write(json.dumps({"event": ev}) + "\n")
+        self._spool.flush()
+        os.fsync(self._spool.fileno())
+        # Only now that the events are durable in our spool
+        for path, f in adopted:
+            path.unlink(missing_ok=True)
+            f.close()
+
+        if pending:
+            self._seq = itertools.count(len(pending) + 1)
+            self._backlog.extend(pending)
+            self._unacked = len(pending)
+            log.info("Replaying %d spooled interactions", len(pending))
+
+    def _close_spool(self) -> None:
+        if self._spool is None:
+            return
+        if self._unacked <= 0 and self.depth == 0:
+            self._spool_file.unlink(missing_ok=True)  # nothing for anyone to replay
+        self._spool.close()  # releases the lock
+        self._spool = None
+
+    def _read_pending(self) -> list[dict]:
+        """Un-acked events in every spool under spool_path (not locked — for inspection)."""
+        pending = []
+        for path in self._spool_files():
+            with path.open() as f:
+                pending.extend(_pending_events(f))
+        return pending
+
+    def _spool_write(self, ev: dict) -> None:
+        if self._spool is None:
+            return
+        try:
+            self._spool.write(json.dumps({"event": ev}) + "\n")
+            self._unacked += 1
+        except OSError as exc:
+            log.warning("Interaction spool write failed: %s", exc)
+
+    def _spool_ack(self, batch: list[dict]) -> None:
+        if self._spool is None:
+            return
+        try:
+            self._unacked -= len(batch)
+            if self._unacked <= 0 and self.depth == 0:
+                # Everything durable — start a fresh spool
+                self._spool.seek(0)
+                self._spool.truncate()
+                self._unacked = 0
+            else:
+                self._spool.write(json.dumps({"ack": [ev["seq"] for ev in batch]}) + "\n")
+        except OSError as exc:
+            log.warning("Interaction spool ack failed: %s", exc)
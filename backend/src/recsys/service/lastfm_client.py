@@ -0,0 +1,152 @@
+# src/recsys/service/lastfm_client.py
+"""
+Async Last.fm similar-artist lookups for the serving path.
+
+Lookup order for similar_artists():
+  1. the bundle's precomputed graph (similar_artists.json, written by
+     `python -m src.cli.build_similar_artists`) — no network at all
+  2. an in-process TTL cache
+  3. the on-disk Last.fm response cache shared with the ETL
+     (open_cache("lastfm"), see recsys/cache.py)
+  4. Last.fm itself, over one pooled httpx.AsyncClient
+
+Concurrent lookups for the same artist share one request. Failures return []
+and are not cached.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from pathlib import Path
+
+import httpx
+
+from src.recsys.cache import TTLCache, open_cache, similar_artists_entry
+
+log = logging.getLogger(__name__)
+
+LASTFM_URL = "https://ws.audioscrobbler.com/2.0/"
+LASTFM_TIMEOUT_S = float(os.getenv("LASTFM_TIMEOUT_S", "8"))
+LASTFM_MAX_CONNECTIONS = int(os.getenv("LASTFM_MAX_CONNECTIONS", "10"))
+LASTFM_SIMILAR_LIMIT = 30
+LASTFM_SIMILAR_TTL_S = float(os.getenv("LASTFM_SIMILAR_TTL_S", str(7 * 24 * 3600)))
+LASTFM_MEMORY_MAX = int(os.getenv("LASTFM_MEMORY_MAX", "4096"))
+SIMILAR_ARTISTS_FILE = "similar_artists.json"
+
+_http: httpx.AsyncClient | None = None
+_memory = TTLCache(LASTFM_MEMORY_MAX, LASTFM_SIMILAR_TTL_S)
+_disk = open_cache("lastfm")
+_graphs: dict[Path, dict[str, list[str]]] = {}
+_inflight: dict[str, asyncio.Task] = {}
+_stats = {"graph_hits": 0, "memory_hits": 0, "disk_hits": 0, "fetches": 0, "errors": 0}
+
+
+def stats() -> dict:
+    return {**_stats, "memory_entries": len(_memory), "graphs_loaded": len(_graphs)}
+
+
+def _client() -> httpx.AsyncClient:
+    global _http
+    if _http is None or _http.is_closed:
+        _http = httpx.AsyncClient(
+            timeout=LASTFM_TIMEOUT_S,
+            limits=httpx.Limits(max_connections=LASTFM_MAX_CONNECTIONS),
+            headers={"User-Agent": "dscvr/0.2"},
+        )
+    return _http
+
+
+async def aclose() -> None:
+    global _http
+    if _http is not None:
+        await _http.aclose()
+        _http = None
+
+
+def load_graph(art_dir: Path) -> dict[str, list[str]]:
+    """{lowercased artist: similar artist names} from a bundle, {} if it has none."""
+    path = Path(art_dir) / SIMILAR_ARTISTS_FILE
+    try:
+        with path.open() as f:
+            graph = json.load(f)
+    except FileNotFoundError:
+        graph = {}
+    except (OSError, ValueError) as exc:
+        log.warning("Ignoring unreadable %s: %s", path, exc)
+        graph = {}
+    _graphs[Path(art_dir)] = graph
+    return graph
+
+
+def _names(data: dict) -> list[str]:
+    artists = (data.get("similarartists") or {}).get("artist", [])
+    if isinstance(artists, dict):
+        artists = [artists]
+    return [a["name"] for a in artists if isinstance(a, dict) and a.get("name")]
+
+
+async def _fetch(artist: str) -> list[str]:
+    prefix, key = similar_artists_entry(artist, LASTFM_SIMILAR_LIMIT)
+    cached = await asyncio.to_thread(_disk.get, prefix, key, LASTFM_SIMILAR_TTL_S)
+    if cached is not None:
+        _stats["disk_hits"] += 1
+        return _names(cached)
+
+    api_key = os.environ.get("LASTFM_API_KEY", "")
+    if not api_key:
+        return []
+    _stats["fetches"] += 1
+    try:
+        resp = await _client().get(
+            LASTFM_URL,
+            params={
+                "method": "artist.getsimilar",
+                "artist": artist,
+                "api_key": api_key,
+                "format": "json",
+                "limit": LASTFM_SIMILAR_LIMIT,
+            },
+        )
+        data = resp.json()
+        if data.get("error"):
+            raise RuntimeError(f"Last.fm error {data['error']}: {data.get('message')}")
+    except Exception as exc:
+        _stats["errors"] += 1
+        log.warning("Last.fm similar artists failed for '%s': %s", artist, exc)
+        return []
+    await asyncio.to_thread(_disk.set, prefix, key, data)
+    return _names(data)
+
+
+async def similar_artists(artist: str, art_dir: Path | None = None) -> list[str]:
+    """Last.fm's similar artists for `artist`, best first. [] on any failure."""
+    name = artist.strip().lower()
+    if art_dir is not None:
+        graph = _graphs.get(Path(art_dir))
+        if graph is None:
+            graph = await asyncio.to_thread(load_graph, art_dir)
+        if name in graph:
+            _stats["graph_hits"] += 1
+            return list(graph[name])
+
+    hit = _memory.get(name)
+    if hit is not None:
+        _stats["memory_hits"] += 1
+        return list(hit)
+
+    # One fetch per artist at a time; callers that give up don't cancel it
+    task = _inflight.get(name)
+    if task is None:
+        task = asyncio.create_task(_fetch_and_remember(artist, name))
+        _inflight[name] = task
+        task.add_done_callback(lambda _: _inflight.pop(name, None))
+    return list(await asyncio.shield(task))
+
+
+async def _fetch_and_remember(artist: str, name: str) -> list[str]:
+    result = await _fetch(artist)
+    if result:
+        _memory.set(name, result)
+    return result
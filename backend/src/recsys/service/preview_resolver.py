@@ -15,6 +15,7 @@ from __future__ import annotations
 import asyncio
 import logging
 import os
+import re
 import urllib.parse
 
 import httpx
@@ -49,6 +50,17 @@ def _is_stale_url(url: str | None) -> bool:
     return False
 
 
+_HDNEA_EXP = re.compile(r"hdnea=exp=(\d+)")
+
+
+def signed_url_expiry(url: str | None) -> float | None:
+    """Unix time a Deezer signed preview URL (hdnea=exp=…) stops working, else None."""
+    if not url:
+        return None
+    match = _HDNEA_EXP.search(url)
+    return float(match.group(1)) if match else None
+
+
 async def _resolve_single(
     client: httpx.AsyncClient,
     track_name: str,
@@ -1,5 +1,8 @@
 # src/recsys/service/schemas.py
 from __future__ import annotations
+from typing import Literal
+from uuid import UUID
+
 from pydantic import BaseModel, model_validator
 
 
@@ -38,9 +41,12 @@ class RecommendResponse(BaseModel):
 # ─── Interaction tracking ──────────────────────────────────────────────────────
 
 class InteractionRequest(BaseModel):
-    user_id: str
+    # Checked here because the batch write is one transaction: a value the
+    # database rejects (users.id is a UUID, interaction_type has a CHECK)
+    # would otherwise fail every event written alongside it
+    user_id: UUID
     track_id: str               # row_index as string
-    interaction_type: str       # 'heart' | 'skip' | 'complete'
+    interaction_type: Literal["heart", "skip", "complete"]
     feature: str | None = None
     tags: list[str] = []        # track tags for taste profile update
 
@@ -176,3 +182,9 @@ class SeanceResponse(BaseModel):
     original_artist: str
     tracks: list[SeanceTrack]
     summary: str
+
+
+# ─── Admin ────────────────────────────────────────────────────────────────────
+
+class ReloadRequest(BaseModel):
+    version: str | None = None   # artifact version dir; default = data/artifacts/CURRENT
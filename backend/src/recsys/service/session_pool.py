@@ -0,0 +1,171 @@
+# src/recsys/service/session_pool.py
+"""
+Pre-warmed Blind Taste Test sessions.
+
+Building a session means resolving ten previews through Deezer, which is the
+slow part of /blind-taste-test. A background task keeps up to
+BLIND_POOL_SIZE sessions ready for the current catalog; the endpoint pops
+one and the task builds a replacement.
+
+A session is only served while it's fresh: younger than BLIND_SESSION_MAX_AGE_S
+and more than BLIND_SESSION_EXPIRY_MARGIN_S away from the earliest Deezer
+signed-URL expiry (hdnea=exp=…) among its previews. Sessions built for a
+catalog that has since been hot-swapped are dropped. An empty pool falls
+back to building a session inline.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+import weakref
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable
+
+log = logging.getLogger(__name__)
+
+BLIND_POOL_SIZE = int(os.getenv("BLIND_POOL_SIZE", "8"))
+BLIND_POOL_CONCURRENCY = int(os.getenv("BLIND_POOL_CONCURRENCY", "2"))
+BLIND_SESSION_MAX_AGE_S = float(os.getenv("BLIND_SESSION_MAX_AGE_S", "900"))
+BLIND_SESSION_EXPIRY_MARGIN_S = float(os.getenv("BLIND_SESSION_EXPIRY_MARGIN_S", "120"))
+BLIND_POOL_SWEEP_S = float(os.getenv("BLIND_POOL_SWEEP_S", "30"))
+_RETRY_S = 5.0
+
+
+@dataclass
+class _Entry:
+    recommender: weakref.ref
+    expires_at: float
+    session: dict
+
+
+def session_expires_at(session: dict, built_at: float, max_age_s: float) -> float:
+    """Earliest of built_at + max_age_s and any signed preview URL's expiry."""
+    from src.recsys.service.preview_resolver import signed_url_expiry
+
+    expiries = [signed_url_expiry(t.get("preview_url")) for t in session.get("tracks", [])]
+    return min([built_at + max_age_s, *(e for e in expiries if e is not None)])
+
+
+class SessionPool:
+    def __init__(
+        self,
+        current_recommender: Callable[[], object | None],
+        size: int = BLIND_POOL_SIZE,
+        concurrency: int = BLIND_POOL_CONCURRENCY,
+        max_age_s: float = BLIND_SESSION_MAX_AGE_S,
+        expiry_margin_s: float = BLIND_SESSION_EXPIRY_MARGIN_S,
+        sweep_s: float = BLIND_POOL_SWEEP_S,
+    ) -> None:
+        self._current = current_recommender
+        self.size = size
+        self.concurrency = concurrency
+        self.max_age_s = max_age_s
+        self.expiry_margin_s = expiry_margin_s
+        self.sweep_s = sweep_s
+        self._sessions: deque[_Entry] = deque()
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._closed = True
+        self._stats = {"hits": 0, "misses": 0, "built": 0, "expired": 0, "stale_catalog": 0, "errors": 0}
+
+    # ── lifecycle ─────────────────────────────────────────────────────────────
+
+    async def start(self) -> None:
+        self._wake = asyncio.Event()
+        self._closed = False
+        if self.size > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        # The flag covers a cancel that lands as wait_for() returns and is swallowed
+        self._closed = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self._wake = None
+        self._sessions.clear()
+
+    @property
+    def depth(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> dict:
+        return {**self._stats, "depth": self.depth, "size": self.size}
+
+    # ── consumer side ─────────────────────────────────────────────────────────
+
+    def _usable(self, entry: _Entry, recommender, now: float) -> bool:
+        if entry.recommender() is not recommender:
+            self._stats["stale_catalog"] += 1
+            return False
+        if entry.expires_at - self.expiry_margin_s <= now:
+            self._stats["expired"] += 1
+            return False
+        return True
+
+    async def get(self, recommender) -> dict:
+        """A fresh pre-built session for `recommender`, else one built now."""
+        from src.recsys.service.features import blind_taste_test
+
+        now = time.time()
+        try:
+            while self._sessions:
+                entry = self._sessions.popleft()
+                if self._usable(entry, recommender, now):
+                    self._stats["hits"] += 1
+                    return entry.session
+            self._stats["misses"] += 1
+        finally:
+            if self._wake is not None:
+                self._wake.set()
+        return await blind_taste_test.build_session(recommender)
+
+    # ── background refill ─────────────────────────────────────────────────────
+
+    def _prune(self, recommender) -> None:
+        now = time.time()
+        self._sessions = deque(e for e in self._sessions if self._usable(e, recommender, now))
+
+    async def _build(self, recommender) -> None:
+        from src.recsys.service.features import blind_taste_test
+
+        session = await blind_taste_test.build_session(recommender)
+        built_at = time.time()
+        self._sessions.append(
+            _Entry(
+                recommender=weakref.ref(recommender),
+                expires_at=session_expires_at(session, built_at, self.max_age_s),
+                session=session,
+            )
+        )
+        self._stats["built"] += 1
+
+    async def _run(self) -> None:
+        while not self._closed:
+            recommender = self._current()
+            if recommender is not None:
+                self._prune(recommender)
+                missing = self.size - len(self._sessions)
+                if missing > 0:
+                    batch = min(missing, self.concurrency)
+                    results = await asyncio.gather(
+                        *[self._build(recommender) for _ in range(batch)], return_exceptions=True
+                    )
+                    errors = [r for r in results if isinstance(r, Exception)]
+                    if errors:
+                        self._stats["errors"] += len(errors)
+                        log.warning("Blind session pool refill failed: %s", errors[0])
+                        await asyncio.sleep(_RETRY_S)
+                    continue
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.sweep_s)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,40 @@
+# src/recsys/service/storage/__init__.py
+"""
+Pluggable persistence for db.py, selected with DB_BACKEND:
+  supabase  hosted Supabase over PostgREST (default)
+  sqlite    local file at SQLITE_PATH — offline dev and load tests
+  postgres  plain Postgres at DATABASE_URL via asyncpg
+"""
+from __future__ import annotations
+
+import os
+
+from src.recsys.config import DATA
+
+from .base import DB_POOL_MAX, DB_POOL_MIN, DB_STATEMENT_TIMEOUT_S, StorageBackend
+
+DB_BACKEND = os.getenv("DB_BACKEND", "supabase").lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", str(DATA / "local.db"))
+DATABASE_URL = os.getenv("DATABASE_URL", "")
+
+__all__ = ["StorageBackend", "create_backend", "DB_BACKEND"]
+
+
+def create_backend(name: str = DB_BACKEND) -> StorageBackend:
+    """Build the sqlite / postgres backend. Supabase is built by db.get_backend()."""
+    if name == "sqlite":
+        from .sqlite import SqliteBackend
+
+        return SqliteBackend(SQLITE_PATH, busy_timeout_s=DB_STATEMENT_TIMEOUT_S)
+    if name == "postgres":
+        if not DATABASE_URL:
+            raise RuntimeError("DB_BACKEND=postgres needs DATABASE_URL")
+        from .postgres import PostgresBackend
+
+        return PostgresBackend(
+            DATABASE_URL,
+            min_size=DB_POOL_MIN,
+            max_size=DB_POOL_MAX,
+            statement_timeout_s=DB_STATEMENT_TIMEOUT_S,
+        )
+    raise ValueError(f"Unknown DB_BACKEND: {name!r}")
@@ -0,0 +1,160 @@
+# src/recsys/service/storage/base.py
+"""
+Storage backend interface for db.py.
+
+A backend only moves rows. Everything above that — the known-users cache,
+per-event weights, error swallowing, paging loops — lives in db.py so
+every backend behaves the same.
+
+record_interactions is the queue's write path and must be idempotent: each
+row carries a client-generated UUID, rows whose id already exists are
+skipped, and taste-profile deltas are applied only for rows actually
+inserted — all in one transaction. Retrying a batch after an ambiguous
+failure (timeout, crash before the spool ack) can't count it twice.
+
+Methods raise on failure. Timestamps cross this boundary as ISO-8601
+strings; `None` means "now".
+
+Each sync method has an `a`-prefixed async twin. By default the twin runs
+the sync method on a dedicated pool of DB_POOL_MAX threads ("db-*"), so DB
+concurrency is sized on its own rather than sharing asyncio's default
+executor. Backends with a native async driver (postgres) override the twins
+and open their connections on the app's loop in astart().
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+DB_STATEMENT_TIMEOUT_S = float(os.getenv("DB_STATEMENT_TIMEOUT_S", "5"))
+
+_io_pool: ThreadPoolExecutor | None = None
+_io_pool_lock = threading.Lock()
+
+
+def get_io_pool() -> ThreadPoolExecutor:
+    global _io_pool
+    if _io_pool is None:
+        with _io_pool_lock:
+            if _io_pool is None:
+                _io_pool = ThreadPoolExecutor(max_workers=DB_POOL_MAX, thread_name_prefix="db")
+    return _io_pool
+
+
+def encode_cursor(row: dict) -> str:
+    return f"{row['timestamp']}|{row['id']}"
+
+
+def decode_cursor(cursor: str) -> tuple[str, str]:
+    ts, sep, row_id = cursor.rpartition("|")
+    if not sep or not ts or not row_id:
+        raise ValueError(f"Malformed history cursor: {cursor!r}")
+    return ts, row_id
+
+
+def tag_deltas(rows: list[dict]) -> dict[tuple[str, str], float]:
+    """Sum each row's weight over its tags, per (user_id, tag)."""
+    deltas: dict[tuple[str, str], float] = {}
+    for r in rows:
+        weight = r.get("weight") or 0.0
+        if weight == 0:
+            continue
+        for tag in r.get("tags") or []:
+            key = (r["user_id"], tag)
+            deltas[key] = deltas.get(key, 0.0) + weight
+    return deltas
+
+
+def parse_timestamp(value: datetime | str | None) -> datetime:
+    """ISO-8601 string / datetime / None (now) → aware UTC datetime."""
+    if value is None or value == "now()":
+        return datetime.now(timezone.utc)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+class StorageBackend(ABC):
+    name: str = "base"
+
+    @abstractmethod
+    def register_users(self, user_ids: list[str]) -> None:
+        """Insert any user ids that don't exist yet."""
+
+    @abstractmethod
+    def insert_interactions(self, rows: list[dict]) -> None:
+        """Rows: {user_id, track_id, interaction_type, feature, timestamp}."""
+
+    @abstractmethod
+    def record_interactions(self, rows: list[dict]) -> int:
+        """
+        Rows: {id, user_id, track_id, interaction_type, feature, timestamp,
+        tags, weight}, ids unique within the batch. Inserts the rows whose id
+        is new and adds tag_deltas() of those rows to taste_profile, in one
+        transaction. Returns the number of rows inserted.
+        """
+
+    @abstractmethod
+    def increment_taste_profile(self, deltas: dict[tuple[str, str], float]) -> None:
+        """Atomically add each delta to taste_profile.score for (user_id, tag)."""
+
+    @abstractmethod
+    def get_taste_profile(self, user_id: str) -> list[dict]:
+        """[{tag, score}] sorted by score desc."""
+
+    @abstractmethod
+    def get_interaction_history_page(
+        self,
+        user_id: str,
+        types: list[str] | None,
+        limit: int,
+        cursor: str | None,
+        since: str | None,
+    ) -> list[dict]:
+        """
+        Up to `limit` rows {id, track_id, interaction_type, feature, timestamp},
+        newest first by (timestamp, id), strictly older than `cursor` and not
+        older than `since`.
+        """
+
+    def close(self) -> None:
+        """Release connections. Optional."""
+
+    async def astart(self) -> None:
+        """Open connections bound to the running loop (app lifespan). Optional."""
+
+    async def aclose(self) -> None:
+        """Release what astart() opened. Optional."""
+
+    # ── async twins ───────────────────────────────────────────────────────────
+
+    async def _offload(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(get_io_pool(), fn, *args)
+
+    async def aregister_users(self, user_ids: list[str]) -> None:
+        await self._offload(self.register_users, user_ids)
+
+    async def ainsert_interactions(self, rows: list[dict]) -> None:
+        await self._offload(self.insert_interactions, rows)
+
+    async def arecord_interactions(self, rows: list[dict]) -> int:
+        return await self._offload(self.record_interactions, rows)
+
+    async def aincrement_taste_profile(self, deltas: dict[tuple[str, str], float]) -> None:
+        await self._offload(self.increment_taste_profile, deltas)
+
+    async def aget_taste_profile(self, user_id: str) -> list[dict]:
+        return await self._offload(self.get_taste_profile, user_id)
+
+    async def aget_interaction_history_page(self, user_id, types, limit, cursor, since) -> list[dict]:
+        return await self._offload(
+            self.get_interaction_history_page, user_id, types, limit, cursor, since
+        )
@@ -0,0 +1,302 @@
+# src/recsys/service/storage/postgres.py
+"""
+Plain Postgres via asyncpg — a local stand-in for Supabase (same schema as
+supabase/migrations) and a direct connection path in production.
+
+asyncpg pools are bound to the event loop they were created on, so the
+backend keeps one pool per caller:
+  async  a* methods await a pool created on the caller's running loop — the
+         app's loop, opened by astart() from the FastAPI lifespan. No thread
+         hop: queries run on the event loop itself.
+  sync   CLIs and thread-pool callers block on a second pool that lives on a
+         private loop thread, started the first time a sync method is used.
+Nothing connects at construction time.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import uuid
+
+from .base import StorageBackend, decode_cursor, parse_timestamp, tag_deltas
+
+# 001_init.sql + 003's composite index, minus Supabase-specific grants.
+# Interaction ids come from the client, so gen_random_uuid() (pgcrypto before
+# PG13) isn't needed.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id          UUID        PRIMARY KEY,
+    created_at  TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS interactions (
+    id                UUID        PRIMARY KEY,  -- set by the client
+    user_id           UUID        NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    track_id          VARCHAR     NOT NULL,
+    interaction_type  VARCHAR     NOT NULL,
+    feature           VARCHAR,
+    timestamp         TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+
+    CONSTRAINT interactions_type_check
+        CHECK (interaction_type IN ('heart', 'skip', 'complete'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_interactions_user_ts
+    ON interactions(user_id, timestamp DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_interactions_track_id ON interactions(track_id);
+
+CREATE TABLE IF NOT EXISTS taste_profile (
+    user_id     UUID        NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    tag         VARCHAR     NOT NULL,
+    score       FLOAT       NOT NULL DEFAULT 0,
+    updated_at  TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+
+    PRIMARY KEY (user_id, tag)
+);
+
+CREATE INDEX IF NOT EXISTS idx_taste_profile_user_id ON taste_profile(user_id);
+"""
+
+_INCREMENT_SQL = """
+INSERT INTO taste_profile (user_id, tag, score, updated_at)
+SELECT d.user_id, d.tag, d.delta, NOW()
+FROM unnest($1::uuid[], $2::varchar[], $3::float8[]) AS d(user_id, tag, delta)
+ON CONFLICT (user_id, tag) DO UPDATE
+    SET score      = taste_profile.score + EXCLUDED.score,
+        updated_at = EXCLUDED.updated_at
+"""
+
+
+async def _increment(conn, deltas: dict[tuple[str, str], float]) -> None:
+    keys = list(deltas)
+    await conn.execute(
+        _INCREMENT_SQL,
+        [uid for uid, _ in keys],
+        [tag for _, tag in keys],
+        [deltas[k] for k in keys],
+    )
+
+
+def _history_row(r) -> dict:
+    return {
+        "id": str(r["id"]),
+        "track_id": r["track_id"],
+        "interaction_type": r["interaction_type"],
+        "feature": r["feature"],
+        "timestamp": r["timestamp"].isoformat(),
+    }
+
+
+class PostgresBackend(StorageBackend):
+    name = "postgres"
+
+    def __init__(
+        self,
+        dsn: str,
+        min_size: int = 1,
+        max_size: int = 10,
+        statement_timeout_s: float = 5.0,
+        init_schema: bool = True,
+    ) -> None:
+        import asyncpg  # optional dependency — only needed for DB_BACKEND=postgres
+
+        self._asyncpg = asyncpg
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.statement_timeout_s = statement_timeout_s
+        self.init_schema = init_schema
+        self._apool = None  # on the app's loop
+        self._apool_loop: asyncio.AbstractEventLoop | None = None
+        self._apool_lock: asyncio.Lock | None = None
+        self._pool = None  # on self._loop, for sync callers
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._sync_lock = threading.Lock()
+
+    # ── pools ─────────────────────────────────────────────────────────────────
+
+    async def _create_pool(self):
+        pool = await self._asyncpg.create_pool(
+            self.dsn,
+            min_size=self.min_size,
+            max_size=self.max_size,
+            command_timeout=self.statement_timeout_s,
+            server_settings={"statement_timeout": str(int(self.statement_timeout_s * 1000))},
+        )
+        if self.init_schema:
+            async with pool.acquire() as conn:
+                await conn.execute(SCHEMA)
+        return pool
+
+    async def _async_pool(self):
+        """The pool bound to the running loop, created on first use."""
+        loop = asyncio.get_running_loop()
+        if self._apool is not None and self._apool_loop is loop:
+            return self._apool
+        if self._apool_lock is None or self._apool_loop is not loop:
+            # A pool (and lock) from a previous loop can't be used here
+            self._apool, self._apool_loop, self._apool_lock = None, loop, asyncio.Lock()
+        async with self._apool_lock:
+            if self._apool is None:
+                self._apool = await self._create_pool()
+        return self._apool
+
+    def _run(self, fn, *args):
+        """Run fn(pool, *args) on the private loop's pool and block for the result."""
+        with self._sync_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="postgres-backend", daemon=True
+                )
+                self._thread.start()
+            if self._pool is None:
+                self._pool = asyncio.run_coroutine_threadsafe(self._create_pool(), self._loop).result()
+        return asyncio.run_coroutine_threadsafe(fn(self._pool, *args), self._loop).result()
+
+    async def _arun(self, fn, *args):
+        return await fn(await self._async_pool(), *args)
+
+    async def astart(self) -> None:
+        await self._async_pool()
+
+    async def aclose(self) -> None:
+        pool, self._apool = self._apool, None
+        if pool is not None and self._apool_loop is asyncio.get_running_loop():
+            await pool.close()
+
+    # ── queries (run on whichever loop owns `pool`) ───────────────────────────
+
+    @staticmethod
+    async def _register_users(pool, user_ids: list[str]) -> None:
+        async with pool.acquire() as conn:
+            await conn.execute(
+                "INSERT INTO users (id) SELECT unnest($1::uuid[]) ON CONFLICT (id) DO NOTHING",
+                user_ids,
+            )
+
+    @staticmethod
+    async def _insert_interactions(pool, rows: list[dict]) -> None:
+        async with pool.acquire() as conn:
+            await conn.execute(
+                "INSERT INTO interactions (id, user_id, track_id, interaction_type, feature, timestamp)"
+                " SELECT * FROM unnest($1::uuid[], $2::uuid[], $3::varchar[], $4::varchar[],"
+                " $5::varchar[], $6::timestamptz[])",
+                [str(uuid.uuid4()) for _ in rows],
+                [r["user_id"] for r in rows],
+                [r["track_id"] for r in rows],
+                [r["interaction_type"] for r in rows],
+                [r.get("feature") for r in rows],
+                [parse_timestamp(r.get("timestamp")) for r in rows],
+            )
+
+    @staticmethod
+    async def _record_interactions(pool, rows: list[dict]) -> int:
+        async with pool.acquire() as conn, conn.transaction():
+            inserted = await conn.fetch(
+                "INSERT INTO interactions (id, user_id, track_id, interaction_type, feature, timestamp)"
+                " SELECT * FROM unnest($1::uuid[], $2::uuid[], $3::varchar[], $4::varchar[],"
+                " $5::varchar[], $6::timestamptz[])"
+                " ON CONFLICT (id) DO NOTHING RETURNING id",
+                [r["id"] for r in rows],
+                [r["user_id"] for r in rows],
+                [r["track_id"] for r in rows],
+                [r["interaction_type"] for r in rows],
+                [r.get("feature") for r in rows],
+                [parse_timestamp(r.get("timestamp")) for r in rows],
+            )
+            ids = {str(r["id"]) for r in inserted}
+            deltas = tag_deltas([r for r in rows if str(r["id"]) in ids])
+            if deltas:
+                await _increment(conn, deltas)
+        return len(ids)
+
+    @staticmethod
+    async def _increment_taste_profile(pool, deltas: dict[tuple[str, str], float]) -> None:
+        async with pool.acquire() as conn:
+            await _increment(conn, deltas)
+
+    @staticmethod
+    async def _get_taste_profile(pool, user_id: str) -> list[dict]:
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(
+                "SELECT tag, score FROM taste_profile WHERE user_id = $1 ORDER BY score DESC",
+                user_id,
+            )
+        return [dict(r) for r in rows]
+
+    @staticmethod
+    async def _get_interaction_history_page(pool, user_id, types, limit, cursor, since) -> list[dict]:
+        sql = [
+            "SELECT id, track_id, interaction_type, feature, timestamp"
+            " FROM interactions WHERE user_id = $1"
+        ]
+        params: list = [user_id]
+        if types:
+            params.append(types)
+            sql.append(f"AND interaction_type = ANY(${len(params)}::varchar[])")
+        if since is not None:
+            params.append(parse_timestamp(since))
+            sql.append(f"AND timestamp >= ${len(params)}")
+        if cursor:
+            ts, row_id = decode_cursor(cursor)
+            params.extend([parse_timestamp(ts), row_id])
+            n = len(params)
+            sql.append(f"AND (timestamp, id) < (${n - 1}, ${n}::uuid)")
+        params.append(limit)
+        sql.append(f"ORDER BY timestamp DESC, id DESC LIMIT ${len(params)}")
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(" ".join(sql), *params)
+        return [_history_row(r) for r in rows]
+
+    # ── StorageBackend ────────────────────────────────────────────────────────
+
+    def register_users(self, user_ids: list[str]) -> None:
+        self._run(self._register_users, user_ids)
+
+    def insert_interactions(self, rows: list[dict]) -> None:
+        self._run(self._insert_interactions, rows)
+
+    def record_interactions(self, rows: list[dict]) -> int:
+        return self._run(self._record_interactions, rows)
+
+    def increment_taste_profile(self, deltas: dict[tuple[str, str], float]) -> None:
+        self._run(self._increment_taste_profile, deltas)
+
+    def get_taste_profile(self, user_id: str) -> list[dict]:
+        return self._run(self._get_taste_profile, user_id)
+
+    def get_interaction_history_page(self, user_id, types, limit, cursor, since) -> list[dict]:
+        return self._run(self._get_interaction_history_page, user_id, types, limit, cursor, since)
+
+    async def aregister_users(self, user_ids: list[str]) -> None:
+        await self._arun(self._register_users, user_ids)
+
+    async def ainsert_interactions(self, rows: list[dict]) -> None:
+        await self._arun(self._insert_interactions, rows)
+
+    async def arecord_interactions(self, rows: list[dict]) -> int:
+        return await self._arun(self._record_interactions, rows)
+
+    async def aincrement_taste_profile(self, deltas: dict[tuple[str, str], float]) -> None:
+        await self._arun(self._increment_taste_profile, deltas)
+
+    async def aget_taste_profile(self, user_id: str) -> list[dict]:
+        return await self._arun(self._get_taste_profile, user_id)
+
+    async def aget_interaction_history_page(self, user_id, types, limit, cursor, since) -> list[dict]:
+        return await self._arun(
+            self._get_interaction_history_page, user_id, types, limit, cursor, since
+        )
+
+    def close(self) -> None:
+        with self._sync_lock:
+            if self._loop is None:
+                return
+            if self._pool is not None:
+                asyncio.run_coroutine_threadsafe(self._pool.close(), self._loop).result()
+                self._pool = None
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._loop = self._thread = None
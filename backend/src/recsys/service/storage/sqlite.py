@@ -0,0 +1,182 @@
+# src/recsys/service/storage/sqlite.py
+"""
+SQLite stand-in for local development and write-throughput benchmarks.
+Same tables, keys and indexes as supabase/migrations (UUID/TIMESTAMPTZ
+become TEXT; timestamps are stored as fixed-width UTC ISO strings so they
+sort lexicographically).
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+from .base import StorageBackend, decode_cursor, parse_timestamp, tag_deltas
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id          TEXT PRIMARY KEY,
+    created_at  TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+
+CREATE TABLE IF NOT EXISTS interactions (
+    id                TEXT PRIMARY KEY,
+    user_id           TEXT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    track_id          TEXT NOT NULL,
+    interaction_type  TEXT NOT NULL
+        CHECK (interaction_type IN ('heart', 'skip', 'complete')),
+    feature           TEXT,
+    timestamp         TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_interactions_user_ts
+    ON interactions(user_id, timestamp DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_interactions_track_id ON interactions(track_id);
+
+CREATE TABLE IF NOT EXISTS taste_profile (
+    user_id     TEXT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    tag         TEXT NOT NULL,
+    score       REAL NOT NULL DEFAULT 0,
+    updated_at  TEXT NOT NULL,
+    PRIMARY KEY (user_id, tag)
+);
+
+CREATE INDEX IF NOT EXISTS idx_taste_profile_user_id ON taste_profile(user_id);
+"""
+
+
+_INCREMENT_SQL = (
+    "INSERT INTO taste_profile (user_id, tag, score, updated_at) VALUES (?, ?, ?, ?)"
+    " ON CONFLICT (user_id, tag) DO UPDATE"
+    " SET score = score + excluded.score, updated_at = excluded.updated_at"
+)
+
+
+def _ts(value) -> str:
+    return parse_timestamp(value).isoformat(timespec="microseconds")
+
+
+def _increment_params(deltas: dict[tuple[str, str], float]) -> list[tuple]:
+    now = _ts(None)
+    return [(uid, tag, delta, now) for (uid, tag), delta in deltas.items()]
+
+
+class SqliteBackend(StorageBackend):
+    name = "sqlite"
+
+    def __init__(self, path: str | Path, busy_timeout_s: float = 5.0) -> None:
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        # One connection shared across worker threads, serialised by a lock
+        self._conn = sqlite3.connect(
+            self.path, timeout=busy_timeout_s, check_same_thread=False, isolation_level=None
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _write(self, sql: str, params: list[tuple]) -> None:
+        with self._transaction() as conn:
+            conn.executemany(sql, params)
+
+    def _read(self, sql: str, params: tuple) -> list[dict]:
+        with self._lock:
+            return [dict(r) for r in self._conn.execute(sql, params).fetchall()]
+
+    def register_users(self, user_ids: list[str]) -> None:
+        self._write(
+            "INSERT INTO users (id) VALUES (?) ON CONFLICT (id) DO NOTHING",
+            [(uid,) for uid in user_ids],
+        )
+
+    def insert_interactions(self, rows: list[dict]) -> None:
+        self._write(
+            "INSERT INTO interactions (id, user_id, track_id, interaction_type, feature, timestamp)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    str(uuid.uuid4()),
+                    r["user_id"],
+                    r["track_id"],
+                    r["interaction_type"],
+                    r.get("feature"),
+                    _ts(r.get("timestamp")),
+                )
+                for r in rows
+            ],
+        )
+
+    def record_interactions(self, rows: list[dict]) -> int:
+        with self._transaction() as conn:
+            inserted = [
+                r
+                for r in rows
+                if conn.execute(
+                    "INSERT INTO interactions"
+                    " (id, user_id, track_id, interaction_type, feature, timestamp)"
+                    " VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (id) DO NOTHING",
+                    (
+                        r["id"],
+                        r["user_id"],
+                        r["track_id"],
+                        r["interaction_type"],
+                        r.get("feature"),
+                        _ts(r.get("timestamp")),
+                    ),
+                ).rowcount
+            ]
+            deltas = tag_deltas(inserted)
+            if deltas:
+                conn.executemany(_INCREMENT_SQL, _increment_params(deltas))
+        return len(inserted)
+
+    def increment_taste_profile(self, deltas: dict[tuple[str, str], float]) -> None:
+        self._write(_INCREMENT_SQL, _increment_params(deltas))
+
+    def get_taste_profile(self, user_id: str) -> list[dict]:
+        return self._read(
+            "SELECT tag, score FROM taste_profile WHERE user_id = ? ORDER BY score DESC",
+            (user_id,),
+        )
+
+    def get_interaction_history_page(self, user_id, types, limit, cursor, since) -> list[dict]:
+        sql = [
+            "SELECT id, track_id, interaction_type, feature, timestamp"
+            " FROM interactions WHERE user_id = ?"
+        ]
+        params: list = [user_id]
+        if types:
+            sql.append(f"AND interaction_type IN ({', '.join('?' * len(types))})")
+            params.extend(types)
+        if since is not None:
+            sql.append("AND timestamp >= ?")
+            params.append(_ts(since))
+        if cursor:
+            ts, row_id = decode_cursor(cursor)
+            sql.append("AND (timestamp < ? OR (timestamp = ? AND id < ?))")
+            params.extend([ts, ts, row_id])
+        sql.append("ORDER BY timestamp DESC, id DESC LIMIT ?")
+        params.append(limit)
+        return self._read(" ".join(sql), tuple(params))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
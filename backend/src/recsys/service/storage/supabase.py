@@ -0,0 +1,73 @@
+# src/recsys/service/storage/supabase.py
+"""Hosted Supabase via PostgREST (supabase-py v2 sync client)."""
+from __future__ import annotations
+
+from .base import StorageBackend, decode_cursor
+
+
+class SupabaseBackend(StorageBackend):
+    name = "supabase"
+
+    def __init__(self, client) -> None:
+        self.client = client
+
+    def register_users(self, user_ids: list[str]) -> None:
+        self.client.table("users").upsert(
+            [{"id": uid} for uid in user_ids], on_conflict="id"
+        ).execute()
+
+    def insert_interactions(self, rows: list[dict]) -> None:
+        self.client.table("interactions").insert(
+            [{**r, "timestamp": r.get("timestamp") or "now()"} for r in rows]
+        ).execute()
+
+    def record_interactions(self, rows: list[dict]) -> int:
+        # supabase/migrations/004_record_interactions.sql
+        resp = self.client.rpc(
+            "record_interactions",
+            {"events": rows},
+        ).execute()
+        return resp.data if isinstance(resp.data, int) else 0
+
+    def increment_taste_profile(self, deltas: dict[tuple[str, str], float]) -> None:
+        # supabase/migrations/002_taste_profile_increment.sql
+        self.client.rpc(
+            "increment_taste_profile",
+            {
+                "deltas": [
+                    {"user_id": uid, "tag": tag, "delta": delta}
+                    for (uid, tag), delta in deltas.items()
+                ]
+            },
+        ).execute()
+
+    def get_taste_profile(self, user_id: str) -> list[dict]:
+        resp = (
+            self.client.table("taste_profile")
+            .select("tag,score")
+            .eq("user_id", user_id)
+            .order("score", desc=True)
+            .execute()
+        )
+        return resp.data or []
+
+    def get_interaction_history_page(self, user_id, types, limit, cursor, since) -> list[dict]:
+        q = (
+            self.client.table("interactions")
+            .select("id,track_id,interaction_type,feature,timestamp")
+            .eq("user_id", user_id)
+        )
+        if types:
+            q = q.in_("interaction_type", types)
+        if since is not None:
+            q = q.gte("timestamp", since)
+        if cursor:
+            ts, row_id = decode_cursor(cursor)
+            q = q.or_(f'timestamp.lt."{ts}",and(timestamp.eq."{ts}",id.lt.{row_id})')
+        resp = (
+            q.order("timestamp", desc=True)
+            .order("id", desc=True)
+            .limit(limit)
+            .execute()
+        )
+        return resp.data or []
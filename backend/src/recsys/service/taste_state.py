@@ -0,0 +1,269 @@
+# src/recsys/service/taste_state.py
+"""
+Per-user taste state for Algorithmic Capture.
+
+Instead of re-reading a user's whole interaction history on every request,
+each user gets a small set of sufficient statistics:
+  tag_weights     weighted tag counts (heart = 1.0, complete = 0.5)
+  vec_sum/weight  running weighted sum of the interacted tracks' feature vectors
+  n_interactions  number of heart/complete interactions with catalog tracks
+
+Capture score, dominant/secondary tags and the taste vector are then
+O(tags) to derive. A state is hydrated from a recent history window the
+first time a user is seen (or after TASTE_STATE_TTL_S, which bounds drift)
+and updated incrementally by the interaction queue after each flushed batch.
+
+The queue applies a batch just after writing it, so a hydration can race
+it either way. begin_hydrate(), called before the history read, buffers
+the user's applied events so hydrate() can fold in those the read missed.
+Conversely a state remembers its history's event ids for a short while,
+and apply() skips events it already read from history.
+
+Recency weighting: every contribution is scaled by 2^((t - t0) / half-life)
+against a per-state anchor t0, so newer interactions count more without
+ever rescaling what's already summed. tag_scores() maps the weights back to
+"as of now" units. CAPTURE_HALF_LIFE_DAYS=0 turns decay off.
+
+States are tied to the recommender they were built against; a catalog hot
+swap makes them stale and they are rebuilt on next use.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import Counter, OrderedDict, deque
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+TASTE_STATE_MAX = int(os.getenv("TASTE_STATE_MAX", "10000"))
+TASTE_STATE_TTL_S = float(os.getenv("TASTE_STATE_TTL_S", "1800"))
+CAPTURE_HALF_LIFE_DAYS = float(os.getenv("CAPTURE_HALF_LIFE_DAYS", "90"))
+
+CAPTURE_WEIGHTS = {"heart": 1.0, "complete": 0.5}
+# How long after hydration apply() can still deliver an event the history
+# read already saw (the queue's gap between writing a batch and applying it)
+_DEDUPE_WINDOW_S = 60.0
+
+
+def track_tags(idx: int, recommender) -> list[str]:
+    meta_df = recommender.meta_df
+    if meta_df is None:
+        return []
+    meta = meta_df.iloc[idx]
+    raw = meta.get("tags") if hasattr(meta, "get") else None
+    if raw is None:
+        return []
+    if hasattr(raw, "tolist"):
+        raw = raw.tolist()
+    return [str(t).lower() for t in raw if t]
+
+
+def _epoch_seconds(timestamp) -> float:
+    """ISO-8601 string / datetime → epoch seconds; missing or unparseable → now."""
+    if isinstance(timestamp, datetime):
+        return timestamp.timestamp()
+    if isinstance(timestamp, str):
+        try:
+            return datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            pass
+    return time.time()
+
+
+@dataclass
+class UserTasteState:
+    recommender_ref: weakref.ref
+    expires_at: float
+    t0: float = field(default_factory=time.time)
+    half_life_s: float = CAPTURE_HALF_LIFE_DAYS * 86400
+    tag_weights: Counter = field(default_factory=Counter)
+    vec_sum: np.ndarray | None = None
+    vec_weight: float = 0.0
+    n_interactions: int = 0
+    history_ids: set[str] = field(default_factory=set)  # cleared after _DEDUPE_WINDOW_S
+
+    def _decay(self, t: float) -> float:
+        if self.half_life_s <= 0:
+            return 1.0
+        return 2.0 ** ((t - self.t0) / self.half_life_s)
+
+    def add(self, track_id, interaction_type: str, recommender, timestamp=None) -> None:
+        """
+        Fold one interaction in. Only heart/complete count, as in the history
+        query; track ids that aren't a row of the current catalog are ignored.
+        """
+        w = CAPTURE_WEIGHTS.get(interaction_type)
+        if w is None:
+            return
+        try:
+            idx = int(track_id)
+        except (ValueError, TypeError):
+            return
+        if not 0 <= idx < recommender.X.shape[0]:
+            return
+        self.n_interactions += 1
+        f = self._decay(_epoch_seconds(timestamp))
+        for tag in track_tags(idx, recommender):
+            self.tag_weights[tag] += w * f
+        row = np.asarray(recommender.X[idx], dtype=np.float64) * f
+        self.vec_sum = row if self.vec_sum is None else self.vec_sum + row
+        self.vec_weight += f
+
+    def tag_scores(self) -> Counter:
+        """Recency-weighted tag scores, expressed as of now."""
+        scale = 1.0 / self._decay(time.time())
+        return Counter({t: w * scale for t, w in self.tag_weights.items()})
+
+    def snapshot(self) -> "UserTasteState":
+        """Copy safe to read while apply() keeps mutating the original."""
+        return replace(self, tag_weights=Counter(self.tag_weights), history_ids=set())
+
+    def taste_vector(self) -> np.ndarray | None:
+        """Recency-weighted centroid of the interacted tracks' feature vectors."""
+        if self.vec_weight <= 0:
+            return None
+        return (self.vec_sum / self.vec_weight).astype(np.float32)
+
+
+def build_state(
+    history: list[dict],
+    recommender,
+    ttl_s: float = TASTE_STATE_TTL_S,
+    half_life_days: float = CAPTURE_HALF_LIFE_DAYS,
+) -> UserTasteState:
+    state = UserTasteState(
+        recommender_ref=weakref.ref(recommender),
+        expires_at=time.monotonic() + ttl_s,
+        half_life_s=half_life_days * 86400,
+        history_ids={str(h["id"]) for h in history if h.get("id") is not None},
+    )
+    for interaction in history:
+        state.add(
+            interaction.get("track_id"),
+            interaction.get("interaction_type"),
+            recommender,
+            interaction.get("timestamp"),
+        )
+    return state
+
+
+class TasteStateStore:
+    """Bounded LRU of UserTasteState keyed by user id. Thread-safe."""
+
+    def __init__(self, max_size: int = TASTE_STATE_MAX, ttl_s: float = TASTE_STATE_TTL_S) -> None:
+        self.max_size = max_size
+        self.ttl_s = ttl_s
+        self._states: OrderedDict[str, UserTasteState] = OrderedDict()
+        self._hydrating: dict[str, list[dict]] = {}  # user → buffers of applied events
+        self._dedupe: deque[tuple[float, UserTasteState]] = deque()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def get(self, user_id: str, recommender) -> UserTasteState | None:
+        """Cached state, or None if missing, expired or built on another catalog."""
+        with self._lock:
+            state = self._states.get(user_id)
+            if state is None:
+                return None
+            if state.expires_at < time.monotonic() or state.recommender_ref() is not recommender:
+                del self._states[user_id]
+                return None
+            self._states.move_to_end(user_id)
+            return state.snapshot()
+
+    def begin_hydrate(self, user_id: str) -> dict:
+        """
+        Start buffering user_id's applied events; call before reading the
+        history and pass the result to hydrate(). end_hydrate() it if the
+        read fails.
+        """
+        pending: dict = {}
+        with self._lock:
+            self._hydrating.setdefault(user_id, []).append(pending)
+        return pending
+
+    def end_hydrate(self, user_id: str, pending: dict) -> None:
+        with self._lock:
+            self._end_hydrate(user_id, pending)
+
+    def _end_hydrate(self, user_id: str, pending: dict) -> None:
+        buffers = self._hydrating.get(user_id, [])
+        if any(b is pending for b in buffers):
+            buffers[:] = [b for b in buffers if b is not pending]
+        if not buffers:
+            self._hydrating.pop(user_id, None)
+
+    def _expire_dedupe(self, now: float) -> None:
+        while self._dedupe and self._dedupe[0][0] < now:
+            self._dedupe.popleft()[1].history_ids.clear()
+
+    def hydrate(
+        self, user_id: str, history: list[dict], recommender, pending: dict | None = None
+    ) -> UserTasteState:
+        """
+        Build a state from full history and cache it. `pending` (from
+        begin_hydrate) adds the events applied since then that the history
+        doesn't contain yet.
+        """
+        state = build_state(history, recommender, self.ttl_s)
+        now = time.monotonic()
+        with self._lock:
+            if pending is not None:
+                self._end_hydrate(user_id, pending)
+                for e in pending.values():
+                    if str(e.get("id")) not in state.history_ids:
+                        state.add(
+                            e.get("track_id"), e.get("interaction_type"), recommender, e.get("timestamp")
+                        )
+            self._expire_dedupe(now)
+            if state.history_ids:
+                self._dedupe.append((now + _DEDUPE_WINDOW_S, state))
+            self._states[user_id] = state
+            self._states.move_to_end(user_id)
+            while len(self._states) > self.max_size:
+                self._states.popitem(last=False)
+            return state.snapshot()
+
+    def apply(self, events: list[dict]) -> int:
+        """
+        Fold logged interactions into the states of users already cached,
+        skipping events a state already read from history. Users without a
+        state pick these up from history (or a begin_hydrate buffer) when
+        hydrated. Returns the number of events applied.
+        """
+        applied = 0
+        with self._lock:
+            self._expire_dedupe(time.monotonic())
+            for e in events:
+                user_id = e.get("user_id")
+                for pending in self._hydrating.get(user_id, ()):
+                    pending.setdefault(e.get("id") or id(e), e)
+                state = self._states.get(user_id)
+                if state is None or str(e.get("id")) in state.history_ids:
+                    continue
+                recommender = state.recommender_ref()
+                if recommender is None:
+                    continue
+                state.add(
+                    e.get("track_id"), e.get("interaction_type"), recommender, e.get("timestamp")
+                )
+                applied += 1
+        return applied
+
+    def clear(self) -> None:
+        with self._lock:
+            self._states.clear()
+            self._hydrating.clear()
+            self._dedupe.clear()
+
+
+store = TasteStateStore()
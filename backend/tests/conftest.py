@@ -2,12 +2,14 @@
 """
 Shared test configuration and fixtures for all DSCVR API tests.
 
-Module-level patches run at import time (before api.py is first loaded),
-so the heavy artifact-loading in CosineRecommender and SearchIndex never
-touches the filesystem during tests.
+The API loads its artifacts through a ServiceContainer; the client fixture
+swaps in a container whose loader builds a small in-memory catalog, so
+nothing touches the filesystem during tests.
 """
 from __future__ import annotations
 
+import json
+
 import numpy as np
 import pandas as pd
 import pytest
@@ -55,63 +57,30 @@ class _FakePipeline:
         return np.ones((len(texts), 50), dtype=np.float32)
 
 
-def _fake_cosine_init(self) -> None:
-    """Replacement __init__ — uses in-memory data, no disk reads."""
+def _fake_recommender():
+    from src.recsys.recommenders.cosine import CosineRecommender
+
     # Use positive random values (fixed seed) so cosine similarities are
     # all non-zero — identity matrix makes tracks orthogonal which causes
     # similar_by_index to return no results (it stops at cos_sim <= 0).
     rng = np.random.default_rng(42)
-    self.X = rng.random((N, 50)).astype(np.float32)
-    self.id_map = _fake_id_map()
-    self.meta_df = _fake_meta_df()
-    self._pipeline = _FakePipeline()  # prevents joblib.load call
-
-
-# ── Apply module-level patches before api.py is ever imported ────────────────
-# These run at conftest-import time (pytest loads conftest before test files).
+    return CosineRecommender(
+        rng.random((N, 50)).astype(np.float32),
+        _fake_id_map(),
+        meta_df=_fake_meta_df(),
+        pipeline=_FakePipeline(),  # prevents joblib.load call
+    )
 
-import src.recsys.recommenders.cosine as _cosine_mod  # noqa: E402
-_cosine_mod.CosineRecommender.__init__ = _fake_cosine_init
 
-import src.recsys.search as _search_mod  # noqa: E402
+def _fake_catalog():
+    from src.recsys.service.container import build_catalog
 
-_orig_search_init = _search_mod.SearchIndex.__init__
-
-
-def _fake_search_init(self, df: pd.DataFrame) -> None:
-    from src.recsys.search import norm, EM_DASH
-    self.exact_index = {
-        norm(f"Track {i} {EM_DASH} Artist {i % 5}"): i for i in range(N)
-    }
-    self._df = df
-
-
-def _fake_search_match(self, query: str, limit: int = 8):
-    return (0, 95.0, [0, 1, 2])
-
-
-def _fake_search_top_matches(self, query: str, limit: int = 8) -> list[dict]:
-    return [
-        {
-            "row_index": i,
-            "title": f"Track {i}",
-            "artist": f"Artist {i % 5}",
-            "score": float(95 - i),
-            "artwork_url": None,
-            "preview_url": None,
-        }
-        for i in range(min(limit, N))
-    ]
-
-
-_search_mod.SearchIndex.__init__ = _fake_search_init
-_search_mod.SearchIndex.match = _fake_search_match
-_search_mod.SearchIndex.top_matches = _fake_search_top_matches
+    return build_catalog(_fake_recommender())
 
 
 # ── Canned Gemini responses ──────────────────────────────────────────────────
 
-def _gemini_response(prompt: str):
+def _gemini_response(prompt: str, **kwargs):
     """
     Returns appropriate fake JSON depending on context.
     - If the prompt looks like a 'filter living artists' prompt → list of names
@@ -135,15 +104,23 @@ def _gemini_response(prompt: str):
     }
 
 
+async def _gemini_stream(prompt: str, **kwargs):
+    """_gemini_response served in small chunks, the way Gemini streams it."""
+    text = "```json\n" + json.dumps(_gemini_response(prompt), indent=2) + "\n```"
+    for i in range(0, len(text), 16):
+        yield text[i:i + 16]
+
+
 # ── Fixtures ─────────────────────────────────────────────────────────────────
 
 @pytest.fixture
-def client():
+def client(tmp_path):
     """
     FastAPI TestClient with ALL external dependencies mocked:
-      - Gemini (generate_json)
+      - Gemini (agenerate_json, astream_json)
       - Preview resolver (resolve_batch)
-      - Supabase DB helpers
+      - Supabase DB helpers (interaction writes go through a fast-flushing queue
+        spooling to tmp_path)
       - Last.fm (seance._lastfm_similar_artists)
     """
     fake_history = [
@@ -153,18 +130,23 @@ def client():
 
     with (
         patch(
-            "src.recsys.service.gemini_client.generate_json",
+            "src.recsys.service.gemini_client.agenerate_json",
             side_effect=_gemini_response,
         ),
+        patch(
+            "src.recsys.service.gemini_client.astream_json",
+            new=_gemini_stream,
+        ),
         patch(
             "src.recsys.service.preview_resolver.resolve_batch",
             new=AsyncMock(side_effect=lambda tracks: tracks),
         ),
         patch("src.recsys.service.db.log_interaction"),
         patch("src.recsys.service.db.update_taste_profile"),
-        patch("src.recsys.service.db.register_user"),
+        patch("src.recsys.service.db.awrite_interactions", return_value=True),
+        patch("src.recsys.service.db.aregister_user"),
         patch(
-            "src.recsys.service.db.get_interaction_history",
+            "src.recsys.service.db.aget_interaction_history",
             return_value=fake_history,
         ),
         patch(
@@ -172,8 +154,24 @@ def client():
             return_value=["Artist 0", "Artist 1", "Artist 2", "Artist 3"],
         ),
     ):
+        from src.recsys.service.container import ServiceContainer
         from src.recsys.service.api import app
         from fastapi.testclient import TestClient
 
-        with TestClient(app, raise_server_exceptions=True) as c:
+        from src.recsys.service.api import _current_recommender
+        from src.recsys.service.interaction_queue import InteractionQueue
+        from src.recsys.service.session_pool import SessionPool
+        from src.recsys.service.taste_state import TasteStateStore
+
+        services = ServiceContainer(loader=_fake_catalog, warmup="eager")
+        queue = InteractionQueue(
+            flush_interval_s=0.01, spool_path=tmp_path / "interactions.jsonl"
+        )
+        with (
+            patch("src.recsys.service.api.services", services),
+            patch("src.recsys.service.api.interaction_queue", queue),
+            patch("src.recsys.service.api.blind_sessions", SessionPool(_current_recommender)),
+            patch("src.recsys.service.taste_state.store", TasteStateStore()),
+            TestClient(app, raise_server_exceptions=True) as c,
+        ):
             yield c
@@ -75,7 +75,7 @@ class TestAlgorithmicCaptureAPI:
         from unittest.mock import patch
 
         with patch(
-            "src.recsys.service.db.get_interaction_history",
+            "src.recsys.service.db.aget_interaction_history",
             return_value=[],  # zero history
         ):
             body = client.get("/algorithmic-capture?user_id=new-user").json()
@@ -87,7 +87,7 @@ class TestAlgorithmicCaptureAPI:
         from unittest.mock import patch
 
         with patch(
-            "src.recsys.service.db.get_interaction_history",
+            "src.recsys.service.db.aget_interaction_history",
             return_value=[],
         ):
             body = client.get("/algorithmic-capture?user_id=new-user").json()
@@ -112,7 +112,7 @@ class TestAlgorithmicCaptureAPI:
 
         captured_uid = []
 
-        def capture_history(user_id, types=None):
+        def capture_history(user_id, types=None, **kwargs):
             captured_uid.append(user_id)
             return [
                 {"track_id": str(i), "interaction_type": "heart", "feature": "explore"}
@@ -120,7 +120,7 @@ class TestAlgorithmicCaptureAPI:
             ]
 
         with patch(
-            "src.recsys.service.db.get_interaction_history",
+            "src.recsys.service.db.aget_interaction_history",
             side_effect=capture_history,
         ):
             client.get(
@@ -0,0 +1,145 @@
+# tests/test_artifacts.py
+"""
+Tests for versioned artifact bundles and hot-swapping the catalog.
+"""
+import asyncio
+
+import pytest
+from unittest.mock import patch
+
+
+class TestArtifactLayout:
+    def test_flat_layout_without_current(self, tmp_path):
+        from src.recsys import artifacts
+
+        assert artifacts.resolve_dir(art_root=tmp_path) == (None, tmp_path)
+
+    def test_publish_points_current_at_version(self, tmp_path):
+        from src.recsys import artifacts
+
+        version, path = artifacts.new_version_dir("v1", art_root=tmp_path)
+        artifacts.publish(version, art_root=tmp_path)
+
+        assert artifacts.current_version(art_root=tmp_path) == "v1"
+        assert artifacts.resolve_dir(art_root=tmp_path) == ("v1", path)
+        assert artifacts.list_versions(art_root=tmp_path) == ["v1"]
+
+    def test_publish_unknown_version_raises(self, tmp_path):
+        from src.recsys import artifacts
+
+        with pytest.raises(FileNotFoundError):
+            artifacts.publish("missing", art_root=tmp_path)
+
+    @pytest.mark.parametrize("version", ["..", "../..", "v1/../../etc", "/tmp", "..\\x"])
+    def test_version_names_cannot_escape_versions_dir(self, tmp_path, version):
+        from src.recsys import artifacts
+
+        (tmp_path / "versions").mkdir()
+        with pytest.raises(ValueError):
+            artifacts.resolve_dir(version, art_root=tmp_path)
+
+
+def _versioned_loader(version=None):
+    from src.recsys.service.container import build_catalog
+    from tests.conftest import _fake_recommender
+
+    return build_catalog(_fake_recommender(), version=version or "v1")
+
+
+def _broken_loader(version=None):
+    from src.recsys.service.container import build_catalog
+    from tests.conftest import _fake_recommender
+
+    rec = _fake_recommender()
+    rec.id_map = rec.id_map[:5]  # row count no longer matches features.npy
+    return build_catalog(rec, version=version)
+
+
+class TestHotSwap:
+    @pytest.mark.asyncio
+    async def test_reload_swaps_catalog(self):
+        from src.recsys.service.container import ServiceContainer
+
+        services = ServiceContainer(loader=_versioned_loader, warmup="eager")
+        await services.start()
+        old = await services.catalog()
+
+        result = await services.reload("v2")
+
+        assert result["ok"] is True
+        assert result["previous"] == "v1"
+        assert services.version == "v2"
+        new = await services.catalog()
+        assert new is not old
+        # A request that grabbed the old catalog still holds a consistent bundle
+        assert old.version == "v1"
+        await services.stop()
+
+    @pytest.mark.asyncio
+    async def test_invalid_bundle_is_rejected(self):
+        from src.recsys.service.container import ServiceContainer
+
+        services = ServiceContainer(loader=_versioned_loader, warmup="eager")
+        await services.start()
+        services._loader = _broken_loader
+
+        result = await services.reload("v2")
+
+        assert result["ok"] is False
+        assert "id_map" in result["error"]
+        assert services.version == "v1"
+        await services.stop()
+
+    @pytest.mark.asyncio
+    async def test_stop_waits_for_cancelled_reload(self):
+        import threading
+
+        from src.recsys.service.container import ServiceContainer
+
+        release = threading.Event()
+
+        def _slow_loader(version=None):
+            release.wait(5)
+            return _versioned_loader(version)
+
+        services = ServiceContainer(loader=_versioned_loader, warmup="eager")
+        await services.start()
+        services._loader = _slow_loader
+        assert services.schedule_reload("v2")
+        reload_task = services._reload_task
+        await asyncio.sleep(0.05)  # reload is now blocked in the loader thread
+
+        await services.stop()
+        release.set()
+
+        assert reload_task.cancelled()
+        assert services.version == "v1"
+
+
+class TestAdminAPI:
+    def test_admin_disabled_without_token(self, client):
+        assert client.get("/admin/artifacts").status_code == 403
+        assert client.post("/admin/reload").status_code == 403
+
+    def test_reload_with_token(self, client):
+        with patch("src.recsys.service.api.ADMIN_TOKEN", "secret"):
+            assert (
+                client.get("/admin/artifacts", headers={"X-Admin-Token": "wrong"}).status_code
+                == 403
+            )
+            res = client.post(
+                "/admin/reload?wait=true", headers={"X-Admin-Token": "secret"}
+            )
+        assert res.status_code == 202
+        assert res.json()["ok"] is True
+        assert client.get("/health").json()["ready"] is True
+
+    def test_reload_rejects_path_traversal(self, client):
+        with patch("src.recsys.service.api.ADMIN_TOKEN", "secret"):
+            res = client.post(
+                "/admin/reload?wait=true",
+                headers={"X-Admin-Token": "secret"},
+                json={"version": "../.."},
+            )
+        assert res.status_code == 422
+        assert "Invalid artifact version" in res.json()["detail"]["error"]
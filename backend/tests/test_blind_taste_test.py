@@ -134,3 +134,151 @@ class TestBlindTasteTestUnit:
         result = reveal([0], rec)
         assert "tags" in result["tracks"][0]
         assert isinstance(result["tracks"][0]["tags"], list)
+
+
+class TestPreviewPool:
+    def _rec(self, urls):
+        rec = MagicMock()
+        rec.id_map = [{"title": f"T{i}", "artist": "A", "preview_url": None} for i in range(len(urls))]
+        rec.meta_df = pd.DataFrame({"preview_url": urls})
+        return rec
+
+    def test_sessions_only_use_playable_rows(self):
+        import numpy as np
+        from src.recsys.service.features.blind_taste_test import get_session
+
+        urls = [f"https://p/{i}" if i % 3 == 0 else None for i in range(60)]
+        urls[3] = "https://itunes.apple.com/stale.m4p"
+        rec = self._rec(urls)
+
+        for seed in range(20):
+            tracks = get_session(rec, rng=np.random.default_rng(seed))["tracks"]
+            rows = [t["row_index"] for t in tracks]
+            assert len(set(rows)) == 10
+            assert all(r % 3 == 0 and r != 3 for r in rows)
+            assert all(t["preview_url"] == f"https://p/{t['row_index']}" for t in tracks)
+
+    def test_small_catalog_keeps_all_playable_and_pads(self):
+        import numpy as np
+        from src.recsys.service.features.blind_taste_test import get_session
+
+        rec = self._rec(["https://p/0", float("nan"), "https://p/2"] + [None] * 9)
+        rows = [t["row_index"] for t in get_session(rec, rng=np.random.default_rng(0))["tracks"]]
+
+        assert len(rows) == 10 == len(set(rows))
+        assert {0, 2} <= set(rows)
+
+    def test_pool_built_once_per_recommender(self):
+        from src.recsys.service.features import blind_taste_test as feat
+
+        rec = self._rec([f"https://p/{i}" for i in range(12)])
+        pool = feat.preview_pool(rec)
+        feat.get_session(rec)
+        assert feat.preview_pool(rec) is pool
+
+        other = self._rec([None] * 12)
+        assert len(feat.preview_pool(other).playable) == 0
+
+    def test_pool_built_at_catalog_load(self):
+        from unittest.mock import patch
+        from src.recsys.service import container
+        from src.recsys.service.features import blind_taste_test as feat
+
+        rec = self._rec([f"https://p/{i}" for i in range(12)])
+        rec.meta_df["title"] = rec.meta_df["artist"] = "x"
+        with patch.object(container, "SearchIndex"):
+            container.build_catalog(rec)
+
+        with patch.object(feat, "_build_pool") as build:
+            feat.get_session(rec)
+        build.assert_not_called()
+
+
+class TestSessionPool:
+    @staticmethod
+    def _session(tag, preview_url=None):
+        return {"tracks": [{"row_index": 0, "preview_url": preview_url, "youtube_id": tag}]}
+
+    @staticmethod
+    def _recommender():
+        class Recommender:
+            pass
+
+        return Recommender()
+
+    async def test_prewarmed_session_is_popped_without_building(self):
+        import asyncio
+        from unittest.mock import patch
+        from src.recsys.service.session_pool import SessionPool
+
+        rec = self._recommender()
+        built = []
+
+        async def build(recommender):
+            built.append(recommender)
+            return self._session(f"s{len(built)}")
+
+        with patch("src.recsys.service.features.blind_taste_test.build_session", side_effect=build):
+            pool = SessionPool(lambda: rec, size=2, sweep_s=60)
+            await pool.start()
+            for _ in range(100):
+                if pool.depth == 2:
+                    break
+                await asyncio.sleep(0.01)
+            before = len(built)
+            session = await pool.get(rec)
+            await pool.stop()
+
+        assert before == 2
+        assert session["tracks"][0]["youtube_id"] == "s1"
+        assert pool.stats()["hits"] == 1
+
+    async def test_empty_pool_builds_inline(self):
+        from unittest.mock import patch
+        from src.recsys.service.session_pool import SessionPool
+
+        rec = self._recommender()
+        with patch(
+            "src.recsys.service.features.blind_taste_test.build_session",
+            return_value=self._session("inline"),
+        ):
+            pool = SessionPool(lambda: rec, size=0)
+            session = await pool.get(rec)
+
+        assert session["tracks"][0]["youtube_id"] == "inline"
+        assert pool.stats()["misses"] == 1
+
+    async def test_expiring_and_stale_catalog_sessions_are_skipped(self):
+        import time
+        import weakref
+        from unittest.mock import patch
+        from src.recsys.service.session_pool import SessionPool, _Entry
+
+        rec, old_rec = self._recommender(), self._recommender()
+        pool = SessionPool(lambda: rec, size=0, expiry_margin_s=60)
+        now = time.time()
+        pool._sessions.extend([
+            _Entry(weakref.ref(old_rec), now + 3600, self._session("old catalog")),
+            _Entry(weakref.ref(rec), now + 30, self._session("expiring")),
+            _Entry(weakref.ref(rec), now + 3600, self._session("fresh")),
+        ])
+
+        with patch("src.recsys.service.features.blind_taste_test.build_session") as build:
+            session = await pool.get(rec)
+
+        assert session["tracks"][0]["youtube_id"] == "fresh"
+        build.assert_not_called()
+        stats = pool.stats()
+        assert (stats["stale_catalog"], stats["expired"]) == (1, 1)
+
+    def test_expiry_follows_earliest_signed_preview_url(self):
+        from src.recsys.service.session_pool import session_expires_at
+
+        session = {"tracks": [
+            {"preview_url": "https://cdnt-preview.dzcdn.net/a.mp3?hdnea=exp=1000~acl=*~hmac=x"},
+            {"preview_url": "https://cdnt-preview.dzcdn.net/b.mp3?hdnea=exp=900~acl=*~hmac=y"},
+            {"preview_url": None},
+        ]}
+
+        assert session_expires_at(session, built_at=0, max_age_s=5000) == 900
+        assert session_expires_at({"tracks": []}, built_at=100, max_age_s=50) == 150
@@ -0,0 +1,152 @@
+# tests/test_crawler.py
+"""
+Tests for the ETL crawler plumbing (rate limiting, retries, single-flight)
+and the concurrent Last.fm ETL phases built on it. No network: the pooled
+session and the Last.fm helpers are faked.
+"""
+import threading
+import time
+
+import pandas as pd
+import pytest
+from unittest.mock import MagicMock, patch
+
+
+def _response(status, retry_after=None):
+    resp = MagicMock(status_code=status)
+    resp.headers = {} if retry_after is None else {"Retry-After": str(retry_after)}
+    return resp
+
+
+@pytest.fixture
+def http():
+    from src.recsys.crawler import RateLimitedHTTP
+
+    http = RateLimitedHTTP(rates={"api.example.com": 1000}, retries=2, backoff_s=0.001, max_backoff_s=0.01)
+    http.session = MagicMock()
+    with patch.object(http, "_session", return_value=http.session):
+        yield http
+
+
+class TestRateLimitedHTTP:
+    def test_retries_throttled_and_server_errors(self, http):
+        http.session.get.side_effect = [_response(429, retry_after=0), _response(503), _response(200)]
+
+        assert http.get("https://api.example.com/x").status_code == 200
+        assert http.session.get.call_count == 3
+        assert http.stats()["api.example.com"] == {"requests": 3, "retries": 2, "throttled": 1}
+
+    def test_returns_last_response_once_retries_run_out(self, http):
+        http.session.get.return_value = _response(500)
+
+        assert http.get("https://api.example.com/x").status_code == 500
+        assert http.session.get.call_count == 3
+
+    def test_client_errors_are_not_retried(self, http):
+        http.session.get.return_value = _response(404)
+
+        assert http.get("https://api.example.com/x").status_code == 404
+        assert http.session.get.call_count == 1
+
+    def test_connection_errors_retry_then_raise(self, http):
+        import requests
+
+        http.session.get.side_effect = requests.ConnectionError("reset")
+
+        with pytest.raises(requests.ConnectionError):
+            http.get("https://api.example.com/x")
+        assert http.session.get.call_count == 3
+
+    def test_retry_after_is_capped(self, http):
+        http.session.get.side_effect = [_response(429, retry_after=3600), _response(200)]
+
+        started = time.monotonic()
+        http.get("https://api.example.com/x")
+        assert time.monotonic() - started < 1
+
+
+class TestConcurrencyHelpers:
+    def test_token_bucket_spaces_requests(self):
+        from src.recsys.crawler import TokenBucket
+
+        bucket = TokenBucket(rate=50, burst=1)
+        started = time.monotonic()
+        for _ in range(6):
+            bucket.acquire()
+        # one banked token, then 5 more at 50/s
+        assert time.monotonic() - started >= 0.09
+
+    def test_single_flight_shares_one_call(self):
+        from src.recsys.crawler import SingleFlight
+
+        flight = SingleFlight()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.05)
+            return "done"
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(flight.do("k", slow))) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert results == ["done"] * 5
+        assert len(calls) == 1
+
+    def test_map_concurrent_keeps_input_order(self):
+        from src.recsys.crawler import map_concurrent
+
+        def f(x):
+            time.sleep(0.001 * (10 - x))
+            return x * x
+
+        assert map_concurrent(f, range(10), concurrency=4) == [x * x for x in range(10)]
+
+
+class TestConcurrentETL:
+    def test_cached_lastfm_fetches_each_entry_once(self, tmp_path):
+        from src.recsys import etl_lastfm
+        from src.recsys.cache import DirCache
+        from src.recsys.crawler import map_concurrent
+
+        def fake_lastfm(params):
+            time.sleep(0.02)
+            return {"artist": params["artist"]}
+
+        with (
+            patch.object(etl_lastfm, "_lastfm_cache", DirCache(tmp_path)),
+            patch.object(etl_lastfm, "_lastfm", side_effect=fake_lastfm) as lastfm,
+        ):
+            results = map_concurrent(
+                lambda a: etl_lastfm._cached_lastfm("artist_tags", f"artist:{a}", {"artist": a}),
+                ["Hole", "Hole", "Hole", "Nirvana"],
+                concurrency=4,
+            )
+            again = etl_lastfm._cached_lastfm("artist_tags", "artist:Hole", {"artist": "Hole"})
+
+        assert [r["artist"] for r in results] == ["Hole", "Hole", "Hole", "Nirvana"]
+        assert again == {"artist": "Hole"}
+        assert lastfm.call_count == 2
+
+    def test_expand_via_similar_matches_serial_order(self):
+        from src.recsys import etl_lastfm
+
+        df = pd.DataFrame(
+            [{"title": f"T{i}", "artist": "A", "source": "chart:p1", "seed_group": None} for i in range(30)]
+        )
+
+        def similar(title, artist, limit):
+            return [{"title": f"{title}-sim{k}", "artist": "B"} for k in range(limit)] + [
+                {"title": "T0", "artist": "A"}
+            ]
+
+        with patch.object(etl_lastfm, "track_get_similar", side_effect=similar):
+            out = etl_lastfm.expand_via_similar(df, per_track=2, max_new=7, concurrency=3)
+
+        added = out.iloc[30:]
+        assert list(added["title"]) == ["T0-sim0", "T0-sim1", "T1-sim0", "T1-sim1", "T2-sim0", "T2-sim1", "T3-sim0"]
+        assert set(added["source"]) == {"similar:chart:p1"}
@@ -0,0 +1,231 @@
+# tests/test_db.py
+"""
+Tests for the Supabase helpers in db.py, against a mocked client.
+"""
+import pytest
+from unittest.mock import MagicMock, patch
+
+
+@pytest.fixture(autouse=True)
+def _fresh_known_users():
+    from src.recsys.service import db
+
+    db._known_users.clear()
+    yield
+    db._known_users.clear()
+
+
+def _rpc_deltas(client):
+    (name, params), _ = client.rpc.call_args
+    assert name == "increment_taste_profile"
+    return {(d["user_id"], d["tag"]): d["delta"] for d in params["deltas"]}
+
+
+class TestTasteProfileIncrements:
+    def test_single_rpc_no_read(self):
+        from src.recsys.service import db
+
+        client = MagicMock()
+        with patch.object(db, "get_client", return_value=client):
+            db.update_taste_profile("u1", ["pop", "indie"], "heart")
+
+        client.rpc.assert_called_once()
+        client.table.assert_not_called()  # no select → no read-modify-write
+        assert _rpc_deltas(client) == {("u1", "pop"): 1.0, ("u1", "indie"): 1.0}
+
+    def test_batched_triples_are_aggregated(self):
+        from src.recsys.service import db
+
+        client = MagicMock()
+        with patch.object(db, "get_client", return_value=client):
+            db.update_taste_profiles(
+                [("u1", "pop", 1.0), ("u1", "pop", -0.3), ("u2", "rock", 0.5), ("u2", "jazz", 0)]
+            )
+
+        client.rpc.assert_called_once()
+        deltas = _rpc_deltas(client)
+        assert deltas.keys() == {("u1", "pop"), ("u2", "rock")}
+        assert abs(deltas[("u1", "pop")] - 0.7) < 1e-9
+
+    def test_write_interactions_uses_rpc(self):
+        from src.recsys.service import db
+
+        client = MagicMock()
+        events = [
+            {"user_id": "u1", "track_id": "1", "interaction_type": "heart", "tags": ["pop"]},
+            {"user_id": "u1", "track_id": "2", "interaction_type": "skip", "tags": ["pop"]},
+        ]
+        with patch.object(db, "get_client", return_value=client):
+            assert db.write_interactions(events) is True
+
+        # Insert + increment happen in one RPC; only the users upsert is a table call
+        assert [c.args[0] for c in client.table.call_args_list] == ["users"]
+        (name, params), _ = client.rpc.call_args
+        assert name == "record_interactions"
+        rows = params["events"]
+        assert [(r["track_id"], r["weight"], r["tags"]) for r in rows] == [
+            ("1", 1.0, ["pop"]),
+            ("2", -0.3, ["pop"]),
+        ]
+        assert len({r["id"] for r in rows}) == 2
+
+    def test_event_ids_become_row_ids(self):
+        from src.recsys.service import db
+
+        client = MagicMock()
+        event = {"id": "e1", "user_id": "u1", "track_id": "1", "interaction_type": "heart"}
+        with patch.object(db, "get_client", return_value=client):
+            assert db.write_interactions([event, dict(event)]) is True
+
+        (_, params), _ = client.rpc.call_args
+        assert [r["id"] for r in params["events"]] == ["e1"]
+
+    def test_write_interactions_reports_failure(self):
+        from src.recsys.service import db
+
+        client = MagicMock()
+        client.rpc.return_value.execute.side_effect = RuntimeError("boom")
+        events = [{"user_id": "u1", "track_id": "1", "interaction_type": "heart", "tags": ["pop"]}]
+        with patch.object(db, "get_client", return_value=client):
+            assert db.write_interactions(events) is False
+
+
+class TestKnownUsers:
+    def test_repeat_registration_skips_upsert(self):
+        from src.recsys.service import db
+
+        client = MagicMock()
+        with patch.object(db, "get_client", return_value=client):
+            db.register_user("u1")
+            db.register_user("u1")
+            db.register_users(["u1", "u2"])
+
+        upserts = client.table.return_value.upsert.call_args_list
+        assert [c.args[0] for c in upserts] == [[{"id": "u1"}], [{"id": "u2"}]]
+        assert db.is_registered("u2")
+
+    def test_failed_upsert_is_not_cached(self):
+        from src.recsys.service import db
+
+        client = MagicMock()
+        client.table.return_value.upsert.return_value.execute.side_effect = RuntimeError("down")
+        with patch.object(db, "get_client", return_value=client):
+            db.register_user("u1")
+        assert not db.is_registered("u1")
+
+    def test_ttl_and_bound(self):
+        from src.recsys.service.db import _KnownUsers
+
+        known = _KnownUsers(max_size=2, ttl_s=60)
+        known.add_many(["a", "b", "c"])
+        assert "a" not in known and "b" in known and "c" in known
+
+        expired = _KnownUsers(ttl_s=-1)
+        expired.add_many(["a"])
+        assert "a" not in expired
+
+    def test_write_interactions_upserts_only_new_users(self):
+        from src.recsys.service import db
+
+        db._known_users.add_many(["u1"])
+        client = MagicMock()
+        events = [
+            {"user_id": "u1", "track_id": "1", "interaction_type": "complete"},
+            {"user_id": "u2", "track_id": "2", "interaction_type": "complete"},
+        ]
+        with patch.object(db, "get_client", return_value=client):
+            assert db.write_interactions(events) is True
+
+        (rows,), _ = client.table.return_value.upsert.call_args
+        assert rows == [{"id": "u2"}]
+
+
+class _FakeQuery:
+    """Chainable stand-in for a PostgREST query that serves pages of `rows`."""
+
+    def __init__(self, rows, log):
+        self.rows = rows
+        self.calls = []
+        log.append(self.calls)
+
+    def __getattr__(self, name):
+        def method(*args, **kwargs):
+            self.calls.append((name, args))
+            return self
+
+        return method
+
+    def execute(self):
+        args = dict(self.calls)
+        rows = self.rows
+        if "or_" in args:
+            # rows are newest-first; resume after the timestamp the cursor names
+            ts = args["or_"][0].split('"')[1]
+            rows = [r for r in rows if r["timestamp"] < ts]
+        return MagicMock(data=rows[: args["limit"][0]])
+
+
+class TestInteractionHistoryPaging:
+    def _client(self, n, log):
+        rows = [
+            {
+                "id": f"id{i:03d}",
+                "track_id": str(i),
+                "interaction_type": "heart",
+                "timestamp": f"2024-01-01T00:{59 - i:02d}:00+00:00",
+            }
+            for i in range(n)
+        ]
+        client = MagicMock()
+        client.table.side_effect = lambda name: _FakeQuery(rows, log)
+        return client
+
+    def test_full_history_is_fetched_page_by_page(self):
+        from src.recsys.service import db
+
+        log = []
+        with (
+            patch.object(db, "get_client", return_value=self._client(7, log)),
+            patch.object(db, "HISTORY_PAGE_SIZE", 3),
+        ):
+            rows = db.get_interaction_history("u1")
+
+        assert [r["track_id"] for r in rows] == [str(i) for i in range(7)]
+        assert len(log) == 3
+
+    def test_limit_returns_last_n(self):
+        from src.recsys.service import db
+
+        log = []
+        with (
+            patch.object(db, "get_client", return_value=self._client(7, log)),
+            patch.object(db, "HISTORY_PAGE_SIZE", 3),
+        ):
+            rows = db.get_interaction_history("u1", limit=4)
+
+        assert [r["track_id"] for r in rows] == ["0", "1", "2", "3"]
+        assert [dict(q)["limit"] for q in log] == [(3,), (1,)]
+
+    def test_page_cursor(self):
+        from src.recsys.service import db
+
+        log = []
+        with patch.object(db, "get_client", return_value=self._client(3, log)):
+            page, cursor = db.get_interaction_history_page("u1", limit=2)
+            assert cursor == "2024-01-01T00:58:00+00:00|id001"
+            page2, cursor2 = db.get_interaction_history_page("u1", limit=2, cursor=cursor)
+
+        assert [r["track_id"] for r in page + page2] == ["0", "1", "2"]
+        assert cursor2 is None
+
+    def test_since_filter_is_applied(self):
+        from datetime import datetime, timezone
+        from src.recsys.service import db
+
+        log = []
+        with patch.object(db, "get_client", return_value=self._client(0, log)):
+            db.get_interaction_history_page(
+                "u1", since=datetime(2024, 1, 1, tzinfo=timezone.utc)
+            )
+
+        assert ("gte", ("timestamp", "2024-01-01T00:00:00+00:00")) in log[0]
@@ -0,0 +1,166 @@
+# tests/test_etl_lastfm.py
+"""
+Tests for the Last.fm catalog build: enrichment, incremental updates and
+the versioned snapshots + changelog it writes. The API helpers are faked.
+"""
+import json
+import time
+
+import pandas as pd
+from unittest.mock import MagicMock, patch
+
+
+class TestEnrichment:
+    def test_enrich_candidates_looks_up_each_track_once(self):
+        from src.recsys import etl_lastfm
+
+        df = pd.DataFrame(
+            {"title": ["Lithium", "Alison", "Lithium"], "artist": ["Nirvana", "Slowdive", "Nirvana"],
+             "source": ["chart:p1", "chart:p1", "geo:de"]}
+        )
+
+        with (
+            patch.object(etl_lastfm, "track_get_tags_cached", return_value=["grunge"]) as tags,
+            patch.object(etl_lastfm, "_cached_itunes_preview", return_value=(None, None)),
+        ):
+            out = etl_lastfm.enrich_candidates(df, concurrency=2)
+
+        assert list(out["title"]) == ["Lithium", "Alison"]
+        assert list(out["source"]) == ["chart:p1", "chart:p1"]
+        assert tags.call_count == 4
+
+    def test_itunes_lookups_with_different_max_age_dont_share_a_flight(self):
+        from src.recsys import etl_lastfm
+
+        cache = MagicMock()
+        cache.get.return_value = None
+        flight = MagicMock()
+        flight.do.return_value = (None, None)
+        with patch.object(etl_lastfm, "_itunes_cache", cache), patch.object(etl_lastfm, "_inflight", flight):
+            etl_lastfm._cached_itunes_preview("Alison", "Slowdive")
+            etl_lastfm._cached_itunes_preview("Alison", "Slowdive", max_age_s=60)
+
+        first, second = (c.args[0] for c in flight.do.call_args_list)
+        assert first != second
+
+
+class TestIncrementalBuild:
+    @staticmethod
+    def _enriched(rows, enriched_at):
+        return pd.DataFrame(
+            [
+                {"title": t, "artist": a, "tags": ["old"], "preview_url": None, "artwork_url": None,
+                 "source": "chart:p1", "seed_group": None, "primary_genre": "other",
+                 "genre_confidence": 0.0, "enriched_at": enriched_at}
+                for t, a in rows
+            ]
+        )
+
+    @staticmethod
+    def _fake_enrich(df, itunes=True, concurrency=1, max_age_s=None):
+        out = df[["title", "artist"]].copy()
+        out["tags"] = [["new"]] * len(out)
+        out["primary_genre"] = "other"
+        out["enriched_at"] = time.time()
+        return out.reset_index(drop=True)
+
+    def test_only_new_and_stale_rows_are_enriched(self):
+        from src.recsys import etl_lastfm
+
+        now = time.time()
+        existing = self._enriched([("Doll Parts", "Hole"), ("Lithium", "Nirvana"), ("Gone", "Old Band")], now)
+        existing.loc[1, "enriched_at"] = now - 10_000
+        candidates = pd.DataFrame(
+            {"title": ["doll  parts", "Lithium", "Alison", "Alison"], "artist": ["HOLE", "Nirvana", "Slowdive", "slowdive"]}
+        )
+
+        with patch.object(etl_lastfm, "enrich_candidates", side_effect=self._fake_enrich) as enrich:
+            out, changes = etl_lastfm.incremental_update(existing, candidates, refresh_ttl_s=3600)
+
+        assert list(out["title"]) == ["Doll Parts", "Lithium", "Alison"]
+        assert [tags[0] for tags in out["tags"]] == ["old", "new", "new"]
+        assert changes == {"added": [2], "removed": [2], "refreshed": [1], "relabelled": []}
+        assert [len(call.args[0]) for call in enrich.call_args_list] == [1, 1]
+        assert enrich.call_args_list[0].kwargs["max_age_s"] == 3600
+
+    def test_build_appends_changelog(self, tmp_path):
+        from src.recsys import etl_lastfm
+
+        out = tmp_path / "tracks.parquet"
+        self._enriched([("Doll Parts", "Hole"), ("Gone", "Old Band")], time.time()).to_parquet(out, index=False)
+        candidates = pd.DataFrame({"title": ["Doll Parts", "Alison"], "artist": ["Hole", "Slowdive"], "source": "chart:p1"})
+
+        with (
+            patch.object(etl_lastfm, "collect_candidates", return_value=candidates),
+            patch.object(etl_lastfm, "enrich_candidates", side_effect=self._fake_enrich),
+        ):
+            etl_lastfm.build_lastfm_dataset(out_path=out, expand_similar=False, incremental=True)
+
+        assert list(pd.read_parquet(out)["title"]) == ["Doll Parts", "Alison"]
+        entry = json.loads((tmp_path / "tracks.changelog.jsonl").read_text().splitlines()[-1])
+        assert entry["incremental"] is True
+        assert (entry["base_rows"], entry["rows"]) == (2, 2)
+        assert (entry["added"], entry["removed"], entry["refreshed"]) == ([1], [1], [])
+
+    def test_kept_rows_take_the_new_source(self):
+        from src.recsys import etl_lastfm
+
+        existing = self._enriched([("Doll Parts", "Hole"), ("Lithium", "Nirvana")], time.time())
+        candidates = pd.DataFrame(
+            {"title": ["Doll Parts", "Lithium"], "artist": ["Hole", "Nirvana"],
+             "source": ["seed:grunge", "chart:p1"], "seed_group": ["grunge", None]}
+        )
+
+        with patch.object(etl_lastfm, "enrich_candidates", side_effect=self._fake_enrich) as enrich:
+            out, changes = etl_lastfm.incremental_update(existing, candidates)
+
+        enrich.assert_not_called()
+        assert list(out["source"]) == ["seed:grunge", "chart:p1"]
+        assert out.loc[0, "seed_group"] == "grunge" and pd.isna(out.loc[1, "seed_group"])
+        assert changes["relabelled"] == [0]
+
+    def test_each_build_keeps_a_versioned_snapshot(self, tmp_path):
+        from src.recsys import etl_lastfm
+
+        out = tmp_path / "tracks.parquet"
+        first = pd.DataFrame({"title": ["Doll Parts", "Gone"], "artist": ["Hole", "Old Band"], "source": "chart:p1"})
+        second = pd.DataFrame({"title": ["Doll Parts", "Alison"], "artist": ["Hole", "Slowdive"], "source": "chart:p1"})
+        versions = iter(["20240101T000000Z", "20240102T000000Z"])
+
+        with (
+            patch.object(etl_lastfm, "enrich_candidates", side_effect=self._fake_enrich),
+            patch.object(etl_lastfm, "datetime") as clock,
+        ):
+            clock.now.return_value.strftime.side_effect = lambda fmt: next(versions)
+            for candidates in (first, second):
+                with patch.object(etl_lastfm, "collect_candidates", return_value=candidates):
+                    etl_lastfm.build_lastfm_dataset(out_path=out, expand_similar=False, incremental=True)
+
+        entry = json.loads((tmp_path / "tracks.changelog.jsonl").read_text().splitlines()[-1])
+        assert entry["path"] == "tracks.20240102T000000Z.parquet"
+        assert (entry["base_version"], entry["base_path"]) == ("20240101T000000Z", "tracks.20240101T000000Z.parquet")
+        # Removed indices still resolve against the base snapshot
+        base = pd.read_parquet(tmp_path / entry["base_path"])
+        assert base.loc[entry["removed"], "title"].tolist() == ["Gone"]
+        assert pd.read_parquet(out).equals(pd.read_parquet(tmp_path / entry["path"]))
+
+    def test_builds_in_the_same_second_keep_both_snapshots(self, tmp_path):
+        from src.recsys import etl_lastfm
+
+        out = tmp_path / "tracks.parquet"
+        first = pd.DataFrame({"title": ["Gone"], "artist": ["Old Band"], "source": "chart:p1"})
+        second = pd.DataFrame({"title": ["Alison"], "artist": ["Slowdive"], "source": "chart:p1"})
+
+        with (
+            patch.object(etl_lastfm, "enrich_candidates", side_effect=self._fake_enrich),
+            patch.object(etl_lastfm, "datetime") as clock,
+        ):
+            clock.now.return_value.strftime.return_value = "20240101T000000Z"
+            for candidates in (first, second):
+                with patch.object(etl_lastfm, "collect_candidates", return_value=candidates):
+                    etl_lastfm.build_lastfm_dataset(out_path=out, expand_similar=False)
+
+        entries = [json.loads(line) for line in (tmp_path / "tracks.changelog.jsonl").read_text().splitlines()]
+        assert [e["version"] for e in entries] == ["20240101T000000Z", "20240101T000000Z-1"]
+        assert pd.read_parquet(tmp_path / entries[0]["path"])["title"].tolist() == ["Gone"]
+        assert pd.read_parquet(tmp_path / entries[1]["path"])["title"].tolist() == ["Alison"]
@@ -0,0 +1,48 @@
+# tests/test_executor.py
+"""
+Tests for the catalog execution layer and GET /metrics.
+"""
+import pytest
+
+
+class TestRunCpu:
+    @pytest.mark.asyncio
+    async def test_returns_result(self):
+        from src.recsys.service import executor
+
+        result = await executor.run_cpu("test.add", lambda a, b=0: a + b, 2, b=3)
+        assert result == 5
+
+    @pytest.mark.asyncio
+    async def test_records_queue_and_run_time(self):
+        from src.recsys.service import executor
+
+        executor.reset_stats()
+        await executor.run_cpu("test.noop", lambda: None)
+        await executor.run_cpu("test.noop", lambda: None)
+
+        s = executor.stats()["test.noop"]
+        assert s["calls"] == 2
+        assert s["errors"] == 0
+        assert s["queue_s_max"] >= 0.0
+        assert s["run_s_mean"] >= 0.0
+
+    @pytest.mark.asyncio
+    async def test_exceptions_propagate_and_count_as_errors(self):
+        from src.recsys.service import executor
+
+        def boom():
+            raise ValueError("bad row")
+
+        executor.reset_stats()
+        with pytest.raises(ValueError):
+            await executor.run_cpu("test.boom", boom)
+        assert executor.stats()["test.boom"]["errors"] == 1
+
+
+class TestMetricsAPI:
+    def test_metrics_reports_executor_labels(self, client):
+        client.post("/recommend", json={"row_index": 0})
+        body = client.get("/metrics").json()
+        assert "executor" in body
+        assert "recommend.similar_by_index" in body["executor"]
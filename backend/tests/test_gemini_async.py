@@ -0,0 +1,219 @@
+# tests/test_gemini_async.py
+"""
+Tests for gemini_client.agenerate_json / astream_json — deadlines, retries,
+hedging and per-kind latency stats.
+"""
+import asyncio
+import json
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+
+def _scripted_model(*replies):
+    """
+    Fake model whose generate_content_async plays `replies` in order.
+    Each reply is (delay_s, text) or an Exception to raise.
+    """
+    model = MagicMock()
+    calls = []
+
+    async def generate_content_async(prompt, request_options=None):
+        reply = replies[min(len(calls), len(replies) - 1)]
+        calls.append(prompt)
+        if isinstance(reply, Exception):
+            raise reply
+        delay, text = reply
+        await asyncio.sleep(delay)
+        return MagicMock(text=text)
+
+    model.generate_content_async = generate_content_async
+    model.calls = calls
+    return model
+
+
+@pytest.fixture
+def gemini(tmp_path):
+    from src.recsys.service import gemini_client
+
+    fresh = gemini_client.PromptCache(path=tmp_path / "gemini.sqlite")
+    gemini_client.reset_latency_stats()
+    with (
+        patch.object(gemini_client, "_cache", fresh),
+        patch.object(gemini_client, "GEMINI_BACKOFF_S", 0.0),
+    ):
+        yield gemini_client
+    gemini_client.reset_latency_stats()
+
+
+class TestAsyncGenerate:
+    async def test_returns_parsed_json_and_caches(self, gemini):
+        model = _scripted_model((0, '```json\n{"ok": 1}\n```'))
+        with patch.object(gemini, "_get_model", return_value=model):
+            first = await gemini.agenerate_json("p", kind="t")
+            second = await gemini.agenerate_json("p", kind="t")
+
+        assert first == second == {"ok": 1}
+        assert len(model.calls) == 1
+
+    async def test_retries_unparseable_json(self, gemini):
+        model = _scripted_model((0, "Sure! Here you go:"), (0, '["a"]'))
+        with patch.object(gemini, "_get_model", return_value=model):
+            result = await gemini.agenerate_json("p", kind="t", attempts=3)
+
+        assert result == ["a"]
+        stats = gemini.latency_stats()["t"]
+        assert stats["parse_errors"] == 1
+        assert stats["retries"] == 1
+
+    async def test_retries_transient_errors(self, gemini):
+        model = _scripted_model(RuntimeError("503"), (0, "{}"))
+        with patch.object(gemini, "_get_model", return_value=model):
+            assert await gemini.agenerate_json("p", kind="t", ttl_s=0) == {}
+
+        assert gemini.latency_stats()["t"]["errors"] == 1
+
+    async def test_gives_up_after_attempts(self, gemini):
+        model = _scripted_model((0, "nope"))
+        with patch.object(gemini, "_get_model", return_value=model):
+            with pytest.raises(ValueError):
+                await gemini.agenerate_json("p", kind="t", attempts=2)
+
+        assert len(model.calls) == 2
+
+    async def test_deadline_bounds_the_whole_call(self, gemini):
+        model = _scripted_model((5, "{}"))
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        with patch.object(gemini, "_get_model", return_value=model):
+            with pytest.raises(asyncio.TimeoutError):
+                await gemini.agenerate_json("p", kind="t", deadline_s=0.1, attempts=5)
+
+        assert loop.time() - started < 1
+        assert gemini.latency_stats()["t"]["timeouts"] >= 1
+
+    async def test_failed_attempts_are_observed(self, gemini):
+        model = _scripted_model(RuntimeError("503"), (5, "{}"))
+        with patch.object(gemini, "_get_model", return_value=model):
+            with pytest.raises(asyncio.TimeoutError):
+                await gemini.agenerate_json("p", kind="t", deadline_s=0.2, attempts=2)
+
+        # The error and the timed-out call both feed the histogram, so a slow
+        # API pushes the hedge delay up instead of leaving it at the fast p95
+        hist = gemini._histogram("t")
+        assert hist.count == 2
+        assert hist.quantile(1.0) >= 0.1
+
+
+class TestHedging:
+    def _warm(self, gemini, kind, seconds, n=None):
+        hist = gemini._histogram(kind)
+        for _ in range(n or gemini.GEMINI_HEDGE_MIN_SAMPLES):
+            hist.observe(seconds)
+
+    async def test_no_hedge_without_enough_samples(self, gemini):
+        model = _scripted_model((0.05, '"slow"'), (0, '"fast"'))
+        with patch.object(gemini, "_get_model", return_value=model):
+            result = await gemini.agenerate_json("p", kind="h", ttl_s=0, hedge=True)
+
+        assert result == "slow"
+        assert len(model.calls) == 1
+
+    async def test_backup_request_wins_when_primary_stalls(self, gemini):
+        self._warm(gemini, "h", 0.01)
+        model = _scripted_model((2, '"slow"'), (0, '"fast"'))
+        with (
+            patch.object(gemini, "_get_model", return_value=model),
+            patch.object(gemini, "GEMINI_HEDGE_MIN_S", 0.01),
+        ):
+            result = await gemini.agenerate_json("p", kind="h", ttl_s=0, hedge=True)
+
+        assert result == "fast"
+        stats = gemini.latency_stats()["h"]
+        assert stats["hedged"] == 1
+        assert stats["hedge_wins"] == 1
+
+    async def test_fast_primary_sends_no_backup(self, gemini):
+        self._warm(gemini, "h", 0.5)
+        model = _scripted_model((0, '"fast"'))
+        with patch.object(gemini, "_get_model", return_value=model):
+            assert await gemini.agenerate_json("p", kind="h", ttl_s=0, hedge=True) == "fast"
+
+        assert len(model.calls) == 1
+        assert gemini.latency_stats()["h"]["hedged"] == 0
+
+    async def test_cancelling_caller_cancels_the_attempt(self, gemini):
+        self._warm(gemini, "h", 0.5)
+        model = _scripted_model((5, '"late"'))
+        with patch.object(gemini, "_get_model", return_value=model):
+            call = asyncio.create_task(gemini.agenerate_json("p", kind="h", ttl_s=0, hedge=True))
+            await asyncio.sleep(0.05)  # primary in flight, hedge not sent yet
+            call.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await call
+
+        others = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        assert not [t for t in others if not t.done()]
+        assert len(model.calls) == 1
+
+
+class TestLatencyStats:
+    def test_histogram_buckets_and_quantiles(self, gemini):
+        hist = gemini._histogram("k")
+        for s in (0.1, 0.2, 0.3, 3.0, 40.0):
+            hist.observe(s)
+
+        snap = gemini.latency_stats()["k"]
+        assert snap["count"] == 5
+        assert snap["buckets"]["le_0.25"] == 2
+        assert snap["buckets"]["le_0.5"] == 1
+        assert snap["buckets"]["le_4"] == 1
+        assert snap["buckets"]["inf"] == 1
+        assert snap["p50_s"] == 0.3
+
+    def test_metrics_endpoint_reports_latency(self, client):
+        res = client.get("/metrics")
+        assert res.status_code == 200
+        assert "gemini_latency" in res.json()
+
+    def test_stats_are_json_serialisable(self, gemini):
+        gemini._histogram("k").observe(0.1)
+        json.dumps(gemini.latency_stats())
+
+
+class TestStreaming:
+    def _streaming_model(self, chunks, delay=0.0):
+        model = MagicMock()
+        model.calls = 0
+
+        async def generate_content_async(prompt, stream=False, request_options=None):
+            model.calls += 1
+
+            async def chunk_iter():
+                for text in chunks:
+                    await asyncio.sleep(delay)
+                    yield MagicMock(text=text)
+
+            return chunk_iter()
+
+        model.generate_content_async = generate_content_async
+        return model
+
+    async def test_chunks_pass_through_and_result_is_cached(self, gemini):
+        model = self._streaming_model(['{"a"', ": 1}"])
+        with patch.object(gemini, "_get_model", return_value=model):
+            first = [c async for c in gemini.astream_json("p", kind="s")]
+            replay = [c async for c in gemini.astream_json("p", kind="s")]
+            assert await gemini.agenerate_json("p") == {"a": 1}
+
+        assert first == ['{"a"', ": 1}"]
+        assert json.loads("".join(replay)) == {"a": 1}
+        assert model.calls == 1
+
+    async def test_stalled_stream_hits_deadline(self, gemini):
+        model = self._streaming_model(["{", "}"], delay=5)
+        with patch.object(gemini, "_get_model", return_value=model):
+            with pytest.raises(asyncio.TimeoutError):
+                [c async for c in gemini.astream_json("p", kind="s", deadline_s=0.1)]
+
+        assert gemini.latency_stats()["s"]["timeouts"] == 1
@@ -0,0 +1,106 @@
+# tests/test_gemini_cache.py
+"""
+Tests for the Gemini response cache (memory LRU + SQLite tier).
+"""
+import json
+import time
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+
+@pytest.fixture
+def fake_model():
+    model = MagicMock()
+
+    async def generate_content_async(prompt, request_options=None):
+        return MagicMock(text="```json\n" + json.dumps({"echo": prompt}) + "\n```")
+
+    model.generate_content_async = MagicMock(side_effect=generate_content_async)
+    return model
+
+
+@pytest.fixture
+def cache(tmp_path):
+    from src.recsys.service import gemini_client
+
+    fresh = gemini_client.PromptCache(max_size=2, path=tmp_path / "gemini.sqlite")
+    with patch.object(gemini_client, "_cache", fresh):
+        yield fresh
+
+
+class TestGeminiCache:
+    async def test_repeat_prompt_served_from_memory(self, cache, fake_model):
+        from src.recsys.service import gemini_client
+
+        with patch.object(gemini_client, "_get_model", return_value=fake_model):
+            first = await gemini_client.agenerate_json("hello")
+            second = await gemini_client.agenerate_json("hello")
+
+        assert first == second == {"echo": "hello"}
+        assert fake_model.generate_content_async.call_count == 1
+        assert cache.stats["memory_hits"] == 1
+
+    async def test_disk_tier_survives_memory_eviction(self, cache, fake_model):
+        from src.recsys.service import gemini_client
+
+        with patch.object(gemini_client, "_get_model", return_value=fake_model):
+            for p in ("a", "b", "c"):  # max_size=2 → "a" is evicted from memory
+                await gemini_client.agenerate_json(p)
+            assert await gemini_client.agenerate_json("a") == {"echo": "a"}
+
+        assert fake_model.generate_content_async.call_count == 3
+        assert cache.stats["disk_hits"] == 1
+
+    def test_disk_tier_shared_across_instances(self, tmp_path):
+        from src.recsys.service.gemini_client import PromptCache
+
+        PromptCache(path=tmp_path / "g.sqlite").set("k", ["x"], ttl_s=60)
+        assert PromptCache(path=tmp_path / "g.sqlite").get("k") == ["x"]
+
+    def test_hits_are_independent_copies(self, cache):
+        value = {"tracks": [{"title": "a"}]}
+        cache.set("k", value, ttl_s=60)
+        value["tracks"].append({"title": "b"})
+
+        first = cache.get("k")
+        first["tracks"][0]["title"] = "mutated"
+        assert cache.get("k") == {"tracks": [{"title": "a"}]}
+        assert cache.stats["memory_hits"] == 2
+
+    def test_expired_entries_are_misses(self, cache):
+        cache.set("k", {"v": 1}, ttl_s=0.01)
+        time.sleep(0.02)
+        assert cache.get("k") is None
+
+    async def test_ttl_zero_bypasses_cache(self, cache, fake_model):
+        from src.recsys.service import gemini_client
+
+        with patch.object(gemini_client, "_get_model", return_value=fake_model):
+            await gemini_client.agenerate_json("x", ttl_s=0)
+            await gemini_client.agenerate_json("x", ttl_s=0)
+
+        assert fake_model.generate_content_async.call_count == 2
+        assert cache.stats["stores"] == 0
+
+    async def test_parse_failures_are_not_cached(self, cache):
+        from src.recsys.service import gemini_client
+
+        bad = MagicMock()
+
+        async def generate_content_async(prompt, request_options=None):
+            return MagicMock(text="not json")
+
+        bad.generate_content_async = MagicMock(side_effect=generate_content_async)
+        with patch.object(gemini_client, "_get_model", return_value=bad):
+            for _ in range(2):
+                with pytest.raises(ValueError):
+                    await gemini_client.agenerate_json("x", attempts=1)
+
+        assert bad.generate_content_async.call_count == 2
+
+    def test_key_depends_on_model(self):
+        from src.recsys.service.gemini_client import prompt_key
+
+        assert prompt_key("p", "model-a") != prompt_key("p", "model-b")
+        assert prompt_key("p", "model-a") == prompt_key("p", "model-a")
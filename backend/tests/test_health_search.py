@@ -52,3 +52,56 @@ class TestSearch:
     def test_missing_q_returns_422(self, client):
         res = client.get("/search")
         assert res.status_code == 422
+
+
+class TestReadiness:
+    def test_ready_endpoint_when_loaded(self, client):
+        res = client.get("/health/ready")
+        assert res.status_code == 200
+        assert res.json()["ready"] is True
+
+    def test_health_reports_ready_flag(self, client):
+        assert client.get("/health").json()["ready"] is True
+
+    def test_health_answers_while_catalog_loading(self):
+        import threading
+        import time
+        from unittest.mock import AsyncMock, patch
+        from fastapi.testclient import TestClient
+        from src.recsys.service.api import app
+        from src.recsys.service.container import ServiceContainer
+        from src.recsys.service.interaction_queue import InteractionQueue
+        from tests.conftest import _fake_catalog
+
+        gate = threading.Event()
+
+        def slow_loader():
+            gate.wait(5)
+            return _fake_catalog()
+
+        services = ServiceContainer(
+            loader=slow_loader, warmup="background", ready_timeout_s=0.05
+        )
+        with (
+            patch("src.recsys.service.api.services", services),
+            patch("src.recsys.service.api.interaction_queue", InteractionQueue(spool_path=None)),
+            patch(
+                "src.recsys.service.preview_resolver.resolve_batch",
+                new=AsyncMock(side_effect=lambda tracks: tracks),
+            ),
+            TestClient(app) as c,
+        ):
+            body = c.get("/health").json()
+            assert body["ok"] is True
+            assert body["ready"] is False
+            assert body["tracks"] is None
+            assert c.get("/health/ready").status_code == 503
+            # Endpoints that need the catalog wait, then give up with 503
+            assert c.post("/recommend", json={"row_index": 0}).status_code == 503
+
+            gate.set()
+            deadline = time.monotonic() + 5
+            while c.get("/health/ready").status_code != 200:
+                assert time.monotonic() < deadline
+                time.sleep(0.01)
+            assert c.post("/recommend", json={"row_index": 0}).status_code == 200
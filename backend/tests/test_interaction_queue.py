@@ -0,0 +1,246 @@
+# tests/test_interaction_queue.py
+"""
+Unit tests for the write-behind interaction queue: batching, backpressure,
+drain on shutdown and spool replay.
+"""
+import asyncio
+import json
+
+import pytest
+from unittest.mock import patch
+
+
+def _event(i: int) -> dict:
+    return {
+        "user_id": "u1",
+        "track_id": str(i),
+        "interaction_type": "heart",
+        "feature": "explore",
+        "tags": ["pop"],
+    }
+
+
+class TestInteractionQueue:
+    @pytest.mark.asyncio
+    async def test_batches_by_size(self, tmp_path):
+        from src.recsys.service.interaction_queue import InteractionQueue
+
+        q = InteractionQueue(batch_size=3, flush_interval_s=5, spool_path=tmp_path / "s.jsonl")
+        with patch("src.recsys.service.db.awrite_interactions", return_value=True) as mock_write:
+            await q.start()
+            for i in range(3):
+                await q.put(_event(i))
+            for _ in range(100):
+                if mock_write.called:
+                    break
+                await asyncio.sleep(0.01)
+            await q.stop()
+
+        (batch,), _ = mock_write.call_args_list[0]
+        assert [e["track_id"] for e in batch] == ["0", "1", "2"]
+        assert len({e["id"] for e in batch}) == 3
+
+    @pytest.mark.asyncio
+    async def test_stop_drains_queue(self, tmp_path):
+        from src.recsys.service.interaction_queue import InteractionQueue
+
+        q = InteractionQueue(flush_interval_s=5, spool_path=tmp_path / "s.jsonl")
+        with patch("src.recsys.service.db.awrite_interactions", return_value=True) as mock_write:
+            await q.start()
+            for i in range(4):
+                await q.put(_event(i))
+            await q.stop()
+
+        written = [e["track_id"] for c in mock_write.call_args_list for e in c.args[0]]
+        assert written == ["0", "1", "2", "3"]
+        assert list(tmp_path.glob("s*.jsonl")) == []  # fully acked spool is removed on stop
+
+    @pytest.mark.asyncio
+    async def test_put_raises_when_full(self, tmp_path):
+        from src.recsys.service.interaction_queue import InteractionQueue, QueueFull
+
+        q = InteractionQueue(max_size=1, put_timeout_s=0.01, spool_path=tmp_path / "s.jsonl")
+        await q.start()
+        q._task.cancel()  # no consumer — the queue can only fill up
+        await q.put(_event(0))
+        with pytest.raises(QueueFull):
+            await q.put(_event(1))
+        assert q.stats()["rejected"] == 1
+
+    @pytest.mark.asyncio
+    async def test_put_after_stop_raises(self, tmp_path):
+        from src.recsys.service.interaction_queue import InteractionQueue, QueueClosed
+
+        q = InteractionQueue(spool_path=tmp_path / "s.jsonl")
+        await q.start()
+        await q.stop()
+        with pytest.raises(QueueClosed):
+            await q.put(_event(0))
+
+    @pytest.mark.asyncio
+    async def test_unacked_spool_events_are_replayed(self, tmp_path):
+        from src.recsys.service.interaction_queue import InteractionQueue
+
+        spool = tmp_path / "s.jsonl"
+        lines = [
+            {"event": {**_event(1), "seq": 1}},
+            {"event": {**_event(2), "seq": 2}},
+            {"ack": [1]},
+        ]
+        spool.write_text("\n".join(json.dumps(l) for l in lines) + "\n{\"event\": {tor")
+
+        q = InteractionQueue(flush_interval_s=0.01, spool_path=spool)
+        with patch("src.recsys.service.db.awrite_interactions", return_value=True) as mock_write:
+            await q.start()
+            await q.stop()
+
+        written = [e for c in mock_write.call_args_list for e in c.args[0]]
+        assert [e["track_id"] for e in written] == ["2"]
+        assert written[0]["id"]  # pre-id spool entries get one on replay
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_stays_in_spool(self, tmp_path):
+        from src.recsys.service.interaction_queue import InteractionQueue
+
+        spool = tmp_path / "s.jsonl"
+        q = InteractionQueue(flush_interval_s=0.01, spool_path=spool)
+        with patch("src.recsys.service.db.awrite_interactions", return_value=False):
+            await q.start()
+            await q.put(_event(7))
+            await q.stop()
+
+        pending = InteractionQueue(spool_path=spool)._read_pending()
+        assert [e["track_id"] for e in pending] == ["7"]
+
+
+class TestSharedSpoolPath:
+    """Every uvicorn worker builds its queue on the same INTERACTION_SPOOL."""
+
+    @pytest.mark.asyncio
+    async def test_workers_keep_separate_spools(self, tmp_path):
+        from src.recsys.service.interaction_queue import InteractionQueue
+
+        spool = tmp_path / "s.jsonl"
+        healthy = InteractionQueue(flush_interval_s=0.01, spool_path=spool)
+        stuck = InteractionQueue(spool_path=spool)
+        with patch("src.recsys.service.db.awrite_interactions", return_value=True):
+            await healthy.start()
+            await stuck.start()
+            stuck._task.cancel()  # its writes never land
+            await stuck.put(_event(1))
+            await stuck.put(_event(2))
+            await healthy.put(_event(3))
+            await healthy.stop()  # fully acked — its spool is truncated and removed
+
+            # A worker starting now must not replay a live worker's events
+            late = InteractionQueue(spool_path=spool)
+            await late.start()
+            assert late.depth == 0
+            await late.stop()
+
+        assert [e["track_id"] for e in InteractionQueue(spool_path=spool)._read_pending()] == ["1", "2"]
+
+    @pytest.mark.asyncio
+    async def test_dead_workers_spool_is_adopted_once(self, tmp_path):
+        from src.recsys.service.interaction_queue import InteractionQueue
+
+        spool = tmp_path / "s.jsonl"
+        dead = InteractionQueue(spool_path=spool)
+        await dead.start()
+        dead._task.cancel()
+        for i in range(3):
+            await dead.put(_event(i))
+        dead._spool.close()  # the process exits — its lock goes with it
+
+        first, second = InteractionQueue(spool_path=spool), InteractionQueue(spool_path=spool)
+        await first.start()
+        await second.start()
+        first._task.cancel()
+        second._task.cancel()
+
+        assert [e["track_id"] for e in first._backlog] == ["0", "1", "2"]
+        assert [e["seq"] for e in first._backlog] == [1, 2, 3]
+        assert second.depth == 0
+        assert not dead._spool_file.exists()
+
+
+@pytest.fixture
+def sqlite_db(tmp_path):
+    from src.recsys.service import db
+    from src.recsys.service.storage.sqlite import SqliteBackend
+
+    backend = SqliteBackend(tmp_path / "local.db")
+    db._known_users.clear()
+    with patch.object(db, "get_backend", return_value=backend):
+        yield db
+    db._known_users.clear()
+    backend.close()
+
+
+class TestBadEvents:
+    @pytest.mark.asyncio
+    async def test_rejected_event_is_dead_lettered(self, tmp_path, sqlite_db):
+        from src.recsys.service.interaction_queue import InteractionQueue
+
+        spool = tmp_path / "s.jsonl"
+        q = InteractionQueue(batch_size=11, flush_interval_s=5, spool_path=spool)
+        await q.start()
+        for i in range(10):
+            await q.put(_event(i))
+        await q.put({**_event(99), "interaction_type": "play"})  # fails the CHECK
+        await q.stop()
+
+        assert len(sqlite_db.get_interaction_history("u1")) == 10
+        stats = q.stats()
+        assert (stats["flushed"], stats["dead_lettered"], stats["failed_batches"]) == (10, 1, 0)
+        (line,) = (tmp_path / "s.dead.jsonl").read_text().splitlines()
+        assert json.loads(line)["event"]["track_id"] == "99"
+        assert InteractionQueue(spool_path=spool)._read_pending() == []
+
+    @pytest.mark.asyncio
+    async def test_outage_is_not_dead_lettered(self, tmp_path):
+        from src.recsys.service.interaction_queue import InteractionQueue
+
+        spool = tmp_path / "s.jsonl"
+        q = InteractionQueue(batch_size=10, flush_interval_s=5, spool_path=spool)
+        with patch("src.recsys.service.db.awrite_interactions", return_value=False) as mock_write:
+            await q.start()
+            for i in range(10):
+                await q.put(_event(i))
+            await q.stop()
+
+        # 3 tries of the batch, then 3 single events before giving up
+        assert mock_write.call_count == 6
+        assert q.stats()["dead_lettered"] == 0
+        assert not (tmp_path / "s.dead.jsonl").exists()
+        assert len(InteractionQueue(spool_path=spool)._read_pending()) == 10
+
+    @pytest.mark.asyncio
+    async def test_batch_failed_during_outage_is_retried(self, tmp_path):
+        from src.recsys.service.interaction_queue import InteractionQueue
+
+        spool = tmp_path / "s.jsonl"
+        calls = []
+
+        async def down_then_up(batch):
+            calls.append([e["track_id"] for e in batch])
+            return len(calls) > 6  # one full failed round: 3 batch tries + 3 probes
+
+        q = InteractionQueue(batch_size=5, flush_interval_s=0.01, spool_path=spool)
+        with (
+            patch("src.recsys.service.db.awrite_interactions", side_effect=down_then_up),
+            patch("src.recsys.service.interaction_queue._BACKOFF_S", 0),
+        ):
+            await q.start()
+            for i in range(5):
+                await q.put(_event(i))
+            for _ in range(200):
+                if q.stats()["flushed"] == 5:
+                    break
+                await asyncio.sleep(0.01)
+            await q.stop()
+
+        # The probed events went to the back of the retried batch
+        assert calls[6] == ["3", "4", "0", "1", "2"]
+        assert q.stats()["failed_batches"] == 1
+        assert q._unacked == 0 and list(tmp_path.glob("s*.jsonl")) == []
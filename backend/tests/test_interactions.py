@@ -3,11 +3,11 @@
 Tests for POST /interactions — interaction logging, 204 no-content.
 """
 import time
-from unittest.mock import patch, call
+from unittest.mock import patch
 
 
 VALID_PAYLOAD = {
-    "user_id": "test-user-123",
+    "user_id": "7c9e6679-7425-40de-944b-e07fc1f00c5d",
     "track_id": "5",
     "interaction_type": "heart",
     "feature": "soundtrack",
@@ -55,6 +55,16 @@ def test_missing_interaction_type_returns_422(client):
     assert res.status_code == 422
 
 
+def test_unknown_interaction_type_returns_422(client):
+    res = client.post("/interactions", json={**VALID_PAYLOAD, "interaction_type": "play"})
+    assert res.status_code == 422
+
+
+def test_non_uuid_user_id_returns_422(client):
+    res = client.post("/interactions", json={**VALID_PAYLOAD, "user_id": "test-user-123"})
+    assert res.status_code == 422
+
+
 def test_empty_body_returns_422(client):
     res = client.post("/interactions", json={})
     assert res.status_code == 422
@@ -66,38 +76,61 @@ def test_tags_are_optional(client):
     assert res.status_code == 204
 
 
-def test_db_log_interaction_is_called(client):
-    """Verify the endpoint actually triggers db.log_interaction (fire-and-forget)."""
-    with patch("src.recsys.service.db.log_interaction") as mock_log:
+def _wait_for_call(mock, timeout=2.0):
+    """The write happens on the queue's background flusher — poll for it."""
+    deadline = time.monotonic() + timeout
+    while not mock.called and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_db_write_interactions_is_called(client):
+    """Verify the endpoint's event reaches db.write_interactions (write-behind)."""
+    with patch("src.recsys.service.db.awrite_interactions", return_value=True) as mock_write:
         res = client.post("/interactions", json=VALID_PAYLOAD)
         assert res.status_code == 204
-        # Give the background task a moment to run
-        time.sleep(0.05)
-        mock_log.assert_called_once_with(
-            "test-user-123", "5", "heart", "soundtrack"
-        )
-
-
-def test_db_update_taste_profile_called_when_tags_present(client):
-    """Tags trigger a taste profile update."""
-    with (
-        patch("src.recsys.service.db.log_interaction"),
-        patch("src.recsys.service.db.update_taste_profile") as mock_update,
-    ):
+        _wait_for_call(mock_write)
+        (batch,), _ = mock_write.call_args
+        assert len(batch) == 1
+        event = batch[0]
+        assert event["user_id"] == "7c9e6679-7425-40de-944b-e07fc1f00c5d"
+        assert event["track_id"] == "5"
+        assert event["interaction_type"] == "heart"
+        assert event["feature"] == "soundtrack"
+        assert event["timestamp"]
+
+
+def test_tags_passed_through_for_taste_profile_update(client):
+    """Tags travel with the event so the batch write can update taste_profile."""
+    with patch("src.recsys.service.db.awrite_interactions", return_value=True) as mock_write:
         client.post("/interactions", json=VALID_PAYLOAD)
-        time.sleep(0.05)
-        mock_update.assert_called_once_with(
-            "test-user-123", ["pop", "indie"], "heart"
-        )
-
-
-def test_no_taste_profile_update_when_no_tags(client):
-    """Empty tags list should not trigger a taste profile update."""
-    payload = {**VALID_PAYLOAD, "tags": []}
-    with (
-        patch("src.recsys.service.db.log_interaction"),
-        patch("src.recsys.service.db.update_taste_profile") as mock_update,
+        _wait_for_call(mock_write)
+        (batch,), _ = mock_write.call_args
+        assert batch[0]["tags"] == ["pop", "indie"]
+
+
+def test_burst_is_written_in_batches(client):
+    """Several events inside one flush window share a single batch write."""
+    with patch("src.recsys.service.db.awrite_interactions", return_value=True) as mock_write:
+        for i in range(5):
+            client.post("/interactions", json={**VALID_PAYLOAD, "track_id": str(i)})
+        deadline = time.monotonic() + 2.0
+        while (
+            sum(len(c.args[0]) for c in mock_write.call_args_list) < 5
+            and time.monotonic() < deadline
+        ):
+            time.sleep(0.01)
+        written = [e["track_id"] for c in mock_write.call_args_list for e in c.args[0]]
+        assert written == ["0", "1", "2", "3", "4"]
+        assert mock_write.call_count < 5
+
+
+def test_full_queue_returns_503(client):
+    from src.recsys.service.interaction_queue import QueueFull
+
+    with patch(
+        "src.recsys.service.api.interaction_queue.put",
+        side_effect=QueueFull("Interaction queue is full."),
     ):
-        client.post("/interactions", json=payload)
-        time.sleep(0.05)
-        mock_update.assert_not_called()
+        res = client.post("/interactions", json=VALID_PAYLOAD)
+    assert res.status_code == 503
+    assert res.headers["retry-after"] == "1"
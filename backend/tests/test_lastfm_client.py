@@ -0,0 +1,201 @@
+# tests/test_lastfm_client.py
+"""
+Tests for the serving-path Last.fm client (precomputed graph → memory →
+shared disk cache → network) and the shared cache helpers.
+"""
+import asyncio
+import json
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+
+def _similar_response(*names):
+    return {"similarartists": {"artist": [{"name": n} for n in names]}}
+
+
+@pytest.fixture
+def http():
+    """Fake pooled client; .calls records the artist of every request."""
+    http = MagicMock()
+    http.calls = []
+
+    async def get(url, params=None):
+        http.calls.append(params["artist"])
+        await asyncio.sleep(0.01)
+        return MagicMock(json=lambda: _similar_response(f"{params['artist']} Jr."))
+
+    http.get = get
+    return http
+
+
+@pytest.fixture
+def lastfm(tmp_path, monkeypatch, http):
+    from src.recsys.cache import DirCache, TTLCache
+    from src.recsys.service import lastfm_client
+
+    monkeypatch.setenv("LASTFM_API_KEY", "test-key")
+    with (
+        patch.object(lastfm_client, "_memory", TTLCache(16, 60)),
+        patch.object(lastfm_client, "_disk", DirCache(tmp_path / "lastfm")),
+        patch.object(lastfm_client, "_graphs", {}),
+        patch.object(lastfm_client, "_inflight", {}),
+        patch.object(lastfm_client, "_client", return_value=http),
+    ):
+        yield lastfm_client
+
+
+class TestSimilarArtists:
+    async def test_precomputed_graph_avoids_network(self, lastfm, http, tmp_path):
+        (tmp_path / "similar_artists.json").write_text(json.dumps({"nirvana": ["Hole", "Mudhoney"]}))
+
+        result = await lastfm.similar_artists("Nirvana", art_dir=tmp_path)
+
+        assert result == ["Hole", "Mudhoney"]
+        assert http.calls == []
+
+    async def test_artist_missing_from_graph_falls_through(self, lastfm, http, tmp_path):
+        (tmp_path / "similar_artists.json").write_text(json.dumps({"nirvana": ["Hole"]}))
+
+        assert await lastfm.similar_artists("Hole", art_dir=tmp_path) == ["Hole Jr."]
+        assert http.calls == ["Hole"]
+
+    async def test_repeat_lookups_served_from_memory(self, lastfm, http):
+        await lastfm.similar_artists("Hole")
+        await lastfm.similar_artists("hole ")
+
+        assert http.calls == ["Hole"]
+
+    async def test_concurrent_lookups_share_one_request(self, lastfm, http):
+        results = await asyncio.gather(*[lastfm.similar_artists("Hole") for _ in range(5)])
+
+        assert all(r == ["Hole Jr."] for r in results)
+        assert http.calls == ["Hole"]
+
+    async def test_reads_responses_cached_by_the_etl(self, lastfm, http):
+        from src.recsys.cache import similar_artists_entry
+
+        prefix, key = similar_artists_entry("Nirvana", lastfm.LASTFM_SIMILAR_LIMIT)
+        lastfm._disk.set(prefix, key, _similar_response("Foo Fighters"))
+
+        assert await lastfm.similar_artists("Nirvana") == ["Foo Fighters"]
+        assert http.calls == []
+
+    async def test_failures_return_empty_and_are_not_cached(self, lastfm, http):
+        async def broken(url, params=None):
+            raise RuntimeError("timeout")
+
+        http.get = broken
+        assert await lastfm.similar_artists("Hole") == []
+        assert len(lastfm._memory) == 0
+        assert list(lastfm._disk.root.glob("*.json")) == []
+
+    async def test_no_api_key_returns_empty(self, lastfm, http, monkeypatch):
+        monkeypatch.delenv("LASTFM_API_KEY")
+        assert await lastfm.similar_artists("Hole") == []
+        assert http.calls == []
+
+
+class TestSharedCache:
+    def test_dir_cache_keeps_etl_file_layout(self, tmp_path):
+        from src.recsys.cache import DirCache
+
+        cache = DirCache(tmp_path)
+        cache.set("track_tags", "track:Hole:Doll Parts", {"ok": 1})
+
+        assert (tmp_path / "track_tags_track_hole_doll_parts.json").exists()
+        assert cache.get("track_tags", "track:Hole:Doll Parts") == {"ok": 1}
+
+    def test_dir_cache_max_age(self, tmp_path):
+        import os
+        import time
+        from src.recsys.cache import DirCache
+
+        cache = DirCache(tmp_path)
+        cache.set("p", "k", {"v": 1})
+        old = time.time() - 100
+        os.utime(cache.path("p", "k"), (old, old))
+
+        assert cache.get("p", "k") == {"v": 1}
+        assert cache.get("p", "k", max_age_s=10) is None
+
+    def test_ttl_cache_expires_and_evicts(self):
+        import time
+        from src.recsys.cache import TTLCache
+
+        cache = TTLCache(max_size=2, ttl_s=0.05)
+        for k in ("a", "b", "c"):
+            cache.set(k, [k])
+        assert cache.get("a") is None
+        assert cache.get("c") == ["c"]
+        time.sleep(0.06)
+        assert cache.get("c") is None
+
+    def test_sqlite_cache_round_trip_and_bulk_reads(self, tmp_path):
+        from src.recsys.cache import SqliteCache
+
+        cache = SqliteCache(tmp_path / "cache.sqlite", namespace="lastfm")
+        cache.set("artist_similar", "AC/DC:l30", {"v": 1})
+        cache.set("artist_similar", "AC DC:l30", {"v": 2})
+
+        # No more safe_key collisions, but lookups stay case-insensitive
+        assert cache.get("artist_similar", "ac/dc:l30") == {"v": 1}
+        assert cache.get_many("artist_similar", ["AC/DC:l30", "AC DC:l30", "Hole:l30"]) == {
+            "AC/DC:l30": {"v": 1},
+            "AC DC:l30": {"v": 2},
+        }
+        # Namespaces share the file without seeing each other's entries
+        assert SqliteCache(tmp_path / "cache.sqlite", namespace="itunes").get("artist_similar", "AC/DC:l30") is None
+
+    def test_sqlite_cache_ttl_and_max_age(self, tmp_path):
+        import time
+        from src.recsys.cache import SqliteCache
+
+        cache = SqliteCache(tmp_path / "cache.sqlite", namespace="lastfm")
+        cache.set("p", "short", {"v": 1}, ttl_s=0.05)
+        cache.set("p", "forever", {"v": 2})
+        time.sleep(0.06)
+
+        assert cache.get("p", "short") is None
+        assert cache.get("p", "forever") == {"v": 2}
+        assert cache.get("p", "forever", max_age_s=0.01) is None
+        assert cache.purge_expired() == 1
+
+    def test_import_dir_migrates_legacy_files(self, tmp_path):
+        import os
+        import time
+        from src.recsys.cache import DirCache, SqliteCache
+
+        legacy = DirCache(tmp_path / "lastfm")
+        legacy.set("track_tags", "track:Hole:Doll Parts", {"tags": ["grunge"]})
+        legacy.set("artist_tags", "artist:Hole", {"tags": ["rock"]})
+        old = time.time() - 100
+        os.utime(legacy.path("artist_tags", "artist:Hole"), (old, old))
+        (tmp_path / "lastfm" / "broken.json").write_text("{not json")
+
+        cache = SqliteCache(tmp_path / "cache.sqlite", namespace="lastfm")
+        assert cache.import_dir(tmp_path / "lastfm") == 2
+        assert cache.import_dir(tmp_path / "lastfm") == 2  # rerun leaves rows as they are
+        assert len(cache) == 2
+
+        # Original keys still find the migrated entries; file mtimes became created_at
+        assert cache.get("track_tags", "track:Hole:Doll Parts") == {"tags": ["grunge"]}
+        assert cache.get("artist_tags", "artist:Hole", max_age_s=10) is None
+        assert cache.get_many("artist_tags", ["artist:Hole"]) == {"artist:Hole": {"tags": ["rock"]}}
+
+    def test_exact_write_retires_a_colliding_legacy_entry(self, tmp_path):
+        from src.recsys.cache import DirCache, SqliteCache
+
+        # "AC/DC" and "AC DC" both became artist_similar_ac_dc_l30.json
+        DirCache(tmp_path / "lastfm").set("artist_similar", "AC/DC:l30", {"artists": ["Airbourne"]})
+        cache = SqliteCache(tmp_path / "cache.sqlite", namespace="lastfm")
+        cache.import_dir(tmp_path / "lastfm")
+        assert cache.get_many("artist_similar", ["AC/DC:l30", "AC DC:l30"]) == {
+            "AC/DC:l30": {"artists": ["Airbourne"]},
+            "AC DC:l30": {"artists": ["Airbourne"]},
+        }
+
+        cache.set("artist_similar", "AC DC:l30", {"artists": ["Tribute"]})
+        assert cache.get("artist_similar", "AC DC:l30") == {"artists": ["Tribute"]}
+        assert cache.get("artist_similar", "AC/DC:l30") is None
+        assert len(cache) == 1
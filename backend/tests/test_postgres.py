@@ -0,0 +1,135 @@
+# tests/test_postgres.py
+"""
+Integration tests for the Postgres storage backend. They need a real
+server and are skipped unless TEST_DATABASE_URL points at one, e.g.
+
+    TEST_DATABASE_URL=postgresql://postgres@localhost/postgres pytest tests/test_postgres.py
+
+The schema is created if missing; every test writes under fresh user ids.
+"""
+import os
+import threading
+import uuid
+
+import pytest
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+
+@pytest.fixture
+def backend():
+    from src.recsys.service.storage.postgres import PostgresBackend
+
+    backend = PostgresBackend(TEST_DATABASE_URL, max_size=2)
+    yield backend
+    backend.close()
+
+
+def _row(user_id, track_id, kind="heart", tags=("pop",), ts=None, weight=1.0):
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "track_id": str(track_id),
+        "interaction_type": kind,
+        "feature": "explore",
+        "timestamp": ts,
+        "tags": list(tags),
+        "weight": weight,
+    }
+
+
+@pytest.fixture
+def pg_db(backend):
+    from unittest.mock import patch
+    from src.recsys.service import db
+
+    db._known_users.clear()
+    with patch.object(db, "get_backend", return_value=backend):
+        yield db, str(uuid.uuid4())
+    db._known_users.clear()
+
+
+def _event(user_id, track_id, kind="heart", ts=None):
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "track_id": str(track_id),
+        "interaction_type": kind,
+        "feature": "explore",
+        "tags": ["pop", "indie"],
+        "timestamp": ts,
+    }
+
+
+class TestPostgresBackend:
+    def test_insert_and_increment(self, pg_db):
+        db, user = pg_db
+        events = [_event(user, 1), _event(user, 2, "skip"), _event(user, 3, "complete")]
+        assert db.write_interactions(events)
+        assert db.write_interactions(events)  # replay: nothing new
+
+        db.log_interaction(user, "4", "complete", "soundtrack")
+        db.update_taste_profiles([(user, "rock", 2.0), (user, "pop", 1.0)])
+
+        scores = {r["tag"]: r["score"] for r in db.get_taste_profile(user)}
+        assert abs(scores["pop"] - (1.0 - 0.3 + 0.5 + 1.0)) < 1e-9
+        assert abs(scores["indie"] - 1.2) < 1e-9
+        assert scores["rock"] == 2.0
+        assert db.get_taste_profile(user)[0]["tag"] == "pop"
+        history = db.get_interaction_history(user)
+        assert [h["track_id"] for h in history][:1] == ["4"]
+        assert len(history) == 4
+
+    def test_history_keyset_pagination(self, pg_db):
+        from unittest.mock import patch
+
+        db, user = pg_db
+        ts = "2024-01-01T00:00:00+00:00"  # identical timestamps — id breaks ties
+        assert db.write_interactions([_event(user, i, ts=ts) for i in range(5)])
+        assert db.write_interactions([_event(user, 9, "skip", ts="2024-02-01T00:00:00Z")])
+
+        page, cursor = db.get_interaction_history_page(user, limit=2)
+        assert page[0]["track_id"] == "9" and cursor
+        page2, _ = db.get_interaction_history_page(user, limit=2, cursor=cursor)
+        assert page2[0]["id"] < page[1]["id"]
+
+        with patch.object(db, "HISTORY_PAGE_SIZE", 2):
+            full = db.get_interaction_history(user)
+        assert len(full) == 6 and len({h["id"] for h in full}) == 6
+        assert [h["timestamp"] for h in full] == sorted((h["timestamp"] for h in full), reverse=True)
+        assert [h["track_id"] for h in db.get_interaction_history(user, since="2024-01-15T00:00:00Z")] == ["9"]
+        assert len(db.get_interaction_history(user, ["heart"])) == 5
+        assert len(db.get_interaction_history(user, limit=3)) == 3
+
+    def test_failed_batch_rolls_back(self, pg_db):
+        db, user = pg_db
+        assert db.write_interactions([_event(user, 1), _event(user, 2, "bogus")]) is False
+        assert db.get_interaction_history(user) == []
+        assert db.get_taste_profile(user) == []
+
+
+class TestAsyncPath:
+    @pytest.mark.asyncio
+    async def test_async_calls_run_on_the_callers_loop(self, backend):
+        user = str(uuid.uuid4())
+        threads = threading.active_count()
+
+        await backend.astart()
+        await backend.aregister_users([user])
+        rows = [
+            _row(user, 1, ts="2024-01-01T00:00:00Z"),
+            _row(user, 2, "skip", ts="2024-01-02T00:00:00Z", weight=-0.3),
+        ]
+        assert await backend.arecord_interactions(rows) == 2
+        assert await backend.arecord_interactions(rows) == 0
+        (profile,) = await backend.aget_taste_profile(user)
+        page = await backend.aget_interaction_history_page(user, None, 10, None, None)
+        await backend.aclose()
+
+        assert abs(profile["score"] - 0.7) < 1e-9
+        assert [r["track_id"] for r in page] == ["2", "1"]
+        # No private loop thread was started for the async path
+        assert backend._thread is None
+        assert threading.active_count() == threads
@@ -66,3 +66,164 @@ class TestRecommendValidation:
         # SearchIndex.match always returns (0, 95.0, [...]) in tests so this hits 200
         # Adjust if real search logic changes
         assert res.status_code in (200, 404, 409)
+
+
+class TestArtistIndex:
+    def _rec(self, artists):
+        import numpy as np
+        from src.recsys.recommenders.cosine import CosineRecommender
+
+        id_map = [{"title": f"T{i}", "artist": a} for i, a in enumerate(artists)]
+        return CosineRecommender(np.eye(len(artists), 4, dtype=np.float32), id_map)
+
+    def test_postings_group_rows_by_artist(self):
+        rec = self._rec(["Nirvana", "Hole", "nirvana", "Hole"])
+        assert rec.artist_rows == {"nirvana": [0, 2], "hole": [1, 3]}
+        assert rec.rows_for_artists(["HOLE", "Nirvana", "Unknown"]) == [0, 1, 2, 3]
+        assert rec.rows_for_artists(["hole"]) == [1, 3]
+
+    def test_tracks_by_artist_matches_per_row_scan(self):
+        from rapidfuzz import fuzz
+
+        artists = ["Kurt Cobain", "Kurt Vile", "Cobain Kurt", "The Kurt Cobain Band", "Hole"] * 3
+        rec = self._rec(artists)
+
+        expected = sorted(
+            (
+                (j, fuzz.token_set_ratio(a.lower(), "kurt cobain"))
+                for j, a in enumerate(artists)
+                if fuzz.token_set_ratio(a.lower(), "kurt cobain") >= 70
+            ),
+            key=lambda x: -x[1],
+        )
+        got = rec.tracks_by_artist("Kurt Cobain", top_k=50)
+        assert [(t["row_index"], t["score"]) for t in got] == [(j, s / 100) for j, s in expected]
+
+    def test_tracks_by_artist_respects_top_k(self):
+        rec = self._rec(["Hole"] * 5)
+        assert len(rec.tracks_by_artist("hole", top_k=2)) == 2
+
+
+class TestTextVectors:
+    CORPUS = [
+        "grunge rock seattle nirvana",
+        "grunge alternative rock hole",
+        "dream pop shoegaze slowdive",
+        "shoegaze noise pop my bloody valentine",
+        "synth pop new wave depeche mode",
+        "new wave post punk the cure",
+        "post punk gothic rock bauhaus",
+        "dream pop ethereal cocteau twins",
+    ]
+
+    def _pipeline(self):
+        from sklearn.decomposition import TruncatedSVD
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import StandardScaler
+
+        pipe = Pipeline([
+            ("tfidf", TfidfVectorizer(ngram_range=(1, 2), stop_words="english")),
+            ("svd", TruncatedSVD(n_components=4, random_state=42)),
+            ("scale", StandardScaler(with_mean=False)),
+        ])
+        return pipe, pipe.fit_transform(self.CORPUS)
+
+    def test_sparse_projection_matches_pipeline(self):
+        import numpy as np
+        from src.recsys.recommenders.cosine import TextProjector
+
+        pipe, _ = self._pipeline()
+        projector = TextProjector.from_pipeline(pipe)
+        queries = ["rainy grunge rock", "dreamy shoegaze pop", "nothing in the vocabulary"]
+
+        np.testing.assert_allclose(projector.transform(queries), pipe.transform(queries), rtol=1e-4, atol=1e-5)
+
+    def test_unknown_pipelines_fall_back_to_transform(self):
+        from src.recsys.recommenders.cosine import TextProjector
+
+        assert TextProjector.from_pipeline(object()) is None
+
+    def test_repeat_descriptions_hit_the_cache(self):
+        import numpy as np
+        from unittest.mock import MagicMock
+        from src.recsys.recommenders.cosine import CosineRecommender
+
+        pipe = MagicMock(steps=[])
+        pipe.transform.side_effect = lambda texts: np.ones((len(texts), 4))
+        rec = CosineRecommender(
+            np.eye(4, dtype=np.float32), [{"title": "T", "artist": "A"}] * 4, pipeline=pipe
+        )
+
+        v = rec.text_vector("Rainy  Sunday")
+        assert rec.text_vector("rainy sunday ") is v
+        rec.similar_by_text("rainy sunday")
+        assert pipe.transform.call_count == 1
+        assert not v.flags.writeable
+
+    def test_similar_by_text_uses_projection(self):
+        import numpy as np
+        from src.recsys.recommenders.cosine import CosineRecommender, TextProjector
+
+        pipe, X = self._pipeline()
+        id_map = [{"title": f"T{i}", "artist": f"A{i}"} for i in range(len(self.CORPUS))]
+        rec = CosineRecommender(np.asarray(X, dtype=np.float32), id_map, pipeline=pipe)
+
+        assert rec._text_transform is None
+        top = rec.similar_by_text("seattle grunge rock", top_k=1)[0]
+        assert isinstance(rec._text_transform.__self__, TextProjector)
+        assert top["row_index"] in (0, 1)
+
+    def test_light_form_round_trips(self, tmp_path):
+        import numpy as np
+        from src.recsys.recommenders.cosine import TextProjector, write_text_projector
+
+        pipe, _ = self._pipeline()
+        assert write_text_projector(tmp_path, pipe) is not None
+        assert TextProjector.exists(tmp_path)
+
+        loaded = TextProjector.load(tmp_path, mmap=True)
+        queries = ["the grunge of seattle", "post punk new wave", "nothing in the vocabulary"]
+        assert isinstance(loaded.projection, np.memmap)
+        np.testing.assert_allclose(loaded.transform(queries), pipe.transform(queries), rtol=1e-4, atol=1e-5)
+
+    def test_concurrent_first_queries_load_once(self, tmp_path):
+        import threading
+        import time
+        import numpy as np
+        from unittest.mock import patch
+        from src.recsys.recommenders.cosine import CosineRecommender, TextProjector, write_text_projector
+
+        pipe, X = self._pipeline()
+        write_text_projector(tmp_path, pipe)
+        id_map = [{"title": f"T{i}", "artist": f"A{i}"} for i in range(len(self.CORPUS))]
+        rec = CosineRecommender(np.asarray(X, dtype=np.float32), id_map, art_dir=tmp_path)
+        real_load = TextProjector.load
+        loads = []
+
+        def slow_load(art_dir, mmap=True):
+            loads.append(art_dir)
+            time.sleep(0.05)
+            return real_load(art_dir, mmap)
+
+        with patch.object(TextProjector, "load", side_effect=slow_load):
+            threads = [threading.Thread(target=rec.text_vector, args=(f"grunge {i}",)) for i in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        assert loads == [tmp_path]
+        assert rec._pipeline is None  # served from the .npy form, text_svd.pkl never read
+
+    def test_preload_text(self, tmp_path):
+        import numpy as np
+        from src.recsys.recommenders.cosine import CosineRecommender, write_text_projector
+
+        pipe, X = self._pipeline()
+        write_text_projector(tmp_path, pipe)
+        rec = CosineRecommender(np.asarray(X, dtype=np.float32), [{"title": "T", "artist": "A"}] * len(X), art_dir=tmp_path)
+
+        assert rec.has_text_pipeline()
+        rec.preload_text()
+        assert rec._text_transform is not None
@@ -58,7 +58,7 @@ class TestSeanceAPI:
 
         call_count = [0]
 
-        def failing_living_filter(prompt):
+        def failing_living_filter(prompt, **kwargs):
             call_count[0] += 1
             if call_count[0] == 1:
                 raise RuntimeError("Gemini unavailable")
@@ -71,7 +71,7 @@ class TestSeanceAPI:
             }
 
         with patch(
-            "src.recsys.service.gemini_client.generate_json",
+            "src.recsys.service.gemini_client.agenerate_json",
             side_effect=failing_living_filter,
         ):
             res = client.post("/seance", json=VALID_PAYLOAD)
@@ -95,6 +95,9 @@ class TestSeanceFeatureUnit:
             for i in range(10)
         ]
         mock_rec.X = np.eye(10, 50, dtype=np.float32)
+        mock_rec.rows_for_artists.side_effect = lambda names: [
+            j for j, row in enumerate(mock_rec.id_map) if row["artist"] in names
+        ]
         mock_rec.get_user_taste_vector.return_value = np.ones(50)
         mock_rec._row_to_dict.side_effect = lambda j, s, **kw: {
             "row_index": j,
@@ -111,8 +114,8 @@ class TestSeanceFeatureUnit:
                 return_value=["Artist 0", "Artist 1"],
             ),
             patch(
-                "src.recsys.service.gemini_client.generate_json",
-                side_effect=lambda p: (
+                "src.recsys.service.gemini_client.agenerate_json",
+                side_effect=lambda p, **kw: (
                     ["Artist 0", "Artist 1"]
                     if "LIVING" in p
                     else {
@@ -135,3 +138,110 @@ class TestSeanceFeatureUnit:
         assert result["original_artist"] == "Kurt Cobain"
         assert isinstance(result["tracks"], list)
         assert "summary" in result
+
+
+class TestSeancePipeline:
+    """run() overlaps independent stages and logs per-stage timing."""
+
+    def _recommender(self):
+        import numpy as np
+        from src.recsys.recommenders.cosine import CosineRecommender
+
+        id_map = [{"title": f"Track {i}", "artist": f"Artist {i % 3}"} for i in range(9)]
+        id_map.append({"title": "Orig", "artist": "Kurt Cobain"})
+        X = np.random.default_rng(0).random((10, 8)).astype(np.float32)
+        return CosineRecommender(X, id_map)
+
+    async def test_independent_stages_overlap(self):
+        import asyncio
+        import threading
+        from unittest.mock import AsyncMock, patch
+
+        from src.recsys.service.features import seance
+
+        seed_started = threading.Event()
+        ranking_started = threading.Event()
+        real_seed, real_rank = seance._seed_vector, seance._ranked_candidates
+
+        async def lastfm(artist, art_dir=None):
+            # Only returns if the seed stage runs while Last.fm is in flight
+            for _ in range(200):
+                if seed_started.is_set():
+                    return ["Artist 0", "Artist 1", "Artist 2"]
+                await asyncio.sleep(0.01)
+            raise AssertionError("seed stage did not overlap Last.fm")
+
+        def seed(*args):
+            seed_started.set()
+            return real_seed(*args)
+
+        def rank(*args):
+            ranking_started.set()
+            return real_rank(*args)
+
+        async def gemini(prompt, **kwargs):
+            if "LIVING" in prompt:
+                for _ in range(200):
+                    if ranking_started.is_set():
+                        return ["Artist 0", "Artist 2"]
+                    await asyncio.sleep(0.01)
+                raise AssertionError("ranking did not overlap the living filter")
+            return {"tracks": [], "summary": "ok"}
+
+        with (
+            patch.object(seance, "_lastfm_similar_artists", side_effect=lastfm),
+            patch.object(seance, "_seed_vector", side_effect=seed),
+            patch.object(seance, "_ranked_candidates", side_effect=rank),
+            patch("src.recsys.service.gemini_client.agenerate_json", side_effect=gemini),
+            patch(
+                "src.recsys.service.preview_resolver.resolve_batch",
+                new=AsyncMock(side_effect=lambda t: t),
+            ),
+        ):
+            result = await seance.run(artist="Kurt Cobain", recommender=self._recommender())
+
+        assert result["summary"] == "ok"
+
+    async def test_living_filter_applied_to_ranked_candidates(self):
+        from unittest.mock import AsyncMock, patch
+
+        from src.recsys.service.features import seance
+
+        seen = {}
+
+        async def gemini(prompt, **kwargs):
+            if "LIVING" in prompt:
+                return ["Artist 1"]
+            seen["prompt"] = prompt
+            return {"tracks": [], "summary": ""}
+
+        with (
+            patch.object(seance, "_lastfm_similar_artists", return_value=["Artist 0", "Artist 1"]),
+            patch("src.recsys.service.gemini_client.agenerate_json", side_effect=gemini),
+            patch("src.recsys.service.preview_resolver.resolve_batch", new=AsyncMock(return_value=[])),
+        ):
+            await seance.run(artist="Kurt Cobain", recommender=self._recommender())
+
+        assert '"artist": "Artist 1"' in seen["prompt"]
+        assert '"artist": "Artist 0"' not in seen["prompt"]
+
+    async def test_stage_timings_logged(self, caplog):
+        import logging
+        from unittest.mock import AsyncMock, patch
+
+        from src.recsys.service.features import seance
+
+        with (
+            patch.object(seance, "_lastfm_similar_artists", return_value=["Artist 0"]),
+            patch(
+                "src.recsys.service.gemini_client.agenerate_json",
+                side_effect=lambda p, **kw: ["Artist 0"] if "LIVING" in p else {"tracks": [], "summary": ""},
+            ),
+            patch("src.recsys.service.preview_resolver.resolve_batch", new=AsyncMock(return_value=[])),
+            caplog.at_level(logging.INFO, logger=seance.log.name),
+        ):
+            await seance.run(artist="Kurt Cobain", recommender=self._recommender())
+
+        line = next(r.getMessage() for r in caplog.records if "stages" in r.getMessage())
+        for stage in ("lastfm", "seed", "living_filter", "candidates", "reasoning", "previews"):
+            assert f"{stage}=" in line
@@ -61,7 +61,7 @@ class TestSoundtrackGeminiGracefulFallback:
         from unittest.mock import patch
 
         with patch(
-            "src.recsys.service.gemini_client.generate_json",
+            "src.recsys.service.gemini_client.agenerate_json",
             side_effect=RuntimeError("Gemini unavailable"),
         ):
             res = client.post("/soundtrack", json=VALID_PAYLOAD)
@@ -104,7 +104,7 @@ class TestSoundtrackFeatureUnit:
 
         with (
             patch(
-                "src.recsys.service.gemini_client.generate_json",
+                "src.recsys.service.gemini_client.agenerate_json",
                 return_value=fake_gemini,
             ),
             patch(
@@ -135,3 +135,108 @@ class TestSoundtrackFeatureUnit:
 
         result = await soundtrack.run(description="xyz", recommender=mock_rec)
         assert result["tracks"] == []
+
+
+class TestSoundtrackStream:
+    """POST /soundtrack/stream — NDJSON events."""
+
+    def _events(self, res):
+        import json
+
+        return [json.loads(line) for line in res.text.splitlines() if line]
+
+    def test_streams_candidates_tracks_then_summary(self, client):
+        res = client.post("/soundtrack/stream", json=VALID_PAYLOAD)
+        assert res.status_code == 200
+        assert res.headers["content-type"].startswith("application/x-ndjson")
+
+        events = self._events(res)
+        assert events[0]["event"] == "candidates"
+        assert events[0]["tracks"]
+        assert events[-1] == {"event": "summary", "summary": "A curated selection for the moment."}
+        tracks = [e for e in events if e["event"] == "track"]
+        assert sorted(e["rank"] for e in tracks) == list(range(5))
+        for e in tracks:
+            assert e["track"]["name"]
+            assert e["track"]["reasoning"] == "Fits the moment."
+
+    def test_empty_description_returns_400(self, client):
+        res = client.post("/soundtrack/stream", json={"description": " "})
+        assert res.status_code == 400
+
+    def test_gemini_failure_streams_fallback(self, client):
+        from unittest.mock import patch
+
+        async def broken(prompt, **kwargs):
+            raise RuntimeError("Gemini unavailable")
+            yield  # pragma: no cover
+
+        with patch("src.recsys.service.gemini_client.astream_json", new=broken):
+            res = client.post("/soundtrack/stream", json=VALID_PAYLOAD)
+
+        events = self._events(res)
+        assert len([e for e in events if e["event"] == "track"]) == 10
+        assert events[-1] == {"event": "summary", "summary": ""}
+
+    async def test_track_emitted_before_gemini_finishes(self):
+        import asyncio
+        import json
+        from unittest.mock import AsyncMock, MagicMock, patch
+
+        from src.recsys.service.features import soundtrack
+
+        mock_rec = MagicMock()
+        mock_rec.similar_by_text.return_value = [
+            {"row_index": i, "name": f"Track {i}", "artist": f"Artist {i}"} for i in range(3)
+        ]
+        release = asyncio.Event()
+
+        async def slow_stream(prompt, **kwargs):
+            yield '{"tracks": [' + json.dumps({"row_index": 1, "reasoning": "first"}) + ","
+            await release.wait()
+            yield json.dumps({"row_index": 2, "reasoning": "second"}) + '], "summary": "done"}'
+
+        with (
+            patch("src.recsys.service.gemini_client.astream_json", new=slow_stream),
+            patch(
+                "src.recsys.service.preview_resolver.resolve_batch",
+                new=AsyncMock(side_effect=lambda t: t),
+            ),
+        ):
+            events = soundtrack.stream(description="x", recommender=mock_rec)
+            assert (await anext(events))["event"] == "candidates"
+            first = await asyncio.wait_for(anext(events), 1)
+            assert first["track"]["reasoning"] == "first"
+            assert first["track"]["name"] == "Track 1"
+            release.set()
+            rest = [e async for e in events]
+
+        assert [e["event"] for e in rest] == ["track", "summary"]
+        assert rest[-1]["summary"] == "done"
+
+
+class TestJsonArrayStream:
+    DOC = (
+        '```json\n{"tracks": [{"row_index": 1, "reasoning": "has \\"}{ ] [ inside"},\n'
+        ' {"row_index": 2, "nested": [1, {"a": 2}]}], "summary": "s"}\n```'
+    )
+
+    @pytest.mark.parametrize("step", [1, 2, 5, 13, 1000])
+    def test_items_survive_any_chunking(self, step):
+        from src.recsys.service.gemini_client import JsonArrayStream
+
+        parser = JsonArrayStream("tracks")
+        items = []
+        for i in range(0, len(self.DOC), step):
+            items += parser.feed(self.DOC[i:i + step])
+
+        assert [it["row_index"] for it in items] == [1, 2]
+        assert items[0]["reasoning"] == 'has "}{ ] [ inside'
+        assert parser.result()["summary"] == "s"
+
+    def test_item_released_as_soon_as_it_closes(self):
+        from src.recsys.service.gemini_client import JsonArrayStream
+
+        parser = JsonArrayStream("tracks")
+        assert parser.feed('{"tracks": [{"row_index": 1') == []
+        assert parser.feed('}, {"row') == [{"row_index": 1}]
@@ -0,0 +1,195 @@
+# tests/test_storage.py
+"""
+Tests for the pluggable storage backends, exercised through db.py against
+the SQLite stand-in.
+"""
+import pytest
+from unittest.mock import patch
+
+
+@pytest.fixture
+def sqlite_db(tmp_path):
+    from src.recsys.service import db
+    from src.recsys.service.storage.sqlite import SqliteBackend
+
+    backend = SqliteBackend(tmp_path / "local.db")
+    db._known_users.clear()
+    with patch.object(db, "get_backend", return_value=backend):
+        yield db, backend
+    db._known_users.clear()
+    backend.close()
+
+
+def _event(track_id, kind="heart", tags=("pop",), ts=None, user="u1"):
+    return {
+        "user_id": user,
+        "track_id": str(track_id),
+        "interaction_type": kind,
+        "feature": "explore",
+        "tags": list(tags),
+        "timestamp": ts,
+    }
+
+
+class TestSqliteBackend:
+    def test_write_interactions_round_trip(self, sqlite_db):
+        db, _ = sqlite_db
+        assert db.write_interactions([_event(1), _event(2, "skip"), _event(3, "complete")])
+
+        history = db.get_interaction_history("u1")
+        assert [h["track_id"] for h in history] == ["3", "2", "1"]
+        assert db.get_interaction_history("u1", ["heart"])[0]["track_id"] == "1"
+        (row,) = db.get_taste_profile("u1")
+        assert row["tag"] == "pop"
+        assert abs(row["score"] - (1.0 - 0.3 + 0.5)) < 1e-9
+
+    def test_taste_increments_accumulate(self, sqlite_db):
+        db, _ = sqlite_db
+        db.register_user("u1")
+        db.update_taste_profile("u1", ["rock", "pop"], "heart")
+        db.update_taste_profile("u1", ["rock"], "heart")
+
+        scores = {r["tag"]: r["score"] for r in db.get_taste_profile("u1")}
+        assert scores == {"rock": 2.0, "pop": 1.0}
+        assert db.get_taste_profile("u1")[0]["tag"] == "rock"
+
+    def test_history_paging_and_window(self, sqlite_db):
+        db, _ = sqlite_db
+        ts = "2024-01-01T00:00:00+00:00"  # identical timestamps — id breaks ties
+        db.write_interactions([_event(i, ts=ts) for i in range(5)])
+        db.write_interactions([_event(9, ts="2024-02-01T00:00:00Z")])
+
+        page, cursor = db.get_interaction_history_page("u1", limit=2)
+        assert page[0]["track_id"] == "9" and cursor
+        with patch.object(db, "HISTORY_PAGE_SIZE", 2):
+            full = db.get_interaction_history("u1")
+        assert len(full) == 6 and len({h["id"] for h in full}) == 6
+        assert [h["track_id"] for h in db.get_interaction_history("u1", since="2024-01-15T00:00:00Z")] == ["9"]
+        assert len(db.get_interaction_history("u1", limit=3)) == 3
+
+    def test_log_interaction_registers_user(self, sqlite_db):
+        db, backend = sqlite_db
+        db.log_interaction("u2", "7", "complete", "soundtrack")
+        assert db.get_interaction_history("u2")[0]["feature"] == "soundtrack"
+        assert db.is_registered("u2")
+
+    def test_rejected_batch_rolls_back(self, sqlite_db):
+        db, _ = sqlite_db
+        assert db.write_interactions([_event(1), _event(2, kind="bogus")]) is False
+        assert db.get_interaction_history("u1") == []
+
+
+class TestIdempotentBatches:
+    def test_retry_after_failed_increment_counts_once(self, sqlite_db):
+        from src.recsys.service.storage import sqlite as sqlite_storage
+
+        db, _ = sqlite_db
+        events = [{**_event(1), "id": "e1"}, {**_event(2, "skip"), "id": "e2"}]
+        real = sqlite_storage.tag_deltas
+        calls = []
+
+        def fail_once(rows):
+            calls.append(rows)
+            if len(calls) == 1:
+                raise RuntimeError("increment failed")
+            return real(rows)
+
+        with patch.object(sqlite_storage, "tag_deltas", side_effect=fail_once):
+            assert db.write_interactions(events) is False
+            assert db.write_interactions(events) is True
+
+        assert [h["track_id"] for h in db.get_interaction_history("u1")] == ["2", "1"]
+        (row,) = db.get_taste_profile("u1")
+        assert abs(row["score"] - 0.7) < 1e-9
+
+    def test_replaying_a_landed_batch_is_a_no_op(self, sqlite_db):
+        db, backend = sqlite_db
+        events = [{**_event(1), "id": "e1"}, {**_event(2), "id": "e2"}]
+        assert db.write_interactions(events)
+        # e.g. the write committed but the caller timed out, or the process
+        # died before the spool ack — the same batch comes round again
+        assert db.write_interactions(events + [{**_event(3), "id": "e3"}])
+
+        assert len(db.get_interaction_history("u1")) == 3
+        assert db.get_taste_profile("u1")[0]["score"] == 3.0
+        assert backend.record_interactions(db._record_rows(events)) == 0
+
+    @pytest.mark.asyncio
+    async def test_async_retry_after_timeout_counts_once(self, sqlite_db):
+        import asyncio
+        import time
+
+        db, backend = sqlite_db
+        events = [{**_event(1), "id": "e1"}]
+        real = backend.record_interactions
+
+        def slow_but_commits(rows):
+            result = real(rows)
+            time.sleep(0.2)
+            return result
+
+        with (
+            patch.object(backend, "record_interactions", side_effect=slow_but_commits),
+            patch.object(db, "DB_STATEMENT_TIMEOUT_S", 0.05),
+        ):
+            assert await db.awrite_interactions(events) is False
+        await asyncio.sleep(0.3)  # the offloaded call finishes after the timeout
+        assert await db.awrite_interactions(events) is True
+
+        assert len(db.get_interaction_history("u1")) == 1
+        assert db.get_taste_profile("u1")[0]["score"] == 1.0
+
+
+class TestBackendSelection:
+    def test_unknown_backend_raises(self):
+        from src.recsys.service.storage import create_backend
+
+        with pytest.raises(ValueError):
+            create_backend("mongo")
+
+    def test_postgres_requires_dsn(self):
+        from src.recsys.service import storage
+
+        with patch.object(storage, "DATABASE_URL", ""):
+            with pytest.raises(RuntimeError):
+                storage.create_backend("postgres")
+
+
+class TestAsyncPath:
+    @pytest.mark.asyncio
+    async def test_async_round_trip_records_metrics(self, sqlite_db):
+        db, _ = sqlite_db
+        db.reset_stats()
+        assert await db.awrite_interactions([_event(1), _event(2)])
+        await db.aregister_user("u1")  # already known → no query
+
+        history = await db.aget_interaction_history("u1", ["heart"], limit=10)
+        assert [h["track_id"] for h in history] == ["2", "1"]
+        assert (await db.aget_taste_profile("u1"))[0]["score"] == 2.0
+
+        queries = db.stats()["queries"]
+        assert queries["register_users"]["calls"] == 1
+        assert queries["record_interactions"]["calls"] == 1
+        assert queries["get_interaction_history_page"]["s_mean"] >= 0
+
+    @pytest.mark.asyncio
+    async def test_slow_query_times_out(self, sqlite_db):
+        import asyncio
+
+        db, backend = sqlite_db
+        db.reset_stats()
+
+        async def stall(*args):
+            await asyncio.sleep(1)
+
+        with (
+            patch.object(backend, "arecord_interactions", side_effect=stall),
+            patch.object(db, "DB_STATEMENT_TIMEOUT_S", 0.01),
+        ):
+            assert await db.awrite_interactions([_event(1)]) is False
+
+        assert db.stats()["queries"]["record_interactions"]["timeouts"] == 1
+
+    def test_metrics_endpoint_reports_db(self, client):
+        body = client.get("/metrics").json()
+        assert "queries" in body["db"]
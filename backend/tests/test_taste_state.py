@@ -0,0 +1,204 @@
+# tests/test_taste_state.py
+"""
+Tests for the incrementally maintained per-user taste state.
+"""
+import time
+
+import numpy as np
+from unittest.mock import patch
+
+
+def _history(indices, kind="heart"):
+    return [{"track_id": str(i), "interaction_type": kind} for i in indices]
+
+
+class TestUserTasteState:
+    def test_build_matches_full_recompute(self):
+        from src.recsys.service.taste_state import build_state
+        from tests.conftest import _fake_recommender
+
+        rec = _fake_recommender()
+        history = _history(range(6)) + _history([2, 3], "complete") + [
+            {"track_id": "not-a-row", "interaction_type": "heart"}
+        ]
+        state = build_state(history, rec)
+
+        assert state.n_interactions == 8  # "not-a-row" isn't a catalog track
+        expected = np.asarray(rec.X)[[0, 1, 2, 3, 4, 5, 2, 3]].mean(axis=0)
+        np.testing.assert_allclose(state.taste_vector(), expected, rtol=1e-5)
+        assert sum(state.tag_weights.values()) > 0
+
+    def test_apply_updates_cached_users_only(self):
+        from src.recsys.service.taste_state import TasteStateStore
+        from tests.conftest import _fake_recommender
+
+        rec = _fake_recommender()
+        store = TasteStateStore()
+        store.hydrate("u1", _history(range(3)), rec)
+
+        applied = store.apply(
+            [
+                {"user_id": "u1", "track_id": "4", "interaction_type": "heart"},
+                {"user_id": "u1", "track_id": "5", "interaction_type": "skip"},
+                {"user_id": "u2", "track_id": "4", "interaction_type": "heart"},
+            ]
+        )
+
+        assert applied == 2
+        state = store.get("u1", rec)
+        assert state.n_interactions == 4  # the skip doesn't count
+        assert store.get("u2", rec) is None
+        np.testing.assert_allclose(
+            state.taste_vector(), np.asarray(rec.X)[[0, 1, 2, 4]].mean(axis=0), rtol=1e-5
+        )
+
+    def test_events_flushed_during_hydration_are_not_lost(self):
+        from src.recsys.service.taste_state import TasteStateStore
+        from tests.conftest import _fake_recommender
+
+        rec = _fake_recommender()
+        store = TasteStateStore()
+        history = [{**h, "id": f"e{i}"} for i, h in enumerate(_history(range(3)))]
+        landed = {"id": "e2", "user_id": "u1", "track_id": "2", "interaction_type": "heart"}
+        late = {"id": "e9", "user_id": "u1", "track_id": "9", "interaction_type": "heart"}
+
+        pending = store.begin_hydrate("u1")
+        # Applied between the history read and hydrate(): e2 made it into the
+        # read, e9 didn't
+        store.apply([landed, late])
+        store.hydrate("u1", history, rec, pending)
+
+        assert store.get("u1", rec).n_interactions == 4
+        assert store._hydrating == {}
+
+    def test_events_already_read_from_history_are_not_counted_twice(self):
+        from src.recsys.service.taste_state import TasteStateStore
+        from tests.conftest import _fake_recommender
+
+        rec = _fake_recommender()
+        store = TasteStateStore()
+        history = [{**h, "id": f"e{i}"} for i, h in enumerate(_history(range(3)))]
+        store.hydrate("u1", history, rec)
+
+        # The queue applies a batch the history read already included
+        applied = store.apply(
+            [
+                {"id": "e2", "user_id": "u1", "track_id": "2", "interaction_type": "heart"},
+                {"id": "e3", "user_id": "u1", "track_id": "3", "interaction_type": "heart"},
+            ]
+        )
+
+        assert applied == 1
+        assert store.get("u1", rec).n_interactions == 4
+
+    def test_out_of_range_and_negative_ids_are_ignored(self):
+        from src.recsys.service.taste_state import TasteStateStore, build_state
+        from tests.conftest import _fake_recommender
+
+        rec = _fake_recommender()
+        store = TasteStateStore()
+        store.hydrate("u1", _history([0, len(rec.id_map), -1]), rec)
+        state = store.get("u1", rec)
+        assert state.n_interactions == 1
+
+        applied = store.apply(
+            [
+                {"user_id": "u1", "track_id": "-1", "interaction_type": "heart"},
+                {"user_id": "u1", "track_id": "999999", "interaction_type": "heart"},
+                {"user_id": "u1", "track_id": "1", "interaction_type": "heart"},
+            ]
+        )
+
+        assert applied == 3
+        state = store.get("u1", rec)
+        assert state.n_interactions == 2  # the batch still applied its valid event
+        assert abs(state.vec_weight - 2) < 1e-6
+        assert set(state.tag_weights) == set(build_state(_history([0, 1]), rec).tag_weights)
+        np.testing.assert_allclose(
+            state.taste_vector(), np.asarray(rec.X)[[0, 1]].mean(axis=0), rtol=1e-5
+        )
+
+    def test_state_is_stale_after_catalog_swap_or_ttl(self):
+        from src.recsys.service.taste_state import TasteStateStore
+        from tests.conftest import _fake_recommender
+
+        rec, other = _fake_recommender(), _fake_recommender()
+        store = TasteStateStore()
+        store.hydrate("u1", _history(range(3)), rec)
+        assert store.get("u1", other) is None
+
+        expired = TasteStateStore(ttl_s=-1)
+        expired.hydrate("u1", _history(range(3)), rec)
+        assert expired.get("u1", rec) is None
+
+
+class TestCaptureUsesState:
+    def test_history_read_once(self, client):
+        from src.recsys.service import db
+
+        with patch.object(
+            db, "aget_interaction_history", return_value=_history(range(10))
+        ) as mock_history:
+            first = client.get("/algorithmic-capture?user_id=u-state").json()
+            second = client.get("/algorithmic-capture?user_id=u-state").json()
+
+        assert mock_history.call_count == 1
+        assert first["capture_score"] == second["capture_score"]
+        assert second["total_interactions"] == 10
+
+    def test_logged_interactions_update_state(self, client):
+        from src.recsys.service import db
+
+        user = "0b8f5f4e-4a8f-4c7e-9d39-6f1f3c2a9e11"
+
+        with patch.object(db, "aget_interaction_history", return_value=_history(range(10))):
+            client.get(f"/algorithmic-capture?user_id={user}")
+            client.post(
+                "/interactions",
+                json={"user_id": user, "track_id": "11", "interaction_type": "heart"},
+            )
+            deadline = time.monotonic() + 2
+            while time.monotonic() < deadline:
+                body = client.get(f"/algorithmic-capture?user_id={user}").json()
+                if body["total_interactions"] == 11:
+                    break
+                time.sleep(0.01)
+
+        assert body["total_interactions"] == 11
+
+
+class TestRecencyWeighting:
+    def test_recent_interactions_dominate(self):
+        from datetime import datetime, timedelta, timezone
+        from src.recsys.service.taste_state import build_state
+        from tests.conftest import _fake_recommender
+
+        rec = _fake_recommender()
+        now = datetime.now(timezone.utc)
+        old = (now - timedelta(days=365)).isoformat()
+        history = [
+            {"track_id": "0", "interaction_type": "heart", "timestamp": now.isoformat()},
+            {"track_id": "1", "interaction_type": "heart", "timestamp": old},
+        ]
+        state = build_state(history, rec, half_life_days=30)
+
+        X = np.asarray(rec.X)
+        vec = state.taste_vector()
+        assert np.linalg.norm(vec - X[0]) < np.linalg.norm(vec - X[1])
+        # Scores are expressed as of now: a fresh heart is worth ~1.0
+        scores = state.tag_scores()
+        assert all(v <= 1.0 + 1e-6 for v in scores.values())
+
+    def test_no_decay_when_half_life_is_zero(self):
+        from datetime import datetime, timedelta, timezone
+        from src.recsys.service.taste_state import build_state
+        from tests.conftest import _fake_recommender
+
+        rec = _fake_recommender()
+        old = (datetime.now(timezone.utc) - timedelta(days=365)).isoformat()
+        state = build_state(
+            [{"track_id": "1", "interaction_type": "heart", "timestamp": old}],
+            rec,
+            half_life_days=0,
+        )
+        assert all(abs(v - 1.0) < 1e-9 for v in state.tag_scores().values())
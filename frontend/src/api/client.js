@@ -91,6 +91,34 @@ export async function fetchSoundtrack(description) {
   return handleResponse(res);
 }
 
+// Streams /soundtrack/stream (NDJSON), calling onEvent for each event as it
+// arrives: "candidates", then one "track" per pick, then "summary".
+export async function streamSoundtrack(description, onEvent) {
+  const res = await fetch(`${API_BASE_URL}/soundtrack/stream`, {
+    method: "POST",
+    headers: buildHeaders(),
+    body: JSON.stringify({ description, user_id: getUserId() }),
+  });
+  if (!res.ok) {
+    await handleResponse(res);
+  }
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  for (;;) {
+    const { value, done } = await reader.read();
+    buffer += decoder.decode(value, { stream: !done });
+    const lines = buffer.split("\n");
+    buffer = lines.pop();
+    for (const line of lines) {
+      if (line.trim()) onEvent(JSON.parse(line));
+    }
+    if (done) break;
+  }
+  if (buffer.trim()) onEvent(JSON.parse(buffer));
+}
+
 // ─── Feature: Blind Taste Test ────────────────────────────────────────────────
 
 export async function fetchBlindTasteTest() {
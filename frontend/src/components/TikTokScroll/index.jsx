@@ -15,6 +15,10 @@ import { useInteractions } from "../../hooks/useInteractions";
  *   onComplete      — called when user reaches the summary card
  *   onHeartChange   — called with array of currently hearted track objects whenever it changes
  */
+// Hearts and skips follow the track, not its position, so a list that is
+// reordered while streaming in (Soundtrack) keeps them on the right card
+const trackKey = (track, i) => track.row_index ?? i;
+
 export function TikTokScroll({
   tracks = [],
   feature = "unknown",
@@ -33,7 +37,7 @@ export function TikTokScroll({
   // Bubble hearted tracks up to parent whenever the set changes
   useEffect(() => {
     if (onHeartChange) {
-      onHeartChange(tracks.filter((_, i) => hearted.has(i)));
+      onHeartChange(tracks.filter((t, i) => hearted.has(trackKey(t, i))));
     }
   }, [hearted]);
   const totalCards = tracks.length + (summaryCard ? 1 : 0);
@@ -71,7 +75,7 @@ export function TikTokScroll({
     const prev = prevActive.current;
     if (activeIndex > prev && prev < tracks.length) {
       const t = tracks[prev];
-      if (!skipped.has(prev) && !hearted.has(prev)) {
+      if (!skipped.has(trackKey(t, prev)) && !hearted.has(trackKey(t, prev))) {
         logInteraction(t.row_index, "complete", t.tags || []);
       }
     }
@@ -104,12 +108,13 @@ export function TikTokScroll({
   }
 
   function handleHeart(track, idx) {
+    const key = trackKey(track, idx);
     setHearted((prev) => {
       const next = new Set(prev);
-      if (next.has(idx)) {
-        next.delete(idx);
+      if (next.has(key)) {
+        next.delete(key);
       } else {
-        next.add(idx);
+        next.add(key);
         logInteraction(track.row_index, "heart", track.tags || []);
       }
       return next;
@@ -117,7 +122,7 @@ export function TikTokScroll({
   }
 
   function handleSkip(track, idx) {
-    setSkipped((prev) => new Set([...prev, idx]));
+    setSkipped((prev) => new Set([...prev, trackKey(track, idx)]));
     logInteraction(track.row_index, "skip", track.tags || []);
     scrollToIndex(Math.min(idx + 1, totalCards - 1));
   }
@@ -131,11 +136,11 @@ export function TikTokScroll({
     >
       {tracks.map((track, i) => (
         <TrackScrollCard
-          key={track.row_index ?? i}
+          key={trackKey(track, i)}
           data-index={i}
           track={track}
           isActive={i === activeIndex}
-          isHearted={hearted.has(i)}
+          isHearted={hearted.has(trackKey(track, i))}
           contextLine={getContextLine(track)}
           featureAccent={featureAccent}
           onHeart={() => handleHeart(track, i)}
@@ -1,11 +1,17 @@
 import { useState } from "react";
 import { Link } from "react-router-dom";
 import { TikTokScroll } from "../components/TikTokScroll";
-import { fetchSoundtrack } from "../api/client";
+import { streamSoundtrack } from "../api/client";
+
+function insertByRank(tracks, track) {
+  const at = tracks.findIndex((t) => t.rank > track.rank);
+  return at === -1 ? [...tracks, track] : [...tracks.slice(0, at), track, ...tracks.slice(at)];
+}
 
 export function Soundtrack() {
   const [description, setDescription] = useState("");
-  const [result, setResult] = useState(null);
+  const [tracks, setTracks] = useState([]);
+  const [summary, setSummary] = useState(null); // null until the stream finishes
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
   const [heartedTracks, setHeartedTracks] = useState([]);
@@ -15,24 +21,41 @@ export function Soundtrack() {
     if (!description.trim()) return;
     setLoading(true);
     setError(null);
-    setResult(null);
+    setTracks([]);
+    setSummary(null);
     setHeartedTracks([]);
+    let received = 0;
     try {
-      const data = await fetchSoundtrack(description.trim());
-      setResult(data);
+      // Picks arrive one by one as their previews resolve, so the first card
+      // plays right away; each is slotted in at its rank so the list ends up
+      // in Gemini's order. The "candidates" event (the cosine pool Gemini
+      // picks from) isn't shown — those aren't picks.
+      await streamSoundtrack(description.trim(), (event) => {
+        if (event.event === "track") {
+          received += 1;
+          setTracks((prev) => insertByRank(prev, { ...event.track, rank: event.rank }));
+        } else if (event.event === "summary") {
+          setSummary(event.summary || "");
+        }
+      });
     } catch (err) {
-      setError(err.message);
+      if (received) {
+        // Already scrolling — end the list on what arrived instead of an error
+        setSummary((prev) => prev ?? "");
+      } else {
+        setError(err.message);
+      }
     } finally {
       setLoading(false);
     }
   }
 
-  const summaryCard = result ? (
+  const summaryCard = summary !== null ? (
     <div className="summary-card">
       <span className="summary-card__eyebrow">your soundtrack</span>
       <h2 className="summary-card__title">the verdict.</h2>
       <hr className="summary-card__rule" />
-      {result.summary && <p className="summary-card__body">{result.summary}</p>}
+      {summary && <p className="summary-card__body">{summary}</p>}
 
       {heartedTracks.length > 0 && (
         <div className="summary-card__hearted">
@@ -56,10 +79,10 @@ export function Soundtrack() {
     </div>
   ) : null;
 
-  if (result) {
+  if (tracks.length > 0 || summary !== null) {
     return (
       <TikTokScroll
-        tracks={result.tracks}
+        tracks={tracks}
         feature="soundtrack"
         getContextLine={(t) => t.reasoning || ""}
         summaryCard={summaryCard}
@@ -139,6 +139,53 @@ describe("fetchSoundtrack", () => {
   });
 });
 
+// ── streamSoundtrack ───────────────────────────────────────────────────────
+
+function mockStreamResponse(chunks, status = 200) {
+  const encoder = new TextEncoder();
+  let i = 0;
+  return Promise.resolve({
+    ok: status >= 200 && status < 300,
+    status,
+    json: () => Promise.resolve({ detail: "failed" }),
+    body: {
+      getReader: () => ({
+        read: () =>
+          Promise.resolve(
+            i < chunks.length
+              ? { value: encoder.encode(chunks[i++]), done: false }
+              : { value: undefined, done: true }
+          ),
+      }),
+    },
+  });
+}
+
+describe("streamSoundtrack", () => {
+  it("emits one event per NDJSON line across chunk boundaries", async () => {
+    mockFetch.mockReturnValueOnce(
+      mockStreamResponse([
+        '{"event": "candidates", "tracks": []}\n{"event": "tr',
+        'ack", "rank": 0, "track": {"name": "A"}}\n',
+        '{"event": "summary", "summary": "s"}\n',
+      ])
+    );
+    const { streamSoundtrack } = await import("../../api/client.js");
+    const events = [];
+    await streamSoundtrack("a rainy evening", (e) => events.push(e));
+    const [url] = mockFetch.mock.calls[0];
+    expect(url).toContain("/soundtrack/stream");
+    expect(events.map((e) => e.event)).toEqual(["candidates", "track", "summary"]);
+    expect(events[1].track.name).toBe("A");
+  });
+
+  it("throws on non-ok response", async () => {
+    mockFetch.mockReturnValueOnce(mockStreamResponse([], 400));
+    const { streamSoundtrack } = await import("../../api/client.js");
+    await expect(streamSoundtrack(" ", () => {})).rejects.toThrow("failed");
+  });
+});
+
 // ── fetchSearch ────────────────────────────────────────────────────────────
 
 describe("fetchSearch", () => {
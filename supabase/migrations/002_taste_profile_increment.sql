@@ -0,0 +1,23 @@
+-- Atomic taste-profile increments
+-- Replaces the read-modify-write in db.update_taste_profile: the client sends
+-- (user_id, tag, delta) triples and Postgres adds them in a single statement,
+-- so concurrent interactions for the same user can no longer lose updates.
+--
+-- Called via PostgREST RPC:
+--   supabase.rpc("increment_taste_profile", {"deltas": [{"user_id": ..., "tag": ..., "delta": ...}]})
+
+CREATE OR REPLACE FUNCTION increment_taste_profile(deltas JSONB)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    INSERT INTO taste_profile (user_id, tag, score, updated_at)
+    SELECT d.user_id, d.tag, SUM(d.delta), NOW()
+    FROM jsonb_to_recordset(deltas) AS d(user_id UUID, tag VARCHAR, delta FLOAT)
+    -- Pre-aggregate: ON CONFLICT can't touch the same row twice in one statement
+    GROUP BY d.user_id, d.tag
+    ON CONFLICT (user_id, tag) DO UPDATE
+        SET score      = taste_profile.score + EXCLUDED.score,
+            updated_at = EXCLUDED.updated_at;
+$$;
+
+GRANT EXECUTE ON FUNCTION increment_taste_profile(JSONB) TO anon, authenticated;
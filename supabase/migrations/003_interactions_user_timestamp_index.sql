@@ -0,0 +1,10 @@
+-- Composite index for per-user history reads
+-- db.get_interaction_history_page filters on user_id and walks newest-first
+-- by (timestamp, id) with a keyset cursor. This index serves that scan
+-- directly — no sort, no heap visits for rows outside the page.
+
+CREATE INDEX IF NOT EXISTS idx_interactions_user_ts
+    ON interactions(user_id, timestamp DESC, id DESC);
+
+-- user_id is the leading column above, so the single-column index is redundant
+DROP INDEX IF EXISTS idx_interactions_user_id;
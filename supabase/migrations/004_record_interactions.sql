@@ -0,0 +1,58 @@
+-- Idempotent interaction batches
+-- db.write_interactions used to insert interactions and increment
+-- taste_profile in two calls. A batch that failed (or timed out) after the
+-- insert landed was retried in full, duplicating rows and adding its tag
+-- deltas twice. This function does both in one transaction, keyed on a
+-- client-generated interaction id:
+--   * rows whose id already exists are skipped (ON CONFLICT DO NOTHING)
+--   * taste_profile is incremented only for the rows actually inserted
+-- so replaying a batch is a no-op. Returns the number of rows inserted.
+--
+-- Called via PostgREST RPC:
+--   supabase.rpc("record_interactions", {"events": [
+--       {"id": ..., "user_id": ..., "track_id": ..., "interaction_type": ...,
+--        "feature": ..., "timestamp": ..., "tags": [...], "weight": ...}]})
+
+CREATE OR REPLACE FUNCTION record_interactions(events JSONB)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    inserted INTEGER;
+BEGIN
+    WITH ev AS (
+        SELECT DISTINCT ON (e.id) e.*
+        FROM jsonb_to_recordset(events) AS e(
+            id UUID, user_id UUID, track_id VARCHAR, interaction_type VARCHAR,
+            feature VARCHAR, timestamp TIMESTAMPTZ, tags JSONB, weight FLOAT
+        )
+    ),
+    ins AS (
+        INSERT INTO interactions (id, user_id, track_id, interaction_type, feature, timestamp)
+        SELECT id, user_id, track_id, interaction_type, feature, COALESCE(timestamp, NOW())
+        FROM ev
+        ON CONFLICT (id) DO NOTHING
+        RETURNING id
+    ),
+    deltas AS (
+        SELECT ev.user_id, t.tag, SUM(ev.weight) AS delta
+        FROM ev
+        JOIN ins USING (id)
+        CROSS JOIN LATERAL jsonb_array_elements_text(COALESCE(ev.tags, '[]'::jsonb)) AS t(tag)
+        WHERE ev.weight <> 0
+        -- Pre-aggregate: ON CONFLICT can't touch the same row twice in one statement
+        GROUP BY ev.user_id, t.tag
+    ),
+    upd AS (
+        INSERT INTO taste_profile (user_id, tag, score, updated_at)
+        SELECT user_id, tag, delta, NOW() FROM deltas
+        ON CONFLICT (user_id, tag) DO UPDATE
+            SET score      = taste_profile.score + EXCLUDED.score,
+                updated_at = EXCLUDED.updated_at
+    )
+    SELECT COUNT(*) INTO inserted FROM ins;
+    RETURN inserted;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION record_interactions(JSONB) TO anon, authenticated;